@@ -1,15 +1,41 @@
+import json
 import os
-import shutil
+import posixpath
+import time
 from functools import wraps
-from flask import (Flask, render_template, request, redirect,
-                   url_for, session, flash, send_from_directory, jsonify)
+from flask import (Flask, render_template, request, redirect, Response,
+                   url_for, session, flash, send_file, send_from_directory, jsonify)
+
+try:
+    import msgpack
+except ImportError:  # Optional: only needed for MessagePack listings
+    msgpack = None
+
 from config import Config
-from utils import get_disk_usage, safe_join
+from utils import TRASH_DIR_NAME, get_disk_usage
 from models import db, User
 from services.access_control import (get_user_root, get_user_root_rel, get_user_home_rel,
-                                     check_shared_access, ensure_path_allowed)
+                                     check_shared_access, ensure_path_allowed, authorize_path,
+                                     authorize_item)
 from services.user_service import reset_user_password, change_user_role
 from services.initialization import ensure_storage_structure
+from services.jobs import jobs
+from services.io_policy import apply_read_policy
+from services.compression import init_app as init_compression
+from services.assets import assets
+from services.checksums import (ChecksumMismatch, parse_expected_digest,
+                                save_upload, lookup_digest)
+from services.delta import DeltaError, apply_delta, default_block_size, get_signature, version_tag
+from services.preview import follow, is_binary, read_head, read_range, read_tail
+from services.file_ops import columnar_listing, list_directory, validate_batch, run_batch
+from services.events import (broker, watcher, notify_change,
+                             format_event_id, parse_event_id)
+from services.journal import changes_since, journal_scanner
+from services.metrics import RESOLUTIONS, metrics
+from services.forecast import forecaster, home_series
+from services.spindown import spindown
+from services.transfers import transfers
+from services.trash import trash_purger, move_to_trash, restore_item, request_purge, find_item
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -33,6 +59,37 @@ with app.app_context():
     # Ensure storage consistency (idempotent)
     ensure_storage_structure(app)
 
+# Start the background job workers (long-running file operations)
+jobs.init_app(app)
+trash_purger.init_app(app)
+transfers.init_app(app)
+watcher.init_app(app)
+journal_scanner.init_app(app)
+metrics.init_app(app)
+
+
+def _nas_root_usage():
+    usage = get_disk_usage(app.config['NAS_ROOT'])
+    if not usage['total']:
+        return {}
+    return {'disk.nas_root.used_gb': usage['used'], 'disk.nas_root.total_gb': usage['total'],
+            'disk.nas_root.percent': usage['percent']}
+
+
+# History for the dashboard: NAS_ROOT usage and transfer throughput
+metrics.add_source(_nas_root_usage)
+metrics.add_source(transfers.byte_counters, counters=True)
+
+# Folder listings of idle HDDs served from memory (SPINDOWN_AWARE)
+spindown.init_app(app)
+
+# Days-until-full forecasts from that history (and from measured user homes)
+forecaster.init_app(app)
+
+# Response compression and fingerprinted, precompressed static assets
+init_compression(app)
+assets.init_app(app)
+
 from disk_manager import disk_manager
 
 @disk_manager.before_request
@@ -91,6 +148,11 @@ def _require_user():
     return user, None
 
 
+def _item_rel_path(current_path, name):
+    """Joins a listing directory and an entry name into a normalized NAS-relative path."""
+    return posixpath.normpath(posixpath.join(current_path.strip('/'), name)).lstrip('/')
+
+
 # ─────────────────────────────────────────────
 # Auth Routes
 # ─────────────────────────────────────────────
@@ -165,7 +227,8 @@ def dashboard():
         return err
     disk_usage = get_disk_usage(app.config['NAS_ROOT'])
     shared_req = check_shared_access(user)
-    return render_template('dashboard.html', disk=disk_usage, shared_req=shared_req)
+    forecast = forecaster.snapshot(None if user.role == 'admin' else user.username)
+    return render_template('dashboard.html', disk=disk_usage, shared_req=shared_req, forecast=forecast)
 
 
 # ─────────────────────────────────────────────
@@ -192,51 +255,41 @@ def files(req_path=''):
             # Regular users redirect to their home directory
             return redirect(url_for('files', req_path=user_root_rel))
 
-    # Centralized access check (skip for admin at root — always allowed)
-    if req_path:
-        is_allowed, reason = ensure_path_allowed(user, req_path, nas_root)
-        if not is_allowed:
-            if reason == 'pending':
-                flash('Your shared folder access request is pending approval.', 'info')
-            elif reason == 'rejected':
-                flash('Your shared folder access request was rejected.', 'danger')
-            elif reason == 'no_request':
-                flash('You have not requested access to the shared folder.', 'warning')
-            else:
-                flash(reason or 'Access denied.', 'danger')
-            return redirect(url_for('files', req_path=user_root_rel))
+    # Centralized access check; the resolved path is used for everything below
+    resolved, reason = authorize_path(user, req_path, nas_root)
+    if resolved is None:
+        if reason == 'pending':
+            flash('Your shared folder access request is pending approval.', 'info')
+        elif reason == 'rejected':
+            flash('Your shared folder access request was rejected.', 'danger')
+        elif reason == 'no_request':
+            flash('You have not requested access to the shared folder.', 'warning')
+        else:
+            flash(reason or 'Access denied.', 'danger')
+        return redirect(url_for('files', req_path=user_root_rel))
 
-    # Resolve physical path
-    abs_path = safe_join(nas_root, req_path)
-    if not abs_path or not os.path.exists(abs_path):
+    abs_path = resolved.abs
+    if not os.path.exists(abs_path):
         flash('Path not found.', 'danger')
         return redirect(url_for('files', req_path=user_root_rel))
 
     # Serve file directly
     if os.path.isfile(abs_path):
-        return send_from_directory(os.path.dirname(abs_path),
-                                   os.path.basename(abs_path),
-                                   as_attachment=True)
+        response = send_from_directory(os.path.dirname(abs_path),
+                                       os.path.basename(abs_path),
+                                       as_attachment=True)
+        response = apply_read_policy(response, app.config)
+        return transfers.wrap_response(response, user.username, user.role, req_path)
 
     # List directory contents
     contents = []
     try:
-        with os.scandir(abs_path) as it:
-            for entry in it:
-                is_dir = entry.is_dir()
-                size = entry.stat().st_size if not is_dir else 0
-                rel_path = os.path.relpath(entry.path, nas_root).replace('\\', '/')
-                contents.append({
-                    'name': entry.name,
-                    'is_dir': is_dir,
-                    'size': f'{size / (1024 * 1024):.2f} MB' if not is_dir else '-',
-                    'path': rel_path,
-                })
+        for entry in list_directory(abs_path, nas_root):
+            entry['size'] = f"{entry['size'] / (1024 * 1024):.2f} MB" if not entry['is_dir'] else '-'
+            contents.append(entry)
     except PermissionError:
         flash('Permission denied accessing this directory.', 'danger')
 
-    contents.sort(key=lambda x: (not x['is_dir'], x['name'].lower()))
-
     # Calculate parent path (never let user escape their root)
     parent_path = None
     if req_path and req_path != user_root_rel and req_path != 'shared':
@@ -275,13 +328,10 @@ def file_action():
     nas_root = app.config['NAS_ROOT']
 
     # Centralized access check for the current directory
-    is_allowed, reason = ensure_path_allowed(user, current_path, nas_root)
-    if not is_allowed:
+    resolved, reason = authorize_path(user, current_path, nas_root)
+    if resolved is None:
         return jsonify({'status': 'error', 'message': 'Access denied'}), 403
-
-    full_current_dir = safe_join(nas_root, current_path)
-    if not full_current_dir:
-        return jsonify({'status': 'error', 'message': 'Invalid path'}), 400
+    full_current_dir = resolved.abs
 
     if action == 'upload':
         if 'file' not in request.files:
@@ -289,17 +339,33 @@ def file_action():
         file = request.files['file']
         if file.filename == '':
             return jsonify({'status': 'error', 'message': 'No selected file'}), 400
-        filename = file.filename  # Use secure_filename in production
-        file.save(os.path.join(full_current_dir, filename))
+        filename = os.path.basename(file.filename)  # Use secure_filename in production
+        try:
+            expected = parse_expected_digest(request.headers)
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        algorithm = app.config['UPLOAD_DIGEST_ALGORITHM']
+        try:
+            digest = save_upload(file, os.path.join(full_current_dir, filename), algorithm,
+                                 expected, app.config['UPLOAD_CHUNK_SIZE'],
+                                 size_hint=request.content_length, io_config=app.config)
+        except ChecksumMismatch as e:
+            return jsonify({'status': 'error', 'message': f'Upload corrupted: {e}'}), 422
+        notify_change('add', _item_rel_path(current_path, filename))
         flash(f'File {filename} uploaded successfully.', 'success')
-        return redirect(url_for('files', req_path=current_path))
+        response = redirect(url_for('files', req_path=current_path))
+        response.headers[f'X-Checksum-{algorithm}'] = digest
+        return response
 
     elif action == 'create_folder':
         folder_name = request.form.get('folder_name', '').strip()
-        if folder_name:
+        if folder_name == TRASH_DIR_NAME:
+            flash(f'"{TRASH_DIR_NAME}" is a reserved name.', 'danger')
+        elif folder_name:
             new_folder = os.path.join(full_current_dir, folder_name)
             try:
                 os.makedirs(new_folder)
+                notify_change('add', _item_rel_path(current_path, folder_name))
                 flash(f'Folder "{folder_name}" created.', 'success')
             except FileExistsError:
                 flash('Folder already exists.', 'warning')
@@ -310,32 +376,517 @@ def file_action():
     elif action == 'rename':
         old_name = request.form.get('old_name', '').strip()
         new_name = request.form.get('new_name', '').strip()
-        if old_name and new_name:
+        if new_name == TRASH_DIR_NAME:
+            flash(f'"{TRASH_DIR_NAME}" is a reserved name.', 'danger')
+        elif old_name and new_name:
+            source, _ = authorize_item(user, _item_rel_path(current_path, old_name), nas_root)
+            target, _ = authorize_path(user, _item_rel_path(current_path, new_name), nas_root)
             try:
-                os.rename(os.path.join(full_current_dir, old_name),
-                          os.path.join(full_current_dir, new_name))
+                if source is None or target is None:
+                    raise ValueError('Access denied.')
+                os.rename(source.abs, target.abs)
+                notify_change('rename', _item_rel_path(current_path, old_name),
+                              _item_rel_path(current_path, new_name))
                 flash(f'Renamed "{old_name}" to "{new_name}".', 'success')
             except Exception as e:
                 flash(f'Error renaming: {e}', 'danger')
         return redirect(url_for('files', req_path=current_path))
 
-    elif action == 'delete':
+    elif action in ('delete', 'copy', 'archive', 'rescan'):
         item_name = request.form.get('item_name', '').strip()
-        if item_name:
-            item_path = os.path.join(full_current_dir, item_name)
+        if not item_name:
+            return redirect(url_for('files', req_path=current_path))
+        item_rel = _item_rel_path(current_path, item_name)
+        check = authorize_item if action == 'delete' else authorize_path
+        item, _ = check(user, item_rel, nas_root)
+        if item is None or item.rel == '':
+            flash('Access denied.', 'danger')
+            return redirect(url_for('files', req_path=current_path))
+
+        if action == 'delete':
             try:
-                if os.path.isdir(item_path):
-                    shutil.rmtree(item_path)
-                else:
-                    os.remove(item_path)
-                flash(f'Deleted "{item_name}".', 'success')
+                move_to_trash(user, item_rel, nas_root)
+                flash(f'Moved "{item_name}" to the trash.', 'success')
             except Exception as e:
                 flash(f'Error deleting: {e}', 'danger')
+        elif action == 'copy':
+            dest_dir = request.form.get('dest_path', '').strip().strip('/')
+            dest, _ = authorize_path(user, dest_dir, nas_root)
+            if dest is None or not os.path.isdir(dest.abs):
+                flash('Invalid copy destination.', 'danger')
+            else:
+                jobs.submit(user, 'copy', src=item_rel, dest_dir=dest_dir)
+                flash(f'Copying "{item_name}" to "/{dest_dir}" in the background.', 'info')
+        elif action == 'archive':
+            jobs.submit(user, 'archive', path=item_rel)
+            flash(f'Creating "{item_name}.zip" in the background.', 'info')
+        else:
+            jobs.submit(user, 'rescan', path=item_rel)
+            flash(f'Scanning "{item_name}" in the background.', 'info')
         return redirect(url_for('files', req_path=current_path))
 
     return redirect(url_for('files', req_path=current_path))
 
 
+@app.route('/file/batch', methods=['POST'])
+@login_required
+def file_batch():
+    """
+    JSON batch endpoint for multi-select actions.
+    Body: {"operations": [{"op": "delete"|"move"|"rename"|"mkdir", "path": ..., ...}]}
+    The whole batch is authorized before anything runs.
+    """
+    user, err = _require_user()
+    if err:
+        return err
+    payload = request.get_json(silent=True) or {}
+    operations = payload.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'status': 'error', 'message': 'No operations given'}), 400
+    if len(operations) > app.config['BATCH_MAX_OPERATIONS']:
+        return jsonify({'status': 'error', 'message': 'Too many operations'}), 413
+
+    nas_root = app.config['NAS_ROOT']
+    normalized, errors = validate_batch(user, operations, nas_root)
+    if errors:
+        return jsonify({'status': 'error', 'message': 'Batch rejected', 'errors': errors}), 403
+
+    results = run_batch(user, normalized, nas_root, app.config['BATCH_MAX_WORKERS'])
+    failed = sum(1 for r in results if r['status'] != 'ok')
+    return jsonify({
+        'status': 'ok' if not failed else 'partial',
+        'succeeded': len(results) - failed,
+        'failed': failed,
+        'results': results,
+    })
+
+
+@app.route('/api/files')
+@app.route('/api/files/<path:req_path>')
+@login_required
+def api_list_files(req_path=''):
+    """
+    Compact directory listing for programmatic clients.
+    Entries are returned as parallel arrays (columnar) instead of one object
+    per entry; an entry's path is `path + '/' + names[i]`. Sizes are bytes,
+    mtimes epoch seconds, types 'd' (folder) or 'f' (file).
+    Send 'Accept: application/msgpack' (or ?format=msgpack) for MessagePack.
+    """
+    user, err = _require_user()
+    if err:
+        return err
+    nas_root = app.config['NAS_ROOT']
+    req_path = req_path.strip('/')
+    if not req_path and user.role != 'admin':
+        req_path = get_user_root_rel(user)
+
+    resolved, reason = authorize_path(user, req_path, nas_root)
+    if resolved is None:
+        return jsonify({'status': 'error', 'message': reason or 'Access denied'}), 403
+    abs_path = resolved.abs
+    if not os.path.isdir(abs_path):
+        return jsonify({'status': 'error', 'message': 'Folder not found'}), 404
+
+    try:
+        entries = list_directory(abs_path, nas_root)
+    except PermissionError:
+        return jsonify({'status': 'error', 'message': 'Permission denied'}), 403
+
+    listing = columnar_listing(req_path, entries)
+
+    wants_msgpack = (request.args.get('format') == 'msgpack' or
+                     request.accept_mimetypes.best_match(['application/json', 'application/msgpack'])
+                     == 'application/msgpack')
+    if wants_msgpack:
+        if msgpack is None:
+            return jsonify({'status': 'error', 'message': 'MessagePack is not available on this server'}), 406
+        response = Response(msgpack.packb(listing), mimetype='application/msgpack')
+    else:
+        response = jsonify(listing)
+    response.vary.add('Accept')
+    return response
+
+
+@app.route('/events/files')
+@app.route('/events/files/<path:req_path>')
+@login_required
+def file_events(req_path=''):
+    """
+    Pushes add/remove/rename/modify events for one folder.
+    Default is a Server-Sent Events stream; ?mode=poll is a long-poll fallback
+    returning JSON. Resume with Last-Event-ID (SSE) or ?since=<last_id> (poll);
+    a 'reset' means events were missed and the client should resync.
+    """
+    user, err = _require_user()
+    if err:
+        return err
+    nas_root = app.config['NAS_ROOT']
+    dir_rel = req_path.strip('/')
+    resolved, _ = authorize_path(user, dir_rel, nas_root)
+    if resolved is None or not os.path.isdir(resolved.abs):
+        return jsonify({'status': 'error', 'message': 'Access denied'}), 403
+    dir_rel = resolved.rel
+
+    since, reset = parse_event_id(request.headers.get('Last-Event-ID') or request.args.get('since'))
+
+    if request.args.get('mode') == 'poll':
+        broker.watch(dir_rel)
+        try:
+            events = []
+            if since is None or reset:
+                since = broker.seq
+            else:
+                events, reset = broker.wait(dir_rel, since, app.config['LONG_POLL_TIMEOUT'])
+                if reset:
+                    since = broker.seq
+        finally:
+            broker.unwatch(dir_rel)
+        last = events[-1][0] if events else since
+        return jsonify({'events': [ev for _, ev in events], 'last_id': format_event_id(last), 'reset': reset})
+
+    def stream():
+        broker.watch(dir_rel)
+        try:
+            cursor = since if since is not None and not reset else broker.seq
+            yield 'retry: 3000\n\n'
+            if reset:
+                yield 'event: reset\ndata: {}\n\n'
+            # Close periodically so a stream never holds a worker thread for good; the browser reconnects
+            deadline = time.monotonic() + app.config['SSE_MAX_SECONDS']
+            while time.monotonic() < deadline:
+                events, missed = broker.wait(dir_rel, cursor, app.config['SSE_KEEPALIVE'])
+                if missed:
+                    cursor = broker.seq
+                    yield f'id: {format_event_id(cursor)}\nevent: reset\ndata: {{}}\n\n'
+                    continue
+                if not events:
+                    yield ': keepalive\n\n'
+                    continue
+                for seq, event in events:
+                    yield f'id: {format_event_id(seq)}\nevent: change\ndata: {json.dumps(event)}\n\n'
+                    cursor = seq
+        finally:
+            broker.unwatch(dir_rel)
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def _preview_target(req_path):
+    """Returns (abs_path, None) for a previewable file, or (None, error_response)."""
+    user, err = _require_user()
+    if err:
+        return None, err
+    nas_root = app.config['NAS_ROOT']
+    resolved, _ = authorize_path(user, req_path, nas_root)
+    if resolved is None:
+        return None, (jsonify({'status': 'error', 'message': 'Access denied'}), 403)
+    abs_path = resolved.abs
+    if not os.path.isfile(abs_path):
+        return None, (jsonify({'status': 'error', 'message': 'File not found'}), 404)
+    return abs_path, None
+
+
+@app.route('/preview/<path:req_path>')
+@login_required
+def file_preview(req_path):
+    abs_path, err = _preview_target(req_path)
+    if err:
+        return err
+    return render_template('preview.html', path=req_path.strip('/'), name=os.path.basename(abs_path),
+                           default_lines=app.config['PREVIEW_DEFAULT_LINES'])
+
+
+@app.route('/api/preview/<path:req_path>')
+@login_required
+def api_preview(req_path):
+    """
+    Part of a text file without reading all of it: ?mode=head|tail (with
+    ?lines=N) or ?mode=range (with ?offset= and ?length=, in bytes).
+    """
+    abs_path, err = _preview_target(req_path)
+    if err:
+        return err
+    if is_binary(abs_path) and not request.args.get('force'):
+        return jsonify({'path': req_path.strip('/'), 'binary': True, 'size': os.path.getsize(abs_path)})
+
+    max_bytes = app.config['PREVIEW_MAX_BYTES']
+    lines = max(1, min(request.args.get('lines', app.config['PREVIEW_DEFAULT_LINES'], type=int),
+                       app.config['PREVIEW_MAX_LINES']))
+    mode = request.args.get('mode', 'head')
+    if mode == 'head':
+        result = read_head(abs_path, lines, max_bytes)
+    elif mode == 'tail':
+        result = read_tail(abs_path, lines, max_bytes)
+    elif mode == 'range':
+        result = read_range(abs_path, request.args.get('offset', 0, type=int),
+                            min(request.args.get('length', max_bytes, type=int), max_bytes))
+    else:
+        return jsonify({'status': 'error', 'message': f'Unknown preview mode "{mode}".'}), 400
+    result.update(path=req_path.strip('/'), mode=mode, binary=False)
+    return jsonify(result)
+
+
+@app.route('/events/tail/<path:req_path>')
+@login_required
+def tail_events(req_path):
+    """
+    "tail -f" over Server-Sent Events: 'append' events carry text added to
+    the file after ?from=<offset> (default: its current end); 'reset' means
+    the file was truncated or rotated. Event ids are byte offsets.
+    """
+    abs_path, err = _preview_target(req_path)
+    if err:
+        return err
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('from')
+    position = int(last_id) if last_id and last_id.isdigit() else os.path.getsize(abs_path)
+    config = app.config
+
+    def stream():
+        yield 'retry: 3000\n\n'
+        keepalive = time.monotonic() + config['SSE_KEEPALIVE']
+        deadline = time.monotonic() + config['SSE_MAX_SECONDS']
+        for kind, result in follow(abs_path, position, config['TAIL_POLL_INTERVAL'],
+                                   config['PREVIEW_MAX_BYTES'], deadline):
+            if kind == 'idle':
+                if time.monotonic() >= keepalive:
+                    keepalive = time.monotonic() + config['SSE_KEEPALIVE']
+                    yield ': keepalive\n\n'
+                continue
+            keepalive = time.monotonic() + config['SSE_KEEPALIVE']
+            yield f'id: {result["end"]}\nevent: {kind}\ndata: {json.dumps(result)}\n\n'
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/meta/<path:req_path>')
+@login_required
+def file_metadata(req_path):
+    """Size, mtime and recorded digest of a file, so sync tools can skip unchanged files."""
+    user, err = _require_user()
+    if err:
+        return err
+    nas_root = app.config['NAS_ROOT']
+    resolved, _ = authorize_path(user, req_path, nas_root)
+    if resolved is None:
+        return jsonify({'status': 'error', 'message': 'Access denied'}), 403
+    abs_path = resolved.abs
+    if not os.path.exists(abs_path):
+        return jsonify({'status': 'error', 'message': 'Path not found'}), 404
+
+    st = os.stat(abs_path)
+    is_dir = os.path.isdir(abs_path)
+    return jsonify({
+        'path': req_path.strip('/'),
+        'name': os.path.basename(abs_path),
+        'is_dir': is_dir,
+        'size': 0 if is_dir else st.st_size,
+        'mtime': st.st_mtime,
+        'digest': None if is_dir else lookup_digest(abs_path, st),
+    })
+
+
+@app.route('/api/delta/signature/<path:req_path>')
+@login_required
+def delta_signature(req_path):
+    """
+    Block signature of a file for rsync-style delta updates (format in
+    services/delta.py). The ETag identifies the file version; send it back
+    as If-Match with the delta.
+    """
+    user, err = _require_user()
+    if err:
+        return err
+    nas_root = app.config['NAS_ROOT']
+    resolved, _ = authorize_path(user, req_path, nas_root)
+    if resolved is None:
+        return jsonify({'status': 'error', 'message': 'Access denied'}), 403
+    abs_path = resolved.abs
+    if not os.path.isfile(abs_path):
+        return jsonify({'status': 'error', 'message': 'File not found'}), 404
+
+    block_size = request.args.get('block_size', type=int)
+    if block_size is None:
+        block_size = default_block_size(os.path.getsize(abs_path), app.config['DELTA_MIN_BLOCK_SIZE'])
+    try:
+        sig_path, block_size, st = get_signature(abs_path, app.config['DELTA_CACHE_DIR'], block_size)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    response = send_file(sig_path, mimetype='application/octet-stream', conditional=False)
+    response.headers['ETag'] = version_tag(st)
+    response.headers['X-Delta-Block-Size'] = str(block_size)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@app.route('/api/delta/patch/<path:req_path>', methods=['POST'])
+@login_required
+def delta_patch(req_path):
+    """
+    Applies a delta (request body, application/octet-stream) to an existing
+    file. If-Match must carry the signature's ETag, so a delta is never
+    applied to a different version than it was computed against.
+    """
+    user, err = _require_user()
+    if err:
+        return err
+    nas_root = app.config['NAS_ROOT']
+    resolved, _ = authorize_path(user, req_path, nas_root)
+    if resolved is None:
+        return jsonify({'status': 'error', 'message': 'Access denied'}), 403
+    abs_path = resolved.abs
+    if not os.path.isfile(abs_path):
+        return jsonify({'status': 'error', 'message': 'File not found'}), 404
+
+    if not request.if_match:
+        return jsonify({'status': 'error', 'message': 'If-Match with the signature ETag is required.'}), 428
+    if not request.if_match.contains_raw(version_tag(os.stat(abs_path))):
+        return jsonify({'status': 'error', 'message': 'File changed since the signature was taken.'}), 412
+
+    try:
+        expected = parse_expected_digest(request.headers)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    algorithm = app.config['UPLOAD_DIGEST_ALGORITHM']
+    try:
+        digest, reused, received = apply_delta(abs_path, request.stream, algorithm, expected)
+    except DeltaError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except ChecksumMismatch as e:
+        return jsonify({'status': 'error', 'message': f'Patched file corrupted: {e}'}), 422
+
+    notify_change('modify', resolved.rel)
+    response = jsonify({'status': 'success', 'size': reused + received,
+                        'reused_bytes': reused, 'received_bytes': received})
+    response.headers['ETag'] = version_tag(os.stat(abs_path))
+    response.headers[f'X-Checksum-{algorithm}'] = digest
+    return response
+
+
+@app.route('/api/changes')
+@login_required
+def api_changes():
+    """
+    Delta feed for sync clients: changes with a sequence number above ?since=,
+    oldest first. Poll again with since=last_seq while has_more is true.
+    'rescan' changes name a folder changed outside the app: list it again.
+    """
+    user, err = _require_user()
+    if err:
+        return err
+    since = request.args.get('since', 0, type=int)
+    limit = min(request.args.get('limit', app.config['JOURNAL_PAGE_SIZE'], type=int),
+                app.config['JOURNAL_PAGE_SIZE'])
+    return jsonify(changes_since(user, max(0, since), app.config['NAS_ROOT'], max(1, limit)))
+
+
+# ─────────────────────────────────────────────
+# Trash
+# ─────────────────────────────────────────────
+
+@app.route('/trash')
+@login_required
+def trash():
+    from models import TrashItem
+    user, err = _require_user()
+    if err:
+        return err
+    items = (TrashItem.query
+             .filter_by(user_id=user.id, purge_requested=False)
+             .filter(TrashItem.trash_path.isnot(None))
+             .order_by(TrashItem.deleted_at.desc())
+             .all())
+    return render_template('trash.html', items=items,
+                           retention_days=app.config['TRASH_RETENTION_DAYS'])
+
+
+@app.route('/trash/action', methods=['POST'])
+@login_required
+def trash_action():
+    from models import TrashItem
+    user, err = _require_user()
+    if err:
+        return err
+    action = request.form.get('action')
+    nas_root = app.config['NAS_ROOT']
+
+    if action == 'empty':
+        items = TrashItem.query.filter_by(user_id=user.id, purge_requested=False).all()
+        request_purge(items)
+        flash(f'Trash emptied ({len(items)} items). Space is reclaimed in the background.', 'success')
+        return redirect(url_for('trash'))
+
+    item = find_item(user, request.form.get('item_id'))
+    if not item:
+        flash('Error: Item not found.', 'danger')
+        return redirect(url_for('trash'))
+
+    if action == 'restore':
+        parent_rel = posixpath.dirname(item.original_path)
+        is_allowed, _ = ensure_path_allowed(user, parent_rel, nas_root)
+        if not is_allowed:
+            flash('You no longer have access to the original location.', 'danger')
+        else:
+            try:
+                restored = restore_item(item, nas_root)
+                flash(f'Restored "{item.name}" to "/{restored}".', 'success')
+            except Exception as e:
+                flash(f'Error restoring: {e}', 'danger')
+    elif action == 'purge':
+        request_purge([item])
+        flash(f'"{item.name}" will be permanently deleted.', 'success')
+
+    return redirect(url_for('trash'))
+
+
+# ─────────────────────────────────────────────
+# Background Jobs
+# ─────────────────────────────────────────────
+
+@app.route('/api/jobs')
+@login_required
+def list_jobs():
+    from models import Job
+    user, err = _require_user()
+    if err:
+        return err
+    query = Job.query.filter_by(user_id=user.id)
+    if request.args.get('active'):
+        query = query.filter(Job.status.in_(('queued', 'running')))
+    recent = query.order_by(Job.id.desc()).limit(20).all()
+    return jsonify({'jobs': [j.to_dict() for j in recent]})
+
+
+@app.route('/api/jobs/<int:job_id>')
+@login_required
+def job_status(job_id):
+    from models import Job
+    user, err = _require_user()
+    if err:
+        return err
+    job = Job.query.get_or_404(job_id)
+    if job.user_id != user.id and user.role != 'admin':
+        return jsonify({'status': 'error', 'message': 'Access denied'}), 403
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/jobs/<int:job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_job(job_id):
+    from models import Job
+    user, err = _require_user()
+    if err:
+        return err
+    job = Job.query.get_or_404(job_id)
+    if job.user_id != user.id and user.role != 'admin':
+        return jsonify({'status': 'error', 'message': 'Access denied'}), 403
+    if job.is_active:
+        jobs.cancel(job)
+    return jsonify(job.to_dict())
+
+
 # ─────────────────────────────────────────────
 # Admin – User Management
 # ─────────────────────────────────────────────
@@ -450,6 +1001,67 @@ def admin_requests():
     return render_template('shared_requests.html', requests=reqs)
 
 
+@app.route('/admin/transfers')
+@admin_required
+def admin_transfers():
+    return render_template('transfers.html', snapshot=transfers.snapshot())
+
+
+@app.route('/api/admin/transfers')
+@admin_required
+def api_admin_transfers():
+    """Active transfers and the bandwidth currently allocated to each user."""
+    return jsonify(transfers.snapshot())
+
+
+# Series everybody may read (the dashboard's disk usage, plus their own home); the rest is admin only
+PUBLIC_METRICS_PREFIX = 'disk.nas_root.'
+
+
+@app.route('/api/metrics')
+@admin_required
+def api_metrics():
+    return jsonify({'series': metrics.series_names(), 'resolutions': ['raw', *RESOLUTIONS]})
+
+
+@app.route('/api/metrics/<path:name>')
+@login_required
+def api_metric_series(name):
+    """
+    One series: ?resolution=raw|1m|1h|1d (default 1h) and ?hours= (default
+    24) or ?since=/?until= as Unix timestamps.
+    """
+    own_home = home_series(session.get('username', ''))
+    if session.get('role') != 'admin' and not (name.startswith(PUBLIC_METRICS_PREFIX) or name == own_home):
+        return jsonify({'status': 'error', 'message': 'Access denied'}), 403
+    resolution = request.args.get('resolution', '1h')
+    if resolution != 'raw' and resolution not in RESOLUTIONS:
+        return jsonify({'status': 'error', 'message': 'Unknown resolution'}), 400
+    since = request.args.get('since', type=float)
+    if since is None:
+        since = time.time() - request.args.get('hours', 24, type=float) * 3600
+    return jsonify({
+        'name': name,
+        'resolution': resolution,
+        'points': metrics.query(name, resolution, since, request.args.get('until', type=float))
+    })
+
+
+@app.route('/api/forecast')
+@login_required
+def api_forecast():
+    """Days until the NAS filesystem is full; admins get every user's home, users their own."""
+    username = None if session.get('role') == 'admin' else session.get('username')
+    return jsonify(forecaster.snapshot(username))
+
+
+@app.route('/api/spindown')
+@admin_required
+def api_spindown():
+    """Rotational disks under NAS_ROOT, the subtrees they hold and whether they are idle."""
+    return jsonify(spindown.status())
+
+
 @app.route('/admin/request/<int:req_id>/<action>', methods=['POST'])
 @admin_required
 def shared_request_action(req_id, action):
@@ -0,0 +1,60 @@
+"""
+Disk enumeration: lsblk backend vs sysfs backend.
+
+Times parse_linux_disks() (forks `lsblk -J` and parses its JSON) against
+parse_sysfs_disks() (reads /sys/block and /proc/self/mountinfo in-process)
+on the current machine, and checks that both report the same disks.
+
+    python benchmarks/disk_backends.py --runs 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from disk_manager.linux_backend import parse_linux_disks
+from disk_manager.sysfs_backend import parse_sysfs_disks
+
+
+def timed(fn, runs):
+    fn()  # Warm up (imports, dentry cache)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name:6s}  median {statistics.median(samples):8.2f} ms   p95 {p95:8.2f} ms   max {samples[-1]:8.2f} ms")
+
+
+def summary(disks):
+    return sorted((d.id, d.size_bytes, tuple(p.name for p in d.partitions), tuple(d.mount_points)) for d in disks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+
+    lsblk, sysfs = summary(parse_linux_disks()), summary(parse_sysfs_disks())
+    if lsblk != sysfs:
+        print("Backends disagree:")
+        print(f"  lsblk: {lsblk}")
+        print(f"  sysfs: {sysfs}")
+    else:
+        print(f"Both backends report {len(sysfs)} disk(s).")
+
+    report('lsblk', timed(parse_linux_disks, args.runs))
+    report('sysfs', timed(parse_sysfs_disks, args.runs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Disk parsers on large synthetic fixtures.
+
+Replays generated lsblk and PowerShell output (hundreds of disks with
+several partitions each) through parse_linux_disks() and
+parse_windows_disks(), so the cost of parsing and building DiskInfo
+objects can be profiled without the hardware or the commands.
+
+    python benchmarks/disk_parsers.py --disks 500 --partitions 8 --runs 20
+    python -m cProfile -s cumtime benchmarks/disk_parsers.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from disk_manager import utils
+from disk_manager.linux_backend import parse_linux_disks
+from disk_manager.replay import FixtureRunner
+from disk_manager.windows_backend import parse_windows_disks
+
+
+def lsblk_fixture(disks, partitions):
+    devices = [{"name": f"loop{i}", "size": 4096, "fstype": "squashfs", "mountpoint": f"/snap/app/{i}",
+                "type": "loop", "rm": False, "rota": False, "model": None, "serial": None}
+               for i in range(disks // 10)]
+    for d in range(disks):
+        name = f"sd{d}"
+        devices.append({
+            "name": name, "size": 4 * 1024 ** 4, "fstype": None, "mountpoint": None, "type": "disk",
+            "rm": d % 7 == 0, "rota": d % 2 == 0, "model": f"Synthetic Disk {d}", "serial": f"SN{d:08d}",
+            "children": [{"name": f"{name}p{p}", "size": 4 * 1024 ** 4 // partitions, "fstype": "ext4",
+                          "mountpoint": f"/mnt/{name}p{p}" if p % 2 else None, "type": "part",
+                          "rm": False, "rota": d % 2 == 0, "model": None, "serial": None}
+                         for p in range(1, partitions + 1)]
+        })
+    return json.dumps({"blockdevices": devices}, indent=3)
+
+
+def windows_fixtures(disks, partitions):
+    letters = [chr(c) for c in range(ord('C'), ord('Z') + 1)]
+    physical = [{"DeviceId": str(d), "FriendlyName": f"Synthetic Disk {d}", "Size": 4 * 1024 ** 4,
+                 "MediaType": "SSD" if d % 2 else "HDD", "BusType": "USB" if d % 7 == 0 else "SATA"}
+                for d in range(disks)]
+    parts, volumes = [], []
+    for d in range(disks):
+        for p in range(1, partitions + 1):
+            n = d * partitions + p
+            letter = letters[n] if n < len(letters) else None
+            parts.append({"DiskNumber": d, "PartitionNumber": p, "DriveLetter": letter,
+                          "Size": 4 * 1024 ** 4 // partitions})
+            if letter:
+                volumes.append({"DriveLetter": letter, "FileSystem": "NTFS", "DriveType": "Fixed"})
+    return {"disks": json.dumps(physical), "parts": json.dumps(parts), "vols": json.dumps(volumes)}
+
+
+def timed(fn, runs):
+    fn()  # Warm up
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name, samples, count):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name:8s} {count:5d} disks  median {statistics.median(samples):8.2f} ms   "
+          f"p95 {p95:8.2f} ms   max {samples[-1]:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--disks', type=int, default=500)
+    parser.add_argument('--partitions', type=int, default=8)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    fixtures = {"lsblk": lsblk_fixture(args.disks, args.partitions)}
+    fixtures.update(windows_fixtures(args.disks, args.partitions))
+    print(f"lsblk fixture {len(fixtures['lsblk']) / 1024:.0f} KiB, "
+          f"PowerShell fixtures {sum(len(fixtures[k]) for k in ('disks', 'parts', 'vols')) / 1024:.0f} KiB")
+
+    utils.set_command_runner(FixtureRunner(fixtures=fixtures))
+    try:
+        report('lsblk', timed(parse_linux_disks, args.runs), len(parse_linux_disks()))
+        report('windows', timed(parse_windows_disks, args.runs), len(parse_windows_disks()))
+    finally:
+        utils.set_command_runner(None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Listing latency while a large file is being downloaded.
+
+Builds a throwaway NAS tree with many folders and one large file, then
+lists every folder repeatedly while another thread streams the large file,
+once with plain buffered reads (what send_from_directory does) and once
+with the fadvise policy from services/io_policy.py. Prints listing latency
+percentiles and how much the page cache grew during each run.
+
+The effect is only visible when the large file does not fit in free RAM
+next to everything else, e.g. on a Pi:
+
+    python benchmarks/listing_under_transfer.py --size-mb 4096
+
+Run it as root to start each pass with a cold cache (drop_caches).
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.file_ops import list_directory
+from services.io_policy import ReadAhead
+
+CHUNK = 256 * 1024
+
+
+def page_cache_kb():
+    with open('/proc/meminfo') as f:
+        for line in f:
+            if line.startswith('Cached:'):
+                return int(line.split()[1])
+    return 0
+
+
+def drop_caches():
+    try:
+        os.sync()
+        with open('/proc/sys/vm/drop_caches', 'w') as f:
+            f.write('3\n')
+        return True
+    except OSError:
+        return False
+
+
+def build_tree(root, dirs, files, size_mb):
+    for d in range(dirs):
+        folder = os.path.join(root, f'folder{d:03d}')
+        os.makedirs(folder)
+        for i in range(files):
+            with open(os.path.join(folder, f'file{i:04d}.txt'), 'w') as f:
+                f.write('x' * 100)
+    big = os.path.join(root, 'big.bin')
+    block = os.urandom(1024 * 1024)
+    with open(big, 'wb') as f:
+        for _ in range(size_mb):
+            f.write(block)
+    return big
+
+
+def stream(path, use_policy, done):
+    with open(path, 'rb') as f:
+        policy = ReadAhead(f.fileno()) if use_policy else None
+        position = 0
+        while True:
+            chunk = f.read(CHUNK)
+            if not chunk:
+                break
+            position += len(chunk)
+            if policy and position % (policy.window // 4) < CHUNK:
+                policy.advance(position)
+        if policy:
+            policy.finish()
+    done.set()
+
+
+def run(root, big, use_policy):
+    # Warm the listings, as a busy server would have them
+    folders = sorted(p for p in os.listdir(root) if p.startswith('folder'))
+    for name in folders:
+        list_directory(os.path.join(root, name), root)
+
+    cache_before = page_cache_kb()
+    done = threading.Event()
+    started = time.perf_counter()
+    threading.Thread(target=stream, args=(big, use_policy, done), daemon=True).start()
+
+    samples = []
+    while not done.is_set():
+        for name in folders:
+            t = time.perf_counter()
+            list_directory(os.path.join(root, name), root)
+            samples.append((time.perf_counter() - t) * 1000)
+    elapsed = time.perf_counter() - started
+
+    # Listings right after the transfer show what it evicted
+    after = []
+    for name in folders:
+        t = time.perf_counter()
+        list_directory(os.path.join(root, name), root)
+        after.append((time.perf_counter() - t) * 1000)
+
+    samples.sort()
+    return {
+        'p50': statistics.median(samples),
+        'p95': samples[int(len(samples) * 0.95)],
+        'max': samples[-1],
+        'after': statistics.mean(after),
+        'cache_mb': (page_cache_kb() - cache_before) / 1024,
+        'mb_s': os.path.getsize(big) / (1024 * 1024) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=1024, help='Size of the streamed file')
+    parser.add_argument('--dirs', type=int, default=50)
+    parser.add_argument('--files', type=int, default=200, help='Files per folder')
+    parser.add_argument('--dir', default=None, help='Where to build the tree (default: system temp dir)')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='nas-bench-', dir=args.dir)
+    try:
+        print(f'Building {args.dirs}x{args.files} files and a {args.size_mb} MB file in {root}...')
+        big = build_tree(root, args.dirs, args.files, args.size_mb)
+        print(f"{'mode':<10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'after ms':>10}{'cache +MB':>11}{'MB/s':>9}")
+        for use_policy in (False, True):
+            cold = drop_caches()
+            r = run(root, big, use_policy)
+            mode = 'fadvise' if use_policy else 'plain'
+            print(f"{mode:<10}{r['p50']:>10.3f}{r['p95']:>10.3f}{r['max']:>10.2f}"
+                  f"{r['after']:>10.3f}{r['cache_mb']:>11.0f}{r['mb_s']:>9.0f}")
+        if not cold:
+            print('(not root: caches were not dropped between runs)')
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,21 @@
+import logging
 import os
 
+
+def _mock_hardware(value):
+    """NAS_MOCK_HARDWARE -> False, 'linux', 'windows' or 'record'. Unset means 'linux', as before."""
+    value = (value or '').strip().lower()
+    if value in ('0', 'false', 'no', 'off'):
+        return False
+    if value in ('', '1', 'true', 'yes', 'on', 'linux'):
+        return 'linux'
+    if value in ('windows', 'record'):
+        return value
+    logging.getLogger(__name__).warning(
+        f"Ignoring NAS_MOCK_HARDWARE={value!r}: expected false, true/linux, windows or record.")
+    return 'linux'
+
+
 class Config:
     # Secret key for session management
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev_key_very_secret_12345'
@@ -19,5 +35,123 @@ class Config:
     MAX_CONTENT_LENGTH = 1024 * 1024 * 1024
 
     # Disk Manager Configuration
-    MOCK_HARDWARE = True  # Set to False in production on real hardware
+    # False: real hardware. True/'linux' or 'windows': replay the lsblk or PowerShell fixtures
+    # in MOCK_HARDWARE_DIR instead of running the commands. 'record': run them and save fixtures.
+    # Replays the lsblk fixtures unless NAS_MOCK_HARDWARE is set: use false in production on real hardware.
+    MOCK_HARDWARE = _mock_hardware(os.environ.get('NAS_MOCK_HARDWARE'))
+    MOCK_HARDWARE_DIR = BASE_DIR  # lsblk_debug.json, disks_debug.json, parts_debug.json, vols_debug.json
     SUDO_CMD = 'sudo'     # Command prefix for privileged operations
+
+    # Background Jobs Configuration
+    JOB_WORKERS = 2              # Worker threads for long-running file operations
+    JOB_PROGRESS_INTERVAL = 0.5  # Minimum seconds between progress writes to the DB
+
+    # Trash Configuration
+    TRASH_RETENTION_DAYS = 30  # Trashed items older than this are purged automatically
+    TRASH_PURGE_INTERVAL = 60  # Seconds between background purger passes
+    TRASH_PURGE_RATE = 200     # Max entries removed per second while purging
+    TRASH_IDLE_SECONDS = 30    # Only purge after this many seconds without requests
+    TRASH_ACTIVITY_FILE = os.path.join(BASE_DIR, 'cache', 'last_request')  # mtime = last request, any worker
+
+    # Batch File Operations
+    BATCH_MAX_OPERATIONS = 1000  # Max operations accepted in a single batch request
+    BATCH_MAX_WORKERS = 4        # Operations executed concurrently per batch
+
+    # Upload Integrity
+    UPLOAD_DIGEST_ALGORITHM = 'sha256'  # 'sha256' or 'blake2b', recorded for every upload
+    UPLOAD_CHUNK_SIZE = 1024 * 1024     # Bytes read per write/hash step
+
+    # Response Compression
+    COMPRESS_RESPONSES = True  # gzip/brotli HTML, JSON and text responses when the client accepts it
+    COMPRESS_LEVEL = 6         # 1 (fastest) .. 9 (smallest)
+    COMPRESS_MIN_SIZE = 1024   # Bytes; smaller responses are not worth compressing
+
+    # Live Directory Updates
+    WATCH_INTERVAL = 2          # Seconds between checks of folders that have open viewers
+    WATCH_FULL_SCAN_EVERY = 5   # Re-list watched folders every N checks even if their mtime is unchanged
+    SSE_KEEPALIVE = 15          # Seconds between keepalive comments on idle event streams
+    SSE_MAX_SECONDS = 300       # Event streams are closed after this long; browsers reconnect
+    LONG_POLL_TIMEOUT = 25      # Max seconds a ?mode=poll request waits for events
+
+    # Change Journal
+    JOURNAL_RETENTION_DAYS = 30     # Sync clients offline for longer must do a full rescan
+    JOURNAL_PAGE_SIZE = 1000        # Max changes returned by one /api/changes request
+    JOURNAL_SCAN_INTERVAL = 300     # Seconds between scans for changes in folders nobody has open (0 = off)
+    JOURNAL_SCAN_STATE = os.path.join(BASE_DIR, 'cache', 'journal_dirs.json')  # Folder mtimes of the last scan
+    JOURNAL_LOCK_FILE = os.path.join(BASE_DIR, 'cache', 'journal.lock')  # Lets one worker journal a detected change
+
+    # Delta Sync
+    DELTA_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'signatures')  # Cached block signatures
+    DELTA_MIN_BLOCK_SIZE = 4 * 1024     # Lower bound for the automatic (sqrt of size) block size
+
+    # Bandwidth Shaping (bytes per second; 0 = unlimited)
+    # The buckets live in the server process: run a single gunicorn worker (see the Dockerfile),
+    # every additional worker would get its own full allowance.
+    TRANSFER_GLOBAL_RATE = 0            # Shared by all transfers, split fairly between active users
+    TRANSFER_USER_RATE = 0              # Cap for any single user, whatever their fair share
+    TRANSFER_ROLE_WEIGHTS = {'admin': 1, 'user': 1}  # Relative share of the global rate per role
+    TRANSFER_BURST_SECONDS = 0.25       # Bucket depth, in seconds of traffic at the allocated rate
+
+    # Transfer Admission Control (0 = no limit)
+    # Slots and the queue are counted per server process, like the buckets above: keep one worker.
+    TRANSFER_MAX_ACTIVE = 8             # Concurrent uploads + downloads for the whole server
+    TRANSFER_MAX_PER_USER = 3           # Concurrent uploads + downloads per user
+    TRANSFER_QUEUE_SIZE = 16            # Transfers allowed to wait for a slot; beyond that -> 503
+    TRANSFER_QUEUE_TIMEOUT = 20         # Seconds a queued transfer waits before giving up with 503
+    TRANSFER_RETRY_AFTER = 5            # Retry-After (seconds) sent with those 503 responses
+
+    # Page Cache Policy for Large Transfers
+    IO_POLICY_MIN_SIZE = 64 * 1024 * 1024   # Files at least this large are streamed with fadvise hints
+    IO_POLICY_WINDOW = 8 * 1024 * 1024      # Read-ahead / drop-behind granularity
+    IO_READ_CHUNK_SIZE = 256 * 1024         # Read size for large downloads (werkzeug's default is 8 KiB)
+    IO_DIRECT_UPLOAD_MIN_SIZE = 0           # Uploads at least this large use O_DIRECT (0 = never)
+
+    # Text Preview
+    PREVIEW_DEFAULT_LINES = 200
+    PREVIEW_MAX_LINES = 10000
+    PREVIEW_MAX_BYTES = 1024 * 1024     # Largest chunk of a file returned by one preview / tail event
+    TAIL_POLL_INTERVAL = 1              # Seconds between size checks of a followed file
+
+    # Disk Inventory
+    DISK_BACKEND = 'lsblk'      # Linux: 'lsblk' (forks lsblk) or 'sysfs' (reads /sys and /proc directly)
+    DISK_INVENTORY_TTL = 60     # Seconds between rescans when no block uevent arrives
+    DISK_UEVENT_SETTLE = 1.0    # Quiet time after a plug/unplug burst before rescanning
+    DISK_COMMAND_TIMEOUT = 10   # Seconds before lsblk/PowerShell is killed (hung USB disks)
+    DISK_COMMAND_MAX_OUTPUT = 4 * 1024 * 1024  # Bytes of output accepted per command
+    DISK_COMMAND_CACHE_TTL = 2  # Seconds identical commands reuse a successful result
+    DISK_USAGE_TTL = 10         # Seconds a mount's used/free space and inodes are cached
+    DISK_USAGE_TIMEOUT = 2      # Seconds /api/disks waits for statvfs on slow or stale mounts
+
+    # Disk Statistics (/proc/diskstats)
+    DISK_STATS_INTERVAL = 5             # Seconds between samples (0 disables the sampler)
+    DISK_STATS_LIVE_POINTS = 720        # Samples kept in memory per disk (1 hour at 5s)
+    DISK_STATS_HISTORY_STEP = 300       # Seconds averaged into one history point
+    DISK_STATS_HISTORY_DAYS = 7         # History retention
+    DISK_STATS_HISTORY_FILE = os.path.join(BASE_DIR, 'cache', 'diskstats.jsonl')
+
+    # Spin-Down Awareness (rotational disks under NAS_ROOT)
+    SPINDOWN_AWARE = False              # Serve folder listings of idle HDDs from memory instead of waking them
+    SPINDOWN_IDLE_SECONDS = 120         # A disk without reads or writes for this long counts as idle
+    SPINDOWN_CHECK_INTERVAL = 10        # Seconds between checks of /proc/diskstats and the device state
+    SPINDOWN_SNAPSHOT_DIRS = 10000      # Folder listings remembered (least recently used are dropped)
+
+    # Software RAID (/proc/mdstat)
+    RAID_SAMPLE_INTERVAL = 5            # Seconds between reads of array state and rebuild progress (0: read per request)
+
+    # Metrics History
+    METRICS_DB = os.path.join(BASE_DIR, 'metrics.db')  # SQLite file with the 1m/1h/1d rollups
+    METRICS_SAMPLE_INTERVAL = 60        # Seconds between polls of disk usage and transfer counters
+    METRICS_FLUSH_INTERVAL = 60         # Seconds between writes of finished minutes
+    METRICS_RAW_POINTS = 360            # Raw points kept in memory per series
+    METRICS_RETENTION_DAYS = {'1m': 2, '1h': 90, '1d': 5 * 365}
+
+    # Capacity Forecast (needs NumPy)
+    FORECAST_INTERVAL = 3600            # Seconds between home measurements and model updates
+    FORECAST_WINDOW_DAYS = 30           # History read when the model starts
+    FORECAST_HALF_LIFE_DAYS = 7         # Growth this old counts half as much as today's
+    FORECAST_MIN_HISTORY_HOURS = 24     # No prediction before this much history exists
+
+    # Storage Benchmark
+    BENCHMARK_FILE_SIZE = 256 * 1024 * 1024  # Test file size; capped at 10% of the free space
+    BENCHMARK_RANDOM_SECONDS = 5        # Duration of each random 4K read / write phase
+    BENCHMARK_FSYNC_COUNT = 100         # 4K write + fsync rounds timed for the latency figures
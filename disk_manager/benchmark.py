@@ -0,0 +1,199 @@
+import logging
+import mmap
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+BLOCK = 4096                    # Random I/O size; also the O_DIRECT alignment
+SEQ_CHUNK = 1024 * 1024         # Sequential I/O size
+MIN_FILE_SIZE = 16 * 1024 * 1024
+MAX_FREE_FRACTION = 0.1         # Never take more than this share of the free space
+
+DEFAULT_FILE_SIZE = 256 * 1024 * 1024
+DEFAULT_RANDOM_SECONDS = 5.0
+DEFAULT_FSYNC_COUNT = 100
+
+STAGES = ("Sequential write", "Sequential read", "Random read", "Random write", "fsync latency")
+
+# Called with (stage index, message); may raise to abort (e.g. job cancellation)
+ProgressCallback = Callable[[int, str], None]
+
+
+def _fadvise(fd: int, advice_name: str) -> None:
+    advice = getattr(os, advice_name, None)
+    if advice is not None and hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, advice)
+        except OSError:
+            pass
+
+
+def _drop_cache(fd: int) -> None:
+    """Evicts the test file from the page cache so reads hit the disk."""
+    _fadvise(fd, "POSIX_FADV_DONTNEED")
+
+
+def _open_direct(path: str, flags: int) -> tuple:
+    """Opens with O_DIRECT where the filesystem supports it. Returns (fd, direct)."""
+    if hasattr(os, "O_DIRECT"):
+        try:
+            return os.open(path, flags | os.O_DIRECT), True
+        except OSError:
+            pass  # tmpfs and some FUSE filesystems refuse it
+    fd = os.open(path, flags)
+    _fadvise(fd, "POSIX_FADV_RANDOM")  # No read-ahead at least
+    return fd, False
+
+
+def _pread_block(fd: int, buffer: mmap.mmap, offset: int) -> None:
+    if hasattr(os, "preadv"):
+        os.preadv(fd, [buffer], offset)
+    else:
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.read(fd, BLOCK)
+
+
+def _pwrite_block(fd: int, buffer: mmap.mmap, offset: int) -> None:
+    if hasattr(os, "pwritev"):
+        os.pwritev(fd, [buffer], offset)
+    else:
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, buffer)
+
+
+def benchmark_file_size(mount_point: str, requested: int) -> int:
+    """The requested test file size, capped at MAX_FREE_FRACTION of the free space."""
+    free = shutil.disk_usage(mount_point).free
+    size = min(requested, int(free * MAX_FREE_FRACTION))
+    size -= size % SEQ_CHUNK
+    if size < MIN_FILE_SIZE:
+        raise ValueError(f"Not enough free space on {mount_point} for a benchmark.")
+    return size
+
+
+def _sequential_write(path: str, size: int, progress: ProgressCallback) -> float:
+    data = os.urandom(SEQ_CHUNK)  # Incompressible, in case the filesystem compresses
+    fd = os.open(path, os.O_WRONLY | os.O_TRUNC)
+    try:
+        start = time.perf_counter()
+        written = 0
+        while written < size:
+            written += os.write(fd, data)
+            if written % (64 * SEQ_CHUNK) == 0:
+                progress(0, f"Sequential write: {written // SEQ_CHUNK} MiB")
+        os.fsync(fd)  # Until it is on the disk, it was only written to RAM
+        elapsed = time.perf_counter() - start
+        _drop_cache(fd)
+    finally:
+        os.close(fd)
+    return size / elapsed
+
+
+def _sequential_read(path: str, size: int, progress: ProgressCallback) -> float:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        _drop_cache(fd)
+        start = time.perf_counter()
+        read = 0
+        while True:
+            chunk = os.read(fd, SEQ_CHUNK)
+            if not chunk:
+                break
+            read += len(chunk)
+            if read % (64 * SEQ_CHUNK) == 0:
+                progress(1, f"Sequential read: {read // SEQ_CHUNK} MiB")
+        elapsed = time.perf_counter() - start
+        _drop_cache(fd)
+    finally:
+        os.close(fd)
+    return read / elapsed
+
+
+def _random_io(path: str, size: int, seconds: float, write: bool, stage: int, progress: ProgressCallback) -> float:
+    fd, direct = _open_direct(path, os.O_RDWR if write else os.O_RDONLY)
+    buffer = mmap.mmap(-1, BLOCK)  # Page-aligned, as O_DIRECT requires
+    buffer.write(os.urandom(BLOCK))
+    blocks = size // BLOCK
+    try:
+        _drop_cache(fd)
+        ops = 0
+        start = time.perf_counter()
+        deadline = start + seconds
+        while True:
+            offset = random.randrange(blocks) * BLOCK
+            if write:
+                _pwrite_block(fd, buffer, offset)
+            else:
+                _pread_block(fd, buffer, offset)
+            ops += 1
+            if ops % 256 == 0:
+                if time.perf_counter() >= deadline:
+                    break
+                progress(stage, f"{STAGES[stage]}: {ops} ops")
+        if write and not direct:
+            os.fsync(fd)  # Buffered writes only count once they reach the disk
+        elapsed = time.perf_counter() - start
+        _drop_cache(fd)
+    finally:
+        buffer.close()
+        os.close(fd)
+    return ops / elapsed
+
+
+def _fsync_latency(path: str, size: int, count: int, progress: ProgressCallback) -> Dict[str, float]:
+    fd = os.open(path, os.O_WRONLY)
+    data = os.urandom(BLOCK)
+    samples = []
+    try:
+        for i in range(count):
+            os.lseek(fd, random.randrange(size // BLOCK) * BLOCK, os.SEEK_SET)
+            os.write(fd, data)
+            start = time.perf_counter()
+            os.fsync(fd)
+            samples.append((time.perf_counter() - start) * 1000)
+            if i % 10 == 0:
+                progress(4, f"fsync latency: {i}/{count}")
+    finally:
+        os.close(fd)
+    samples.sort()
+    return {
+        "fsync_avg_ms": sum(samples) / len(samples),
+        "fsync_p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def run_benchmark(mount_point: str, file_size: int = DEFAULT_FILE_SIZE,
+                  random_seconds: float = DEFAULT_RANDOM_SECONDS, fsync_count: int = DEFAULT_FSYNC_COUNT,
+                  progress: Optional[ProgressCallback] = None) -> Dict[str, float]:
+    """
+    Measures the filesystem at mount_point with a temporary file of at most
+    file_size bytes (removed afterwards, also when progress() raises).
+    Returns throughputs in bytes/s, IOPS and fsync latencies in ms.
+    """
+    progress = progress or (lambda stage, message: None)
+    size = benchmark_file_size(mount_point, file_size)
+    fd, path = tempfile.mkstemp(prefix=".nas-benchmark-", dir=mount_point)
+    os.close(fd)
+    try:
+        results = {"file_size": size}
+        progress(0, STAGES[0])
+        results["seq_write_bps"] = _sequential_write(path, size, progress)
+        progress(1, STAGES[1])
+        results["seq_read_bps"] = _sequential_read(path, size, progress)
+        progress(2, STAGES[2])
+        results["rand_read_iops"] = _random_io(path, size, random_seconds, False, 2, progress)
+        progress(3, STAGES[3])
+        results["rand_write_iops"] = _random_io(path, size, random_seconds, True, 3, progress)
+        progress(4, STAGES[4])
+        results.update(_fsync_latency(path, size, fsync_count, progress))
+        return results
+    finally:
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.error(f"Failed to remove benchmark file {path}: {e}")
@@ -1,7 +1,14 @@
 import platform
 import logging
+from dataclasses import replace
 from typing import List, Optional
 from .models import DiskInfo
+from .inventory import DiskInventory
+from .diskstats import DiskStatsSampler
+from .usage import MountUsageCache
+from .raid import RaidMonitor
+from . import replay, utils
+from .linux_backend import parse_linux_disks
 
 logger = logging.getLogger(__name__)
 
@@ -11,15 +18,20 @@ OS_TYPE = platform.system()
 if OS_TYPE == "Windows":
     from .windows_backend import parse_windows_disks as get_disks_backend
 elif OS_TYPE == "Linux":
-    from .linux_backend import parse_linux_disks as get_disks_backend
+    from .sysfs_backend import parse_sysfs_disks
+    LINUX_BACKENDS = {"lsblk": parse_linux_disks, "sysfs": parse_sysfs_disks}
+    get_disks_backend = parse_linux_disks
 else:
     logger.warning(f"Unsupported OS: {OS_TYPE}. Disk management features will be limited or unavailable.")
     def get_disks_backend() -> List[DiskInfo]:
         return []
 
-def get_all_disks() -> List[DiskInfo]:
+HOST_BACKEND = get_disks_backend
+
+def scan_disks() -> List[DiskInfo]:
     """
-    Returns a list of all physical disks detected on the system.
+    Runs the platform backend (e.g. lsblk) and returns every physical disk.
+    Prefer get_all_disks(), which serves a cached copy.
     """
     try:
         return get_disks_backend()
@@ -27,20 +39,84 @@ def get_all_disks() -> List[DiskInfo]:
         logger.error(f"Error fetching disks: {e}")
         return []
 
-def get_disk_by_id(disk_id: str) -> Optional[DiskInfo]:
+# Rescanned on kernel block uevents, refresh_disks() or after a TTL
+inventory = DiskInventory(scan_disks, on_invalidate=utils.clear_command_cache)
+
+# statvfs results per mount point, with a short TTL and a per-mount timeout
+usage_cache = MountUsageCache()
+
+# Throughput/IOPS/latency history from /proc/diskstats (Linux only)
+stats_sampler = DiskStatsSampler()
+
+# Software RAID (md) arrays from /proc/mdstat and sysfs, re-read by a sampler
+raid_monitor = RaidMonitor()
+
+def configure(config) -> None:
+    """
+    Applies app settings: DISK_BACKEND (Linux: 'lsblk' or 'sysfs'), command
+    limits and the inventory timings, and starts the statistics and RAID samplers.
+    MOCK_HARDWARE replays captured command output instead ('linux' or True:
+    lsblk, 'windows': PowerShell) or, with 'record', captures it; fixtures
+    live in MOCK_HARDWARE_DIR.
+    """
+    global get_disks_backend
+    mock = config.get("MOCK_HARDWARE", False)
+    if mock not in (False, True, "linux", "windows", "record"):
+        logger.warning(f"Unknown MOCK_HARDWARE {mock!r}, using the real hardware.")
+        mock = False
+    fixture_dir = config.get("MOCK_HARDWARE_DIR") or replay.DEFAULT_DIR
+    if mock and mock != "record":
+        utils.set_command_runner(replay.FixtureRunner(fixture_dir))
+        get_disks_backend = replay.PLATFORM_PARSERS.get(mock, parse_linux_disks)
+    else:
+        utils.set_command_runner(replay.FixtureRecorder(fixture_dir) if mock == "record" else None)
+        get_disks_backend = HOST_BACKEND
+        if OS_TYPE == "Linux":
+            backend = config.get("DISK_BACKEND", "lsblk")
+            if backend not in LINUX_BACKENDS:
+                logger.warning(f"Unknown DISK_BACKEND '{backend}', using lsblk.")
+                backend = "lsblk"
+            get_disks_backend = LINUX_BACKENDS[backend]
+    utils.configure(config)
+    inventory.configure(config)
+    inventory.invalidate()
+    usage_cache.configure(config)
+    stats_sampler.configure(config)
+    raid_monitor.configure(config)
+
+def _with_usage(disks: List[DiskInfo]) -> List[DiskInfo]:
+    """Copies of disks with space and inode usage attached to every mounted filesystem."""
+    usage = usage_cache.get_many(mp for disk in disks for mp in disk.mount_points)
+    result = []
+    for disk in disks:
+        partitions = [replace(p, usage=usage.get(p.mount_point)) if p.mount_point else p
+                      for p in disk.partitions]
+        part_mounts = {p.mount_point for p in disk.partitions}
+        own = [mp for mp in disk.mount_points if mp not in part_mounts]  # Whole-disk filesystem
+        result.append(replace(disk, partitions=partitions, usage=usage.get(own[0]) if own else None))
+    return result
+
+def get_all_disks(with_usage: bool = False) -> List[DiskInfo]:
+    """
+    Returns a list of all physical disks detected on the system.
+    with_usage also reports used/free space and inodes of mounted filesystems.
+    """
+    disks = inventory.get_all()
+    return _with_usage(disks) if with_usage else disks
+
+def get_disk_by_id(disk_id: str, with_usage: bool = False) -> Optional[DiskInfo]:
     """
     Returns a specific physical disk by its ID, or None if not found.
     """
-    disks = get_all_disks()
-    for d in disks:
-        if str(d.id) == str(disk_id):
-            return d
-    return None
+    disk = inventory.get(disk_id)
+    if disk is not None and with_usage:
+        disk = _with_usage([disk])[0]
+    return disk
 
 def refresh_disks():
     """
-    Placeholder for triggering a forced hardware rescan.
-    Usually unnecessary as API calls fetch real-time data, but may be useful in Linux (e.g. partprobe).
+    Forces a hardware rescan, e.g. after partitioning or when a change
+    was not announced by a uevent.
     """
-    logger.info("refresh_disks called. Disk detection is inherently real-time.")
-    pass
+    logger.info("refresh_disks called. Rescanning disks.")
+    inventory.refresh()
@@ -0,0 +1,261 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no /proc/diskstats either
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DISKSTATS_PATH = "/proc/diskstats"
+SECTOR_SIZE = 512  # diskstats counts 512-byte sectors whatever the hardware sector size
+
+# Partitions are skipped (their I/O is already counted on the whole disk), and so are these
+SKIP_PREFIXES = ("loop", "ram", "zram")
+
+# Order of the values in every sample, live or historical
+FIELDS = ("read_bps", "write_bps", "read_iops", "write_iops", "await_ms", "util")
+
+DEFAULT_INTERVAL = 5.0
+DEFAULT_LIVE_POINTS = 720         # One hour at the default interval
+DEFAULT_HISTORY_STEP = 300        # Seconds per downsampled history point
+DEFAULT_HISTORY_DAYS = 7
+
+# (reads, sectors_read, ms_reading, writes, sectors_written, ms_writing, ms_doing_io)
+Counters = Tuple[int, int, int, int, int, int, int]
+Sample = Tuple[float, Tuple[float, ...]]
+
+
+def parse_diskstats(path: str = DISKSTATS_PATH, sys_block: str = "/sys/block") -> Dict[str, Counters]:
+    """
+    Reads the cumulative counters of every whole disk from /proc/diskstats.
+    Whole disks are the devices listed in /sys/block.
+    """
+    try:
+        disks = {name.replace("!", "/") for name in os.listdir(sys_block)}
+    except OSError:
+        disks = None
+
+    counters = {}
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) < 14:
+                continue
+            name = fields[2]
+            if name.startswith(SKIP_PREFIXES) or (disks is not None and name not in disks):
+                continue
+            counters[name] = (int(fields[3]), int(fields[5]), int(fields[6]),
+                              int(fields[7]), int(fields[9]), int(fields[10]), int(fields[12]))
+    return counters
+
+
+def compute_rates(prev: Counters, cur: Counters, elapsed: float) -> Optional[Tuple[float, ...]]:
+    """
+    Per-second rates between two counter snapshots, in FIELDS order.
+    Returns None if a counter went backwards (device replaced, 32-bit wrap).
+    """
+    delta = [c - p for p, c in zip(prev, cur)]
+    if elapsed <= 0 or any(d < 0 for d in delta):
+        return None
+    reads, sectors_read, ms_reading, writes, sectors_written, ms_writing, ms_io = delta
+    ios = reads + writes
+    return (
+        round(sectors_read * SECTOR_SIZE / elapsed, 1),
+        round(sectors_written * SECTOR_SIZE / elapsed, 1),
+        round(reads / elapsed, 2),
+        round(writes / elapsed, 2),
+        round((ms_reading + ms_writing) / ios, 2) if ios else 0.0,
+        round(min(100.0, ms_io / (elapsed * 10)), 1),  # ms busy per second, as a percentage
+    )
+
+
+class DiskStatsSampler:
+    """
+    Background sampler of /proc/diskstats. Every interval it turns the
+    counter deltas into throughput, IOPS, average latency and utilization per
+    disk and keeps the result in an in-memory ring buffer. Averages over
+    history_step seconds are appended to a JSON-lines history file (one
+    line per step, all disks), which is pruned to history_days.
+
+    With several gunicorn workers, each samples for its own live view but
+    only the one holding the history file lock writes history.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._live: Dict[str, Deque[Sample]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._history_lock_file = None
+        self._bucket: Optional[int] = None
+        self._bucket_sums: Dict[str, List[float]] = {}
+        self._bucket_counts: Dict[str, int] = {}
+        self._last_prune = 0.0
+        self.interval = DEFAULT_INTERVAL
+        self.live_points = DEFAULT_LIVE_POINTS
+        self.history_step = DEFAULT_HISTORY_STEP
+        self.history_days = DEFAULT_HISTORY_DAYS
+        self.history_file: Optional[str] = None
+        self.available = os.path.exists(DISKSTATS_PATH)
+
+    def configure(self, config) -> None:
+        self.interval = config.get('DISK_STATS_INTERVAL', DEFAULT_INTERVAL)
+        self.live_points = config.get('DISK_STATS_LIVE_POINTS', DEFAULT_LIVE_POINTS)
+        self.history_step = config.get('DISK_STATS_HISTORY_STEP', DEFAULT_HISTORY_STEP)
+        self.history_days = config.get('DISK_STATS_HISTORY_DAYS', DEFAULT_HISTORY_DAYS)
+        self.history_file = config.get('DISK_STATS_HISTORY_FILE')
+        if self.available and self.interval:
+            self.start()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name='disk-stats', daemon=True)
+            self._thread.start()
+
+    # ── Sampling ──
+
+    def _loop(self) -> None:
+        prev, prev_at = None, 0.0
+        while True:
+            try:
+                counters = parse_diskstats()
+            except OSError as e:
+                logger.error(f"Failed to read {DISKSTATS_PATH}: {e}")
+                counters = None
+            now = time.monotonic()
+            if counters is not None and prev is not None:
+                self._record(time.time(), prev, counters, now - prev_at)
+            if counters is not None:
+                prev, prev_at = counters, now
+            time.sleep(self.interval)
+
+    def _record(self, timestamp: float, prev: Dict[str, Counters], cur: Dict[str, Counters], elapsed: float) -> None:
+        rates = {}
+        for name, counters in cur.items():
+            if name in prev:
+                values = compute_rates(prev[name], counters, elapsed)
+                if values is not None:
+                    rates[name] = values
+
+        with self._lock:
+            for name, values in rates.items():
+                ring = self._live.get(name)
+                if ring is None or ring.maxlen != self.live_points:
+                    ring = self._live[name] = deque(ring or (), maxlen=self.live_points)
+                ring.append((timestamp, values))
+            for name in list(self._live):
+                if name not in cur:
+                    del self._live[name]  # Unplugged
+
+        if self.history_file and self._owns_history():
+            self._accumulate(timestamp, rates)
+
+    # ── History ──
+
+    def _owns_history(self) -> bool:
+        if self._history_lock_file is not None:
+            return True
+        if fcntl is None:
+            return False
+        try:
+            os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+            lock = open(self.history_file + '.lock', 'w')
+        except OSError as e:
+            logger.error(f"Cannot open disk stats history lock: {e}")
+            self.history_file = None
+            return False
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()  # Another worker writes the history; retried next sample
+            return False
+        self._history_lock_file = lock  # Held for the life of the process
+        self._prune()
+        return True
+
+    def _accumulate(self, timestamp: float, rates: Dict[str, Tuple[float, ...]]) -> None:
+        bucket = int(timestamp // self.history_step)
+        if self._bucket is not None and bucket != self._bucket:
+            self._flush_bucket()
+        self._bucket = bucket
+        for name, values in rates.items():
+            sums = self._bucket_sums.setdefault(name, [0.0] * len(FIELDS))
+            for i, value in enumerate(values):
+                sums[i] += value
+            self._bucket_counts[name] = self._bucket_counts.get(name, 0) + 1
+
+    def _flush_bucket(self) -> None:
+        if self._bucket_sums:
+            point = {
+                't': self._bucket * self.history_step,
+                'd': {name: [round(s / self._bucket_counts[name], 2) for s in sums]
+                      for name, sums in self._bucket_sums.items()},
+            }
+            try:
+                with open(self.history_file, 'a') as f:
+                    f.write(json.dumps(point, separators=(',', ':')) + '\n')
+            except OSError as e:
+                logger.error(f"Failed to append disk stats history: {e}")
+        self._bucket_sums = {}
+        self._bucket_counts = {}
+        if time.monotonic() - self._last_prune > 86400:
+            self._prune()
+
+    def _read_history(self) -> List[dict]:
+        points = []
+        try:
+            with open(self.history_file) as f:
+                for line in f:
+                    try:
+                        points.append(json.loads(line))
+                    except ValueError:
+                        continue  # Torn last line after a crash
+        except OSError:
+            pass
+        return points
+
+    def _prune(self) -> None:
+        """Rewrites the history file without points older than history_days."""
+        self._last_prune = time.monotonic()
+        cutoff = time.time() - self.history_days * 86400
+        points = self._read_history()
+        kept = [p for p in points if p.get('t', 0) >= cutoff]
+        if len(kept) == len(points):
+            return
+        tmp = self.history_file + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                for point in kept:
+                    f.write(json.dumps(point, separators=(',', ':')) + '\n')
+            os.replace(tmp, self.history_file)
+        except OSError as e:
+            logger.error(f"Failed to prune disk stats history: {e}")
+
+    # ── Queries ──
+
+    def current(self) -> Dict[str, Dict[str, float]]:
+        """Latest sample per disk, as {name: {field: value, 'time': ts}}."""
+        with self._lock:
+            latest = {name: ring[-1] for name, ring in self._live.items() if ring}
+        return {name: dict(zip(FIELDS, values), time=ts) for name, (ts, values) in sorted(latest.items())}
+
+    def live(self, name: str) -> List[list]:
+        """The ring buffer for one disk: [[time, *values], ...], oldest first."""
+        with self._lock:
+            ring = list(self._live.get(name, ()))
+        return [[ts, *values] for ts, values in ring]
+
+    def history(self, name: str, since: float = 0) -> List[list]:
+        """Downsampled points for one disk from the history file: [[time, *values], ...]."""
+        if not self.history_file:
+            return []
+        return [[p['t'], *p['d'][name]] for p in self._read_history()
+                if p.get('t', 0) >= since and name in p.get('d', {})]
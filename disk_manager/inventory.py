@@ -0,0 +1,140 @@
+import logging
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .models import DiskInfo
+
+logger = logging.getLogger(__name__)
+
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_GROUP_KERNEL = 1
+
+DEFAULT_TTL = 60.0      # Seconds before a rescan even without uevents (safety net)
+DEFAULT_SETTLE = 1.0    # Seconds of uevent silence before the eager rescan (lets udev finish probing)
+
+
+def parse_uevent(message: bytes) -> Dict[str, str]:
+    """
+    Parses a kernel uevent datagram: 'action@devpath\\0KEY=VALUE\\0...'.
+    Returns the KEY=VALUE pairs (ACTION, DEVPATH, SUBSYSTEM, DEVNAME, ...).
+    """
+    fields = {}
+    for part in message.split(b'\0')[1:]:
+        key, sep, value = part.partition(b'=')
+        if sep:
+            fields[key.decode(errors='replace')] = value.decode(errors='replace')
+    return fields
+
+
+class DiskInventory:
+    """
+    Cached disk list. The (expensive) backend scan runs only when the kernel
+    reports a block device change over a NETLINK_KOBJECT_UEVENT socket, when
+    refresh() is called, or when the cache is older than the TTL; reads are
+    otherwise served from memory.
+    """
+
+    def __init__(self, scanner: Callable[[], List[DiskInfo]], on_invalidate: Optional[Callable[[], None]] = None):
+        self._scanner = scanner
+        self._on_invalidate = on_invalidate  # e.g. drops cached command output the scanner would reuse
+        self._lock = threading.Lock()
+        self._disks: List[DiskInfo] = []
+        self._by_id: Dict[str, DiskInfo] = {}
+        self._expires = 0.0
+        self._generation = 0
+        self._scan_lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self.ttl = DEFAULT_TTL
+        self.settle = DEFAULT_SETTLE
+        self.uevents_active = False
+
+    def configure(self, config) -> None:
+        self.ttl = config.get('DISK_INVENTORY_TTL', DEFAULT_TTL)
+        self.settle = config.get('DISK_UEVENT_SETTLE', DEFAULT_SETTLE)
+
+    def _rescan(self) -> None:
+        generation = self._generation
+        disks = self._scanner()
+        with self._lock:
+            self._disks = disks
+            self._by_id = {str(d.id): d for d in disks}
+            # A uevent that arrived during the scan keeps the cache stale
+            if generation == self._generation:
+                self._expires = time.monotonic() + self.ttl
+
+    def _fresh(self) -> None:
+        self._ensure_listener()
+        if time.monotonic() >= self._expires:
+            with self._scan_lock:
+                if time.monotonic() >= self._expires:  # Another thread may have just rescanned
+                    self._rescan()
+
+    def get_all(self) -> List[DiskInfo]:
+        self._fresh()
+        return list(self._disks)
+
+    def get(self, disk_id: str) -> Optional[DiskInfo]:
+        self._fresh()
+        return self._by_id.get(str(disk_id))
+
+    def invalidate(self) -> None:
+        """Marks the cache stale; the next read rescans."""
+        with self._lock:
+            self._generation += 1
+            self._expires = 0.0
+        if self._on_invalidate:
+            self._on_invalidate()
+
+    def refresh(self) -> None:
+        """Forces a rescan now."""
+        self.invalidate()
+        self._fresh()
+
+    def _ensure_listener(self) -> None:
+        if self._listener is not None or not hasattr(socket, 'AF_NETLINK'):
+            return
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(target=self._listen, name='disk-uevents', daemon=True)
+            self._listener.start()
+
+    def _listen(self) -> None:
+        sock = None
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+            sock.bind((0, UEVENT_GROUP_KERNEL))  # Port id 0: the kernel assigns a unique one
+        except OSError as e:
+            if sock is not None:
+                sock.close()
+            logger.warning(f"Disk uevents unavailable ({e}); falling back to a {self.ttl}s rescan interval.")
+            return
+
+        self.uevents_active = True
+        pending = False
+        with sock:
+            while True:
+                sock.settimeout(self.settle if pending else None)
+                try:
+                    message = sock.recv(16384)
+                except socket.timeout:
+                    # Burst is over and udev has had time to probe: rescan eagerly so
+                    # the next page load is a memory read again
+                    pending = False
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        logger.error(f"Disk rescan after uevent failed: {e}")
+                    continue
+                except OSError as e:
+                    # ENOBUFS: events were dropped while we were busy, so assume the worst
+                    logger.error(f"Disk uevent socket error: {e}")
+                    self.invalidate()
+                    time.sleep(1)
+                    continue
+
+                if parse_uevent(message).get('SUBSYSTEM') == 'block':
+                    self.invalidate()
+                    pending = True
@@ -6,6 +6,10 @@ from .utils import run_command
 
 logger = logging.getLogger(__name__)
 
+def _flag(value) -> bool:
+    """lsblk prints RM/ROTA as JSON booleans, or as "0"/"1" strings in older versions."""
+    return str(value).lower() in ("1", "true")
+
 def parse_linux_disks() -> List[DiskInfo]:
     """
     Uses lsblk to get physical disks and partitions in Linux.
@@ -50,7 +54,7 @@ def parse_linux_disks() -> List[DiskInfo]:
         model = (raw_model.strip() if raw_model else "Unknown Disk") or "Unknown Disk"
         
         size = int(dev.get("size") or 0)
-        is_removable = bool(dev.get("rm", False))
+        is_removable = _flag(dev.get("rm", False))
         
         disk_fs = dev.get("fstype") or ""
         disk_mp = dev.get("mountpoint") or ""
@@ -99,7 +103,9 @@ def parse_linux_disks() -> List[DiskInfo]:
             mount_points=mount_points,
             is_removable=is_removable,
             is_system_disk=is_system,
-            partitions=disk_partitions
+            partitions=disk_partitions,
+            is_rotational=_flag(dev.get("rota", False)),
+            serial=(dev.get("serial") or "").strip()
         )
         disks.append(disk_info)
 
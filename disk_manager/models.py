@@ -1,6 +1,31 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from typing import List, Optional
 
+@dataclass
+class MountUsage:
+    """Space and inode usage of a mounted filesystem (inodes are None on Windows)."""
+    total_bytes: int
+    used_bytes: int
+    free_bytes: int
+    total_inodes: Optional[int] = None
+    used_inodes: Optional[int] = None
+    free_inodes: Optional[int] = None
+    stale: bool = False  # The mount did not answer in time; these are the last known values
+
+    def as_stale(self) -> 'MountUsage':
+        return replace(self, stale=True)
+
+    def to_dict(self):
+        return {
+            'total_bytes': self.total_bytes,
+            'used_bytes': self.used_bytes,
+            'free_bytes': self.free_bytes,
+            'total_inodes': self.total_inodes,
+            'used_inodes': self.used_inodes,
+            'free_inodes': self.free_inodes,
+            'stale': self.stale
+        }
+
 @dataclass
 class PartitionInfo:
     """Represents a partition on a physical disk."""
@@ -8,6 +33,7 @@ class PartitionInfo:
     size_bytes: int
     filesystem: str  # e.g., 'NTFS', 'ext4', 'FAT32'
     mount_point: Optional[str] = None
+    usage: Optional[MountUsage] = None  # Filled by get_all_disks(with_usage=True)
 
 @dataclass
 class DiskInfo:
@@ -20,6 +46,9 @@ class DiskInfo:
     is_removable: bool = False
     is_system_disk: bool = False
     partitions: List[PartitionInfo] = field(default_factory=list)
+    is_rotational: bool = False
+    serial: str = ''
+    usage: Optional[MountUsage] = None  # Filesystem directly on the disk (no partition table)
 
     def to_dict(self):
         """Helper to serialize to a dictionary for the JSON API."""
@@ -31,13 +60,59 @@ class DiskInfo:
             'mount_points': self.mount_points,
             'is_removable': self.is_removable,
             'is_system_disk': self.is_system_disk,
+            'is_rotational': self.is_rotational,
+            'serial': self.serial,
+            'usage': self.usage.to_dict() if self.usage else None,
             'partitions': [
                 {
                     'name': p.name,
                     'size_bytes': p.size_bytes,
                     'filesystem': p.filesystem,
-                    'mount_point': p.mount_point
+                    'mount_point': p.mount_point,
+                    'usage': p.usage.to_dict() if p.usage else None
                 }
                 for p in self.partitions
             ]
         }
+
+@dataclass
+class RaidMember:
+    """A device in a software RAID array."""
+    name: str  # e.g., '/dev/sda1'
+    slot: Optional[int] = None  # Role in the array; None for spares and failed devices
+    state: str = 'in_sync'  # 'in_sync', 'faulty', 'spare', 'rebuilding', 'write_mostly', ...
+
+    def to_dict(self):
+        return {'name': self.name, 'slot': self.slot, 'state': self.state}
+
+@dataclass
+class RaidArray:
+    """A Linux md array as reported by /proc/mdstat and /sys/block/md*/md."""
+    name: str  # e.g., '/dev/md0'
+    level: str  # e.g., 'raid1', 'raid5'; empty while inactive
+    state: str  # 'active', 'inactive' or the sysfs array_state ('clean', 'active', 'read-auto', ...)
+    size_bytes: int = 0
+    raid_disks: int = 0  # Devices the array should have
+    active_disks: int = 0  # Devices currently in sync
+    degraded: int = 0  # Missing devices; > 0 means no or reduced redundancy
+    members: List[RaidMember] = field(default_factory=list)
+    sync_action: str = 'idle'  # 'resync', 'recovery', 'reshape', 'check', 'repair' or 'idle'
+    sync_progress: Optional[float] = None  # Percent done
+    sync_speed_kbps: Optional[int] = None  # KiB/s
+    sync_eta_seconds: Optional[int] = None
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'level': self.level,
+            'state': self.state,
+            'size_bytes': self.size_bytes,
+            'raid_disks': self.raid_disks,
+            'active_disks': self.active_disks,
+            'degraded': self.degraded,
+            'members': [m.to_dict() for m in self.members],
+            'sync_action': self.sync_action,
+            'sync_progress': self.sync_progress,
+            'sync_speed_kbps': self.sync_speed_kbps,
+            'sync_eta_seconds': self.sync_eta_seconds
+        }
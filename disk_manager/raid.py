@@ -0,0 +1,236 @@
+import logging
+import os
+import re
+import threading
+import time
+from typing import List, Optional
+
+from .models import RaidArray, RaidMember
+
+logger = logging.getLogger(__name__)
+
+MDSTAT_PATH = "/proc/mdstat"
+SYS_ROOT = "/sys"
+DEFAULT_INTERVAL = 5.0  # Seconds between /proc/mdstat reads
+
+HEADER_RE = re.compile(r"^(md\S*)\s*:\s*(.*)$")
+MEMBER_RE = re.compile(r"^(\S+?)\[(\d+)\]((?:\([A-Z]\))*)$")
+PROGRESS_RE = re.compile(
+    r"(resync|recovery|reshape|check|repair)\s*=\s*([\d.]+)%\s*\((\d+)/(\d+)\)"
+    r"(?:\s*finish=([\d.]+)min)?(?:\s*speed=(\d+)K/sec)?")
+WAITING_RE = re.compile(r"(resync|recovery|reshape|check|repair)\s*=\s*(DELAYED|PENDING)")
+
+# Flags after a member in /proc/mdstat
+MEMBER_FLAGS = {"F": "faulty", "S": "spare", "W": "write_mostly", "R": "replacement", "J": "journal"}
+
+# sysfs sync_action -> the word /proc/mdstat uses
+SYNC_ACTIONS = {"recover": "recovery", "frozen": "idle"}
+
+
+def _read(path: str, default: str = "") -> str:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+
+def _read_int(path: str) -> Optional[int]:
+    try:
+        return int(_read(path))
+    except ValueError:
+        return None
+
+
+def _parse_header(name: str, rest: str) -> RaidArray:
+    # md1 : active (auto-read-only) raid5 sde1[3] sdd1[1] sdc1[0](F)
+    tokens = [t for t in rest.split() if not t.startswith("(")]
+    state = tokens.pop(0) if tokens else ""
+    level = ""
+    if tokens and not MEMBER_RE.match(tokens[0]):
+        level = tokens.pop(0)
+    members = []
+    for token in tokens:
+        match = MEMBER_RE.match(token)
+        if not match:
+            continue
+        flags = re.findall(r"\(([A-Z])\)", match.group(3))
+        member_state = next((MEMBER_FLAGS[f] for f in flags if f in MEMBER_FLAGS), "in_sync")
+        members.append(RaidMember(name=f"/dev/{match.group(1)}", state=member_state))
+    return RaidArray(name=f"/dev/{name}", level=level, state=state, members=members)
+
+
+def _parse_details(array: RaidArray, lines: List[str]) -> None:
+    for line in lines:
+        blocks = re.search(r"(\d+) blocks", line)
+        if blocks:
+            array.size_bytes = int(blocks.group(1)) * 1024
+        counts = re.search(r"\[(\d+)/(\d+)\]", line)
+        if counts:
+            array.raid_disks, array.active_disks = int(counts.group(1)), int(counts.group(2))
+            array.degraded = max(0, array.raid_disks - array.active_disks)
+        progress = PROGRESS_RE.search(line)
+        if progress:
+            action, percent, _, _, finish, speed = progress.groups()
+            array.sync_action = action
+            array.sync_progress = float(percent)
+            array.sync_eta_seconds = round(float(finish) * 60) if finish else None
+            array.sync_speed_kbps = int(speed) if speed else None
+            continue
+        waiting = WAITING_RE.search(line)
+        if waiting:
+            array.sync_action = waiting.group(1)  # Queued behind another array on the same disks
+
+
+def parse_mdstat(text: str) -> List[RaidArray]:
+    """Arrays described by the contents of /proc/mdstat."""
+    arrays = []
+    current: Optional[RaidArray] = None
+    details: List[str] = []
+    for line in text.splitlines() + [""]:
+        header = HEADER_RE.match(line)
+        if header or not line.strip():
+            if current is not None:
+                _parse_details(current, details)
+                if not current.raid_disks and current.state != "inactive":
+                    current.raid_disks = current.active_disks = len(current.members)  # raid0/linear
+                arrays.append(current)
+            current, details = None, []
+            if header:
+                current = _parse_header(header.group(1), header.group(2))
+        elif current is not None:
+            details.append(line)
+    return arrays
+
+
+def apply_sysfs(array: RaidArray, sys_root: str = SYS_ROOT) -> None:
+    """
+    Completes an array with /sys/block/<md>/md: array state, degraded count,
+    member roles and states, and sync progress while a resync runs.
+    """
+    md_dir = os.path.join(sys_root, "block", os.path.basename(array.name), "md")
+    if not os.path.isdir(md_dir):
+        return
+    array.level = _read(os.path.join(md_dir, "level"), array.level)
+    array.state = _read(os.path.join(md_dir, "array_state"), array.state)
+    raid_disks = _read_int(os.path.join(md_dir, "raid_disks"))
+    degraded = _read_int(os.path.join(md_dir, "degraded"))
+    if raid_disks is not None:
+        array.raid_disks = raid_disks
+    if degraded is not None:
+        array.degraded = degraded
+        array.active_disks = max(0, array.raid_disks - degraded)
+
+    action = _read(os.path.join(md_dir, "sync_action"))
+    if action:
+        array.sync_action = SYNC_ACTIONS.get(action, action)
+    if array.sync_action != "idle":
+        completed = _read(os.path.join(md_dir, "sync_completed"))  # "done / total" in sectors, or "none"
+        speed = _read_int(os.path.join(md_dir, "sync_speed"))  # KiB/s, averaged over the last seconds
+        match = re.match(r"(\d+)\s*/\s*(\d+)", completed)
+        if match and int(match.group(2)):
+            done, total = int(match.group(1)), int(match.group(2))
+            array.sync_progress = round(done / total * 100, 1)
+            if speed:
+                array.sync_speed_kbps = speed
+                array.sync_eta_seconds = round((total - done) / 2 / speed)
+    else:
+        array.sync_progress = array.sync_speed_kbps = array.sync_eta_seconds = None
+
+    members = []
+    for entry in sorted(os.listdir(md_dir)):
+        if not entry.startswith("dev-"):
+            continue
+        dev_dir = os.path.join(md_dir, entry)
+        states = _read(os.path.join(dev_dir, "state")).split(",")
+        slot = _read_int(os.path.join(dev_dir, "slot"))  # "none" for spares and failed devices
+        if "faulty" in states:
+            state = "faulty"
+        elif "in_sync" in states:
+            state = "write_mostly" if "write_mostly" in states else "in_sync"
+        elif slot is not None and array.sync_action in ("recovery", "reshape"):
+            state = "rebuilding"  # Has a role but is not in sync yet
+        else:
+            state = states[0] or "unknown"
+        members.append(RaidMember(name=f"/dev/{entry[4:]}", slot=slot, state=state))
+    if members:
+        array.members = sorted(members, key=lambda m: (m.slot is None, m.slot or 0, m.name))
+
+
+def scan_raids(mdstat_path: str = MDSTAT_PATH, sys_root: str = SYS_ROOT) -> List[RaidArray]:
+    """Every md array on the system ([] without md support)."""
+    try:
+        with open(mdstat_path) as f:
+            arrays = parse_mdstat(f.read())
+    except FileNotFoundError:
+        return []
+    for array in arrays:
+        apply_sysfs(array, sys_root)
+    return arrays
+
+
+class RaidMonitor:
+    """
+    Keeps the md array list in memory, re-read every interval by a
+    background thread so requests never touch /proc or /sys. State changes
+    (an array becoming degraded, a rebuild starting or finishing) are logged.
+    """
+
+    def __init__(self, mdstat_path: str = MDSTAT_PATH, sys_root: str = SYS_ROOT):
+        self.mdstat_path = mdstat_path
+        self.sys_root = sys_root
+        self.interval = DEFAULT_INTERVAL
+        self.available = os.path.exists(mdstat_path)
+        self._lock = threading.Lock()
+        self._arrays: Optional[List[RaidArray]] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(self, config) -> None:
+        self.interval = config.get('RAID_SAMPLE_INTERVAL', DEFAULT_INTERVAL)
+        if self.available and self.interval:
+            self.start()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name='raid-monitor', daemon=True)
+            self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to read RAID status: {e}")
+            time.sleep(self.interval)
+
+    def refresh(self) -> List[RaidArray]:
+        arrays = scan_raids(self.mdstat_path, self.sys_root)
+        with self._lock:
+            previous = {a.name: a for a in self._arrays or []}
+            self._arrays = arrays
+        for array in arrays:
+            self._log_changes(previous.get(array.name), array)
+        return arrays
+
+    @staticmethod
+    def _log_changes(old: Optional[RaidArray], new: RaidArray) -> None:
+        if old is None:
+            return
+        if new.degraded > old.degraded:
+            logger.warning(f"{new.name} is degraded: {new.active_disks}/{new.raid_disks} devices in sync")
+        if new.sync_action != old.sync_action:
+            if new.sync_action == "idle":
+                logger.info(f"{new.name}: {old.sync_action} finished")
+            else:
+                logger.info(f"{new.name}: {new.sync_action} started")
+
+    def get_all(self) -> List[RaidArray]:
+        """The last scan; scans now when the sampler is not running."""
+        with self._lock:
+            arrays = self._arrays
+            sampling = self._thread is not None
+        if arrays is None or not sampling:
+            arrays = self.refresh() if self.available else []
+        return list(arrays)
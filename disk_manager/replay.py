@@ -0,0 +1,160 @@
+"""
+Record/replay of the commands behind the lsblk and PowerShell backends.
+
+With MOCK_HARDWARE set, run_command() is answered from captured output
+files instead of executing anything, so parse_linux_disks() and
+parse_windows_disks() run unchanged on any machine. Each command has one
+fixture file, named after what it lists:
+
+    lsblk_debug.json    lsblk -J -b -o ...      (parse_linux_disks)
+    disks_debug.json    Get-PhysicalDisk        (parse_windows_disks)
+    parts_debug.json    Get-Partition
+    vols_debug.json     Get-Volume
+
+Capture new fixtures from the current machine with
+
+    python -m disk_manager.replay record [--dir DIR]
+
+and print what a fixture set parses to with
+
+    python -m disk_manager.replay show --platform linux|windows [--dir DIR]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .linux_backend import parse_linux_disks
+from .windows_backend import parse_windows_disks
+from . import utils
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PLATFORM_PARSERS = {"linux": parse_linux_disks, "windows": parse_windows_disks}
+
+# PowerShell cmdlet -> fixture name
+CMDLETS = {"Get-PhysicalDisk": "disks", "Get-Partition": "parts", "Get-Volume": "vols"}
+
+
+def fixture_name(cmd: Sequence[str]) -> Optional[str]:
+    """Fixture a command is replayed from, or None for commands without one."""
+    if not cmd:
+        return None
+    program = os.path.basename(cmd[0]).lower()
+    if program == "lsblk":
+        return "lsblk"
+    if program in ("powershell", "powershell.exe", "pwsh"):
+        script = cmd[-1]
+        for cmdlet, name in CMDLETS.items():
+            if script.startswith(cmdlet):
+                return name
+    return None
+
+
+def fixture_path(directory: str, name: str) -> str:
+    return os.path.join(directory, f"{name}_debug.json")
+
+
+class FixtureRunner:
+    """
+    Command runner for utils.set_command_runner() that answers from fixture
+    files in directory (read on every call, so re-recorded files are picked
+    up), or from an in-memory {name: output} mapping.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIR, fixtures: Optional[Dict[str, str]] = None):
+        self.directory = directory
+        self.fixtures = fixtures
+
+    def _output(self, name: str) -> Optional[str]:
+        if self.fixtures is not None:
+            return self.fixtures.get(name)
+        try:
+            with open(fixture_path(self.directory, name), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def __call__(self, cmds: List[Sequence[str]], timeout: Optional[float] = None) -> List[Tuple[bool, str]]:
+        results = []
+        for cmd in cmds:
+            name = fixture_name(cmd)
+            output = self._output(name) if name else None
+            if output is None:
+                logger.warning(f"No fixture for '{' '.join(cmd)}'")
+                results.append((False, f"No fixture for {cmd[0]}"))
+            else:
+                results.append((True, output.strip()))
+        return results
+
+
+class FixtureRecorder:
+    """
+    Command runner that executes for real and saves the output of every
+    successful command that has a fixture name into directory.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIR):
+        self.directory = directory
+        self.recorded: List[str] = []
+
+    def __call__(self, cmds: List[Sequence[str]], timeout: Optional[float] = None) -> List[Tuple[bool, str]]:
+        results = utils.execute_commands(cmds, timeout)
+        for cmd, (success, output) in zip(cmds, results):
+            name = fixture_name(cmd)
+            if success and name:
+                self._save(name, output)
+        return results
+
+    def _save(self, name: str, output: str) -> None:
+        try:
+            output = json.dumps(json.loads(output), indent=3)  # Same layout as lsblk -J, and diffable
+        except ValueError:
+            pass  # Stored as is; the parser will report it on replay
+        path = fixture_path(self.directory, name)
+        os.makedirs(self.directory, exist_ok=True)
+        partial = path + ".part"
+        with open(partial, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        os.replace(partial, path)
+        self.recorded.append(path)
+        logger.info(f"Recorded fixture {path}")
+
+
+def host_platform() -> str:
+    return "windows" if sys.platform.startswith("win") else "linux"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m disk_manager.replay",
+                                     description="Record or inspect disk manager fixtures.")
+    parser.add_argument("action", choices=("record", "show"))
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="fixture directory (default: project root)")
+    parser.add_argument("--platform", choices=sorted(PLATFORM_PARSERS), default=host_platform(),
+                        help="parser to run (default: this machine's)")
+    args = parser.parse_args(argv)
+
+    if args.action == "record":
+        runner = FixtureRecorder(args.dir)
+    else:
+        runner = FixtureRunner(args.dir)
+    utils.set_command_runner(runner)
+    try:
+        disks = PLATFORM_PARSERS[args.platform]()
+    finally:
+        utils.set_command_runner(None)
+
+    if args.action == "record":
+        for path in runner.recorded:
+            print(f"Recorded {path}")
+    print(json.dumps([d.to_dict() for d in disks], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -1,24 +1,107 @@
-from flask import render_template, jsonify, request, current_app, flash, redirect, url_for
+from flask import render_template, jsonify, request, current_app, flash, redirect, url_for, session
 from . import disk_manager
-from .core import get_all_disks
+import time
+from models import db, DiskBenchmark, Job, User
+from services.jobs import jobs
+from .core import get_all_disks, configure, stats_sampler, raid_monitor
+from .diskstats import FIELDS
+
+disk_manager.record_once(lambda state: configure(state.app.config))
 
 @disk_manager.route('/disks')
 def index():
-    return render_template('disks.html')
+    config = current_app.config
+    return render_template('disks.html',
+                           history_days=config.get('DISK_STATS_HISTORY_DAYS', 7),
+                           benchmark_mib=config.get('BENCHMARK_FILE_SIZE', 256 * 1024 * 1024) // (1024 * 1024),
+                           benchmark_seconds=2 * config.get('BENCHMARK_RANDOM_SECONDS', 5) + 10)
 
 @disk_manager.route('/api/disks')
 def list_disks():
-    disks = get_all_disks()
+    disks = get_all_disks(with_usage=True)
     
     # We serialize DiskInfo objects to dicts
     disks_dict = [d.to_dict() for d in disks]
-    
-    # RAID is no longer supported in this iteration, returning empty
+
     return jsonify({
         'disks': disks_dict,
-        'raids': []
+        'raids': [r.to_dict() for r in raid_monitor.get_all()]
+    })
+
+@disk_manager.route('/api/raids')
+def list_raids():
+    """md arrays only; polled by the disk page while a resync or rebuild runs."""
+    return jsonify({
+        'available': raid_monitor.available,
+        'interval': raid_monitor.interval,
+        'raids': [r.to_dict() for r in raid_monitor.get_all()]
+    })
+
+@disk_manager.route('/api/disks/stats')
+def disk_stats():
+    """Latest throughput, IOPS, latency and utilization for every disk."""
+    return jsonify({
+        'available': stats_sampler.available,
+        'interval': stats_sampler.interval,
+        'history_step': stats_sampler.history_step,
+        'devices': stats_sampler.current()
+    })
+
+@disk_manager.route('/api/disks/stats/<device>')
+def disk_stats_series(device):
+    """
+    Time series for one disk: ?range=live (the in-memory samples, default)
+    or ?range=history with an optional ?hours= window (downsampled).
+    """
+    if request.args.get('range') == 'history':
+        hours = request.args.get('hours', type=float)
+        since = time.time() - hours * 3600 if hours else 0
+        points = stats_sampler.history(device, since)
+    else:
+        points = stats_sampler.live(device)
+    return jsonify({
+        'device': device,
+        'fields': ['time', *FIELDS],
+        'points': points
     })
 
+def _find_mount(mount_point):
+    """(disk, filesystem) for a mount point of a detected disk, or (None, None)."""
+    for disk in get_all_disks():
+        if mount_point in disk.mount_points:
+            return disk, disk.filesystem
+        for partition in disk.partitions:
+            if partition.mount_point == mount_point:
+                return disk, partition.filesystem
+    return None, None
+
+@disk_manager.route('/api/disks/benchmark', methods=['POST'])
+def start_benchmark():
+    """
+    Starts a benchmark job on a mounted filesystem: {"mount_point": "/mnt/usb"}.
+    One benchmark runs at a time, as two would measure each other.
+    """
+    mount_point = (request.get_json(silent=True) or {}).get('mount_point') or request.form.get('mount_point')
+    disk, filesystem = _find_mount(mount_point) if mount_point else (None, None)
+    if disk is None:
+        return jsonify({'status': 'error', 'message': 'Not a mount point of a detected disk.'}), 400
+    if Job.query.filter(Job.kind == 'disk_benchmark', Job.status.in_(('queued', 'running'))).first():
+        return jsonify({'status': 'error', 'message': 'A benchmark is already running.'}), 409
+
+    user = User.query.filter_by(username=session.get('username')).first_or_404()
+    job = jobs.submit(user, 'disk_benchmark', mount_point=mount_point, disk_key=disk.serial or disk.id,
+                      disk_name=disk.name, filesystem=filesystem)
+    return jsonify(job.to_dict()), 202
+
+@disk_manager.route('/api/disks/benchmarks')
+def list_benchmarks():
+    """Stored results grouped per disk (by serial number), newest first."""
+    results = {}
+    for run in DiskBenchmark.query.order_by(DiskBenchmark.created_at.desc()).all():
+        entry = results.setdefault(run.disk_key, {'disk_key': run.disk_key, 'disk_name': run.disk_name, 'runs': []})
+        entry['runs'].append(run.to_dict())
+    return jsonify({'disks': list(results.values())})
+
 @disk_manager.route('/api/partition/create', methods=['POST'])
 def create_partition():
     return jsonify({'status': 'error', 'message': 'Partition creation is disabled in read-only mode.'}), 403
@@ -0,0 +1,170 @@
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+from .models import DiskInfo, PartitionInfo
+
+logger = logging.getLogger(__name__)
+
+SECTOR_SIZE = 512  # /sys/block/*/size is always in 512-byte units, whatever the hardware sector size
+
+# Not physical disks (lsblk reports these as loop/rom/lvm/crypt/raid, not 'disk')
+SKIP_PREFIXES = ("loop", "ram", "sr", "dm-", "md")
+SCSI_TYPE_ROM = "5"
+
+
+def _read(path: str, default: str = "") -> str:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+
+def _read_int(path: str, default: int = 0) -> int:
+    try:
+        return int(_read(path))
+    except ValueError:
+        return default
+
+
+def _unescape_mount_path(path: str) -> str:
+    # mountinfo escapes space, tab, newline and backslash as octal (\040 etc.)
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), path)
+
+
+def parse_mountinfo(mountinfo_path: str) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    Maps 'major:minor' to [(mount_point, fstype), ...] in mount order.
+    """
+    mounts: Dict[str, List[Tuple[str, str]]] = {}
+    try:
+        with open(mountinfo_path) as f:
+            for line in f:
+                # id parent major:minor root mount_point options [optional...] - fstype source super_options
+                left, sep, right = line.partition(" - ")
+                if not sep:
+                    continue
+                fields = left.split()
+                fstype = right.split()[0] if right.split() else ""
+                if len(fields) < 5:
+                    continue
+                mounts.setdefault(fields[2], []).append((_unescape_mount_path(fields[4]), fstype))
+    except OSError as e:
+        logger.error(f"Failed to read {mountinfo_path}: {e}")
+    return mounts
+
+
+def _udev_properties(udev_dir: str, dev: str) -> Dict[str, str]:
+    """Properties udev recorded for a device (blkid results such as ID_FS_TYPE live here)."""
+    props = {}
+    try:
+        with open(os.path.join(udev_dir, f"b{dev}")) as f:
+            for line in f:
+                if line.startswith("E:"):
+                    key, _, value = line[2:].rstrip("\n").partition("=")
+                    props[key] = value
+    except OSError:
+        pass
+    return props
+
+
+def _device_info(path: str, udev_dir: str, mounts: Dict[str, List[Tuple[str, str]]]) -> Tuple[int, str, Optional[str], str]:
+    """Returns (size_bytes, fstype, first_mount_point, dev) for a disk or partition sysfs dir."""
+    dev = _read(os.path.join(path, "dev"))
+    size = _read_int(os.path.join(path, "size")) * SECTOR_SIZE
+    mounted = mounts.get(dev, [])
+    fstype = mounted[0][1] if mounted else ""
+    if not fstype:
+        fstype = _udev_properties(udev_dir, dev).get("ID_FS_TYPE", "")
+    mount_point = mounted[0][0] if mounted else None
+    return size, fstype, mount_point, dev
+
+
+def _model(path: str, udev: Dict[str, str]) -> str:
+    model = _read(os.path.join(path, "device", "model")) or udev.get("ID_MODEL", "").replace("_", " ")
+    return model.strip() or "Unknown Disk"
+
+
+def _serial(path: str, udev: Dict[str, str]) -> str:
+    for candidate in (os.path.join(path, "device", "serial"), os.path.join(path, "serial")):
+        serial = _read(candidate)
+        if serial:
+            return serial
+    return udev.get("ID_SERIAL_SHORT", "")
+
+
+def parse_sysfs_disks(sys_root: str = "/sys", mountinfo_path: str = "/proc/self/mountinfo",
+                      udev_dir: str = "/run/udev/data") -> List[DiskInfo]:
+    """
+    Builds the same DiskInfo objects as the lsblk backend by reading
+    /sys/block, /proc/self/mountinfo and the udev database directly, without
+    forking a process. The paths are parameters so tests can point them at
+    a captured tree.
+    """
+    disks = []
+    block_dir = os.path.join(sys_root, "block")
+    try:
+        names = sorted(os.listdir(block_dir))
+    except OSError as e:
+        logger.error(f"Failed to list {block_dir}: {e}")
+        return disks
+
+    mounts = parse_mountinfo(mountinfo_path)
+
+    for name in names:
+        if name.startswith(SKIP_PREFIXES):
+            continue
+        path = os.path.join(block_dir, name)
+        if _read(os.path.join(path, "device", "type")) == SCSI_TYPE_ROM:
+            continue
+
+        size, disk_fs, disk_mp, dev = _device_info(path, udev_dir, mounts)
+        udev = _udev_properties(udev_dir, dev)
+
+        disk_partitions = []
+        overall_fs = ""
+        mount_points = []
+        is_system = False
+
+        if disk_mp:
+            mount_points.append(disk_mp)
+            overall_fs = disk_fs
+            if disk_mp == "/":
+                is_system = True
+
+        partitions = sorted(
+            (entry for entry in os.listdir(path) if os.path.exists(os.path.join(path, entry, "partition"))),
+            key=lambda entry: _read_int(os.path.join(path, entry, "partition")))
+        for p_name in partitions:
+            p_size, p_fs, p_mp, _ = _device_info(os.path.join(path, p_name), udev_dir, mounts)
+            p_fs = p_fs or "Unknown"
+            disk_partitions.append(PartitionInfo(
+                name=f"/dev/{p_name}",
+                size_bytes=p_size,
+                filesystem=p_fs,
+                mount_point=p_mp
+            ))
+
+            if p_mp:
+                mount_points.append(p_mp)
+                if p_mp == "/":
+                    is_system = True
+
+            if not overall_fs and p_fs != "Unknown":
+                overall_fs = p_fs
+
+        disks.append(DiskInfo(
+            id=f"/dev/{name}",
+            name=_model(path, udev),
+            size_bytes=size,
+            filesystem=overall_fs,
+            mount_points=mount_points,
+            is_removable=_read(os.path.join(path, "removable")) == "1",
+            is_system_disk=is_system,
+            partitions=disk_partitions,
+            is_rotational=_read(os.path.join(path, "queue", "rotational")) == "1",
+            serial=_serial(path, udev)
+        ))
+
+    return disks
@@ -0,0 +1,102 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from .models import MountUsage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 10.0      # Seconds a mount's usage is reused
+DEFAULT_TIMEOUT = 2.0   # Seconds to wait for statvfs before reporting the mount as unresponsive
+
+
+def stat_mount(mount_point: str) -> MountUsage:
+    """Space and inode usage of the filesystem mounted at mount_point."""
+    if not hasattr(os, 'statvfs'):  # Windows: no inode counts
+        total, used, free = shutil.disk_usage(mount_point)
+        return MountUsage(total_bytes=total, used_bytes=used, free_bytes=free)
+    st = os.statvfs(mount_point)
+    total = st.f_blocks * st.f_frsize
+    free = st.f_bavail * st.f_frsize  # What unprivileged users can still write
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    return MountUsage(
+        total_bytes=total,
+        used_bytes=used,
+        free_bytes=free,
+        total_inodes=st.f_files,
+        used_inodes=st.f_files - st.f_ffree,
+        free_inodes=st.f_favail
+    )
+
+
+class _Probe:
+    """One statvfs call running on its own daemon thread."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.usage: Optional[MountUsage] = None
+        self.started = time.monotonic()
+
+
+class MountUsageCache:
+    """
+    Usage per mount point, cached for a short TTL. Every mount is probed on
+    its own thread and the probes run concurrently, each allowed `timeout`
+    seconds, so one hung NFS or dying USB mount costs a request at most the
+    timeout, once. A stuck probe is not restarted; until it returns, the
+    mount reports its last known usage marked stale (or nothing).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Tuple[float, MountUsage]] = {}
+        self._pending: Dict[str, _Probe] = {}
+        self.ttl = DEFAULT_TTL
+        self.timeout = DEFAULT_TIMEOUT
+
+    def configure(self, config) -> None:
+        self.ttl = config.get('DISK_USAGE_TTL', DEFAULT_TTL)
+        self.timeout = config.get('DISK_USAGE_TIMEOUT', DEFAULT_TIMEOUT)
+
+    def _probe(self, mount_point: str, probe: _Probe) -> None:
+        try:
+            probe.usage = stat_mount(mount_point)
+        except OSError as e:
+            logger.error(f"statvfs failed for {mount_point}: {e}")
+        with self._lock:
+            if probe.usage is not None:
+                self._cache[mount_point] = (time.monotonic() + self.ttl, probe.usage)
+            self._pending.pop(mount_point, None)
+        probe.done.set()
+
+    def get_many(self, mount_points: Iterable[str]) -> Dict[str, Optional[MountUsage]]:
+        results: Dict[str, Optional[MountUsage]] = {}
+        waiting = []
+        now = time.monotonic()
+        with self._lock:
+            for mount_point in set(mount_points):
+                cached = self._cache.get(mount_point)
+                if cached is not None and cached[0] > now:
+                    results[mount_point] = cached[1]
+                    continue
+                probe = self._pending.get(mount_point)
+                if probe is None:
+                    probe = self._pending[mount_point] = _Probe()
+                    threading.Thread(target=self._probe, args=(mount_point, probe),
+                                     name='disk-usage', daemon=True).start()
+                waiting.append((mount_point, probe))
+
+        for mount_point, probe in waiting:
+            # Measured from the probe's start: a mount that is already known to hang
+            # (probe left over from an earlier request) is not waited for again
+            if probe.done.wait(max(0.0, probe.started + self.timeout - time.monotonic())):
+                results[mount_point] = probe.usage
+                continue
+            logger.warning(f"statvfs on {mount_point} has not answered for {time.monotonic() - probe.started:.0f}s")
+            with self._lock:
+                cached = self._cache.get(mount_point)
+            results[mount_point] = cached[1].as_stale() if cached else None
+        return results
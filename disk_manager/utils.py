@@ -1,33 +1,183 @@
-import subprocess
+import asyncio
 import logging
-from typing import Tuple
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
-def run_command(cmd: list) -> Tuple[bool, str]:
+DEFAULT_TIMEOUT = 10.0              # Seconds; a dying USB disk can leave lsblk blocked forever
+DEFAULT_MAX_OUTPUT = 4 * 1024 * 1024  # Bytes of stdout/stderr kept per command
+DEFAULT_CACHE_TTL = 2.0             # Seconds a successful result is reused for the same argv
+KILL_GRACE = 2.0                    # Seconds to wait for a killed process before abandoning it
+CACHE_SIZE = 32
+READ_CHUNK = 64 * 1024
+
+# Set from the app config by configure()
+_timeout = DEFAULT_TIMEOUT
+_max_output = DEFAULT_MAX_OUTPUT
+_cache_ttl = DEFAULT_CACHE_TTL
+
+# Replaces process execution when set (fixture replay/recording, see replay.py)
+_runner: Optional[Callable[[List[Sequence[str]], Optional[float]], List[Tuple[bool, str]]]] = None
+
+_cache: "OrderedDict[Tuple[str, ...], Tuple[float, Tuple[bool, str]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def configure(config) -> None:
+    """Applies DISK_COMMAND_TIMEOUT, DISK_COMMAND_MAX_OUTPUT and DISK_COMMAND_CACHE_TTL."""
+    global _timeout, _max_output, _cache_ttl
+    _timeout = config.get('DISK_COMMAND_TIMEOUT', DEFAULT_TIMEOUT)
+    _max_output = config.get('DISK_COMMAND_MAX_OUTPUT', DEFAULT_MAX_OUTPUT)
+    _cache_ttl = config.get('DISK_COMMAND_CACHE_TTL', DEFAULT_CACHE_TTL)
+
+
+def set_command_runner(runner) -> None:
     """
-    Safely execute a shell command and return its success status and output.
-    Returns: (success_boolean, std_out_or_error_string)
+    Routes run_command()/run_commands() through runner(cmds, timeout) ->
+    [(success, output), ...] instead of executing anything; None restores
+    normal execution. Results from a runner are never cached.
+    """
+    global _runner
+    _runner = runner
+    clear_command_cache()
+
+
+def clear_command_cache() -> None:
+    """Forgets cached results, e.g. when the hardware is known to have changed."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _cached(key: Tuple[str, ...]) -> Optional[Tuple[bool, str]]:
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)
+        return entry[1]
+
+
+def _store(key: Tuple[str, ...], result: Tuple[bool, str]) -> None:
+    with _cache_lock:
+        _cache[key] = (time.monotonic() + _cache_ttl, result)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+async def _drain(stream: asyncio.StreamReader, limit: int, on_overflow: Callable[[], None]) -> Tuple[bytes, bool]:
+    """Reads a pipe to EOF, keeping at most limit bytes. Returns (data, overflowed)."""
+    data = bytearray()
+    overflowed = False
+    while True:
+        chunk = await stream.read(READ_CHUNK)
+        if not chunk:
+            return bytes(data), overflowed
+        if overflowed:
+            continue  # Keep draining so the killed process can be reaped
+        data += chunk
+        if len(data) > limit:
+            del data[limit:]
+            overflowed = True
+            on_overflow()
+
+
+async def run_command_async(cmd: Sequence[str], timeout: Optional[float] = None,
+                            max_output: Optional[int] = None) -> Tuple[bool, str]:
+    """
+    Runs one command without a shell. Returns (success, stdout) or
+    (False, error message) on a non-zero exit, a timeout, or output larger
+    than max_output bytes; the process is killed in the last two cases.
     """
+    timeout = _timeout if timeout is None else timeout
+    max_output = _max_output if max_output is None else max_output
     try:
-        # Use shell=True only on Windows for specific commands if necessary, but list is safer
-        # We enforce shell=False for security, unless explicitly needed in the backend.
-        result = subprocess.run(
-            cmd,
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=subprocess.DEVNULL,  # PowerShell otherwise waits on an inherited stdin
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=False
+            stderr=subprocess.PIPE
         )
-        if result.returncode == 0:
-            return True, result.stdout.strip()
-        else:
-            logger.error(f"Command failed '{' '.join(cmd)}': {result.stderr.strip()}")
-            return False, result.stderr.strip()
-            
     except FileNotFoundError:
         logger.error(f"Command not found: {cmd[0]}")
         return False, f"Command not found: {cmd[0]}"
     except Exception as e:
         logger.error(f"Exception running command '{' '.join(cmd)}': {e}")
         return False, str(e)
+
+    def kill():
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+
+    communicate = asyncio.gather(
+        _drain(proc.stdout, max_output, kill),
+        _drain(proc.stderr, max_output, kill),
+        proc.wait()
+    )
+    try:
+        (stdout, out_overflow), (stderr, err_overflow), returncode = \
+            await asyncio.wait_for(asyncio.shield(communicate), timeout)
+    except asyncio.TimeoutError:
+        kill()
+        try:
+            await asyncio.wait_for(communicate, KILL_GRACE)
+        except asyncio.TimeoutError:
+            # Stuck in uninterruptible I/O (D state): SIGKILL is only delivered once
+            # the I/O returns, so leave it to the child watcher instead of hanging too.
+            logger.warning(f"Command '{' '.join(cmd)}' did not exit after SIGKILL; abandoning it.")
+        logger.error(f"Command '{' '.join(cmd)}' timed out after {timeout}s")
+        return False, f"Command timed out after {timeout}s"
+
+    if out_overflow or err_overflow:
+        logger.error(f"Command '{' '.join(cmd)}' produced more than {max_output} bytes of output")
+        return False, f"Command output exceeded {max_output} bytes"
+    if returncode == 0:
+        return True, stdout.decode(errors='replace').strip()
+    error = stderr.decode(errors='replace').strip()
+    logger.error(f"Command failed '{' '.join(cmd)}': {error}")
+    return False, error
+
+
+def execute_commands(cmds: List[Sequence[str]], timeout: Optional[float] = None) -> List[Tuple[bool, str]]:
+    """Runs commands concurrently, uncached; the building block of run_commands()."""
+    async def run_all():
+        return await asyncio.gather(*(run_command_async(cmd, timeout) for cmd in cmds))
+
+    return asyncio.run(run_all())
+
+
+def run_commands(cmds: List[Sequence[str]], timeout: Optional[float] = None,
+                 use_cache: bool = True) -> List[Tuple[bool, str]]:
+    """
+    Runs independent commands concurrently and returns their results in
+    order. Successful results are reused for DISK_COMMAND_CACHE_TTL seconds
+    per argv.
+    """
+    if _runner is not None:
+        return _runner(cmds, timeout)
+    keys = [tuple(cmd) for cmd in cmds]
+    results: List[Optional[Tuple[bool, str]]] = [_cached(key) if use_cache else None for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        for i, result in zip(missing, execute_commands([cmds[i] for i in missing], timeout)):
+            results[i] = result
+            if result[0] and use_cache:
+                _store(keys[i], result)
+    return results
+
+
+def run_command(cmd: Sequence[str], timeout: Optional[float] = None, use_cache: bool = True) -> Tuple[bool, str]:
+    """
+    Safely execute a command (no shell) and return its success status and output.
+    Returns: (success_boolean, std_out_or_error_string)
+    """
+    return run_commands([cmd], timeout, use_cache)[0]
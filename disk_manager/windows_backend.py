@@ -2,7 +2,7 @@ import json
 import logging
 from typing import List, Optional
 from .models import DiskInfo, PartitionInfo
-from .utils import run_command
+from .utils import run_commands
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +22,25 @@ def parse_windows_disks() -> List[DiskInfo]:
         "Get-PhysicalDisk | Select-Object DeviceId, FriendlyName, Size, MediaType, BusType | ConvertTo-Json -Compress"
     ]
     
-    success, disk_output = run_command(disk_cmd)
+    # 2. Get Partitions and Volumes mapping
+    # We use Get-Partition and Get-Volume to map drives to physical disks
+    part_cmd = [
+        "powershell",
+        "-NoProfile",
+        "-Command",
+        "Get-Partition | Select-Object DiskNumber, PartitionNumber, DriveLetter, Size | ConvertTo-Json -Compress"
+    ]
+
+    vol_cmd = [
+        "powershell",
+        "-NoProfile",
+        "-Command",
+        "Get-Volume | Select-Object DriveLetter, FileSystem, DriveType | ConvertTo-Json -Compress"
+    ]
+
+    # The three queries are independent and each pays PowerShell's startup cost, so run them side by side
+    (success, disk_output), (part_success, part_output), (vol_success, vol_output) = \
+        run_commands([disk_cmd, part_cmd, vol_cmd])
     if not success or not disk_output:
         logger.error("Failed to get physical disks from Windows PowerShell.")
         return disks
@@ -36,18 +54,8 @@ def parse_windows_disks() -> List[DiskInfo]:
         logger.error(f"Failed to parse disk JSON output: {e}")
         return disks
 
-    # 2. Get Partitions and Volumes mapping
-    # We use Get-Partition and Get-Volume to map drives to physical disks
-    part_cmd = [
-        "powershell",
-        "-NoProfile",
-        "-Command",
-        "Get-Partition | Select-Object DiskNumber, PartitionNumber, DriveLetter, Size | ConvertTo-Json -Compress"
-    ]
-    
-    success, part_output = run_command(part_cmd)
     partitions_by_disk = {}
-    if success and part_output:
+    if part_success and part_output:
         try:
             raw_parts = json.loads(part_output)
             if not isinstance(raw_parts, list):
@@ -61,16 +69,8 @@ def parse_windows_disks() -> List[DiskInfo]:
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse partition JSON output: {e}")
 
-    vol_cmd = [
-        "powershell",
-        "-NoProfile",
-        "-Command",
-        "Get-Volume | Select-Object DriveLetter, FileSystem, DriveType | ConvertTo-Json -Compress"
-    ]
-    
-    success, vol_output = run_command(vol_cmd)
     volumes_by_letter = {}
-    if success and vol_output:
+    if vol_success and vol_output:
         try:
             raw_vols = json.loads(vol_output)
             if not isinstance(raw_vols, list):
@@ -1,3 +1,5 @@
+import json
+from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -25,3 +27,128 @@ class SharedAccessRequest(db.Model):
     status = db.Column(db.String(20), default='pending', nullable=False) # 'pending', 'approved', 'rejected'
     
     user = db.relationship('User', backref=db.backref('shared_requests', lazy=True))
+
+
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # 'copy', 'archive', 'rescan', 'disk_benchmark'
+    status = db.Column(db.String(20), default='queued', nullable=False)  # 'queued', 'running', 'done', 'failed', 'cancelled'
+    params = db.Column(db.Text, default='{}', nullable=False)  # JSON-encoded handler arguments
+    progress_done = db.Column(db.BigInteger, default=0, nullable=False)
+    progress_total = db.Column(db.BigInteger, default=0, nullable=False)  # 0 when the total is unknown
+    message = db.Column(db.String(255))
+    cancel_requested = db.Column(db.Boolean, default=False, nullable=False)
+    owner_pid = db.Column(db.Integer)  # Process that runs the job, used to detect orphans after a restart
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime)
+
+    user = db.relationship('User', backref=db.backref('jobs', lazy=True))
+
+    @property
+    def is_active(self):
+        return self.status in ('queued', 'running')
+
+    def get_params(self):
+        return json.loads(self.params or '{}')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'params': self.get_params(),
+            'progress_done': self.progress_done,
+            'progress_total': self.progress_total,
+            'message': self.message,
+            'cancel_requested': self.cancel_requested,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class TrashItem(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    name = db.Column(db.String(255), nullable=False)
+    original_path = db.Column(db.String(1024), nullable=False)  # Relative to NAS_ROOT
+    trash_path = db.Column(db.String(1024))  # Relative to NAS_ROOT, set once the item has been moved
+    is_dir = db.Column(db.Boolean, default=False, nullable=False)
+    purge_requested = db.Column(db.Boolean, default=False, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    user = db.relationship('User', backref=db.backref('trash_items', lazy=True))
+
+
+class DiskBenchmark(db.Model):
+    """Result of one storage benchmark run; disk_key groups runs of the same physical disk."""
+    id = db.Column(db.Integer, primary_key=True)
+    disk_key = db.Column(db.String(255), nullable=False, index=True)  # Serial number, or the disk id when there is none
+    disk_name = db.Column(db.String(255), nullable=False)
+    mount_point = db.Column(db.String(1024), nullable=False)
+    filesystem = db.Column(db.String(50))
+    file_size = db.Column(db.BigInteger, nullable=False)
+    seq_write_bps = db.Column(db.Float, nullable=False)
+    seq_read_bps = db.Column(db.Float, nullable=False)
+    rand_read_iops = db.Column(db.Float, nullable=False)
+    rand_write_iops = db.Column(db.Float, nullable=False)
+    fsync_avg_ms = db.Column(db.Float, nullable=False)
+    fsync_p99_ms = db.Column(db.Float, nullable=False)
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'disk_key': self.disk_key,
+            'disk_name': self.disk_name,
+            'mount_point': self.mount_point,
+            'filesystem': self.filesystem,
+            'file_size': self.file_size,
+            'seq_write_bps': self.seq_write_bps,
+            'seq_read_bps': self.seq_read_bps,
+            'rand_read_iops': self.rand_read_iops,
+            'rand_write_iops': self.rand_write_iops,
+            'fsync_avg_ms': self.fsync_avg_ms,
+            'fsync_p99_ms': self.fsync_p99_ms,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class FileChecksum(db.Model):
+    """Digest fallback for filesystems without extended attributes."""
+    id = db.Column(db.Integer, primary_key=True)
+    device = db.Column(db.BigInteger, nullable=False)
+    inode = db.Column(db.BigInteger, nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    mtime_ns = db.Column(db.BigInteger, nullable=False)  # Record is stale once size or mtime differ
+    algorithm = db.Column(db.String(20), nullable=False)  # 'sha256', 'blake2b'
+    digest = db.Column(db.String(128), nullable=False)
+    path = db.Column(db.String(1024))  # Informational only; lookups use device + inode
+
+    __table_args__ = (db.UniqueConstraint('device', 'inode'),)
+
+
+class ChangeJournalEntry(db.Model):
+    """Append-only log of file changes; seq is the cursor sync clients resume from."""
+    seq = db.Column(db.Integer, primary_key=True)  # AUTOINCREMENT: never reused, strictly increasing
+    op = db.Column(db.String(10), nullable=False)  # 'add', 'modify', 'remove', 'rename', 'rescan'
+    path = db.Column(db.String(1024), nullable=False, index=True)  # Relative to NAS_ROOT
+    new_path = db.Column(db.String(1024))  # Destination for 'rename' (also used for moves)
+    is_dir = db.Column(db.Boolean, default=False, nullable=False)
+    size = db.Column(db.BigInteger)
+    mtime = db.Column(db.BigInteger)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    def to_dict(self):
+        return {
+            'seq': self.seq,
+            'op': self.op,
+            'path': self.path,
+            'new_path': self.new_path,
+            'is_dir': self.is_dir,
+            'size': self.size,
+            'mtime': self.mtime,
+        }
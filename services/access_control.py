@@ -5,7 +5,9 @@ Centralized access control functions for NASberryPi.
 All path and permission validation must go through these functions.
 """
 import os
-from utils import safe_join
+import posixpath
+from services.path_resolver import resolve_path
+from utils import TRASH_DIR_NAME
 
 
 def get_user_root(user, nas_root):
@@ -57,26 +59,78 @@ class _AdminAccessSentinel:
     status = 'approved'
 
 
-def ensure_path_allowed(user, req_path, nas_root):
+def authorize_path(user, req_path, nas_root):
     """
-    Validates that req_path is within the user's allowed scope.
+    Resolves req_path and checks it against the user's scope, both as typed
+    and where its symlinks really lead, so a link in one home cannot reach
+    into another.
 
-    Returns (is_allowed: bool, reason: str | None)
+    Returns (resolved: ResolvedPath | None, reason: str | None); resolved is
+    None when access is denied. Routes use resolved.abs for the operation.
 
     Rules:
     - Admins can access any path under nas_root.
     - Regular users can access:
         - Their own home: users/<username>/...
         - The shared folder: shared/... (only if SharedAccessRequest.status == 'approved')
-    - Path traversal is always blocked via safe_join.
+    - Path traversal (including symlinks leading out of nas_root) is always blocked.
+    - Trash folders are never browsable directly (use the Trash page).
+    """
+    resolved = resolve_path(nas_root, req_path)
+    if resolved is None:
+        return None, 'Path traversal detected.'
+
+    for rel_path in dict.fromkeys((resolved.rel, resolved.real_rel)):
+        is_allowed, reason = _check_scope(user, rel_path)
+        if not is_allowed:
+            return None, reason
+    return resolved, None
+
+
+def ensure_path_allowed(user, req_path, nas_root):
+    """
+    Validates that req_path is within the user's allowed scope (see authorize_path).
+
+    Returns (is_allowed: bool, reason: str | None)
+    """
+    resolved, reason = authorize_path(user, req_path, nas_root)
+    return resolved is not None, reason
+
+
+def is_scope_root(rel_path):
+    """
+    True for the folders that define what users can reach: the NAS root,
+    shared/, users/ and every users/<username> home. They are never deleted,
+    moved or renamed, by anyone.
     """
-    # Normalize: strip leading slashes
-    req_path = req_path.strip('/') if req_path else ''
+    parts = rel_path.split('/') if rel_path else []
+    return not parts or parts == ['shared'] or (parts[0] == 'users' and len(parts) <= 2)
 
-    # Always validate the physical path stays inside nas_root
-    abs_path = safe_join(nas_root, req_path)
-    if abs_path is None:
-        return False, 'Path traversal detected.'
+
+def authorize_item(user, req_path, nas_root):
+    """
+    Authorizes taking the item at req_path out of its folder (delete, move or
+    rename): the user needs access to the item and to the folder that holds
+    it, and scope roots (see is_scope_root) are refused.
+
+    Returns (resolved: ResolvedPath | None, reason: str | None) like authorize_path.
+    """
+    resolved = resolve_path(nas_root, req_path)
+    if resolved is not None and is_scope_root(resolved.rel):
+        return None, 'This folder cannot be deleted, moved or renamed.'
+    resolved, reason = authorize_path(user, req_path, nas_root)
+    if resolved is None:
+        return None, reason
+    parent, reason = authorize_path(user, posixpath.dirname(resolved.rel), nas_root)
+    if parent is None:
+        return None, reason
+    return resolved, None
+
+
+def _check_scope(user, req_path):
+    """Applies the scope rules to a normalized path relative to nas_root."""
+    if TRASH_DIR_NAME in req_path.split('/'):
+        return False, 'Access denied to this path.'
 
     if user.role == 'admin':
         return True, None
@@ -0,0 +1,108 @@
+"""
+assets.py
+---------
+Build-free static asset pipeline for NASberryPi.
+At startup every file under static/ is fingerprinted by content hash
+(style.css -> style.3f2a9c1b7e.css) and, when worthwhile, precompressed
+with gzip/brotli. Templates link assets through asset_url(), so the URL
+changes whenever the content does and browsers can cache it forever.
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+
+from flask import Response, abort, request, url_for
+
+from services.compression import (MIN_COMPRESS_SIZE, brotli, choose_encoding,
+                                  compress_bytes, is_compressible)
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class _Asset:
+    __slots__ = ('logical', 'fingerprinted', 'mimetype', 'etag', 'mtime', 'bodies')
+
+    def __init__(self, logical, fingerprinted, mimetype, etag, mtime, bodies):
+        self.logical = logical
+        self.fingerprinted = fingerprinted
+        self.mimetype = mimetype
+        self.etag = etag
+        self.mtime = mtime
+        self.bodies = bodies  # {None: raw, 'gzip': ..., 'br': ...}
+
+
+class AssetPipeline:
+    def __init__(self):
+        self._app = None
+        self._by_logical = {}
+        self._by_fingerprint = {}
+
+    def init_app(self, app):
+        self._app = app
+        self._scan()
+        app.add_url_rule('/assets/<path:filename>', 'asset', self.serve)
+        app.jinja_env.globals['asset_url'] = self.url
+
+    def _scan(self):
+        static_dir = self._app.static_folder
+        for dirpath, _, filenames in os.walk(static_dir):
+            for name in filenames:
+                full = os.path.join(dirpath, name)
+                logical = os.path.relpath(full, static_dir).replace('\\', '/')
+                self._load(logical, full)
+
+    def _load(self, logical, full_path):
+        with open(full_path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()[:10]
+        stem, ext = posixpath.splitext(logical)
+        fingerprinted = f'{stem}.{digest}{ext}'
+        mimetype = mimetypes.guess_type(logical)[0] or 'application/octet-stream'
+
+        bodies = {None: raw}
+        if is_compressible(mimetype) and len(raw) >= MIN_COMPRESS_SIZE:
+            level = 9  # Compressed once at startup, so spend the CPU on the best ratio
+            bodies['gzip'] = compress_bytes(raw, 'gzip', level)
+            if brotli is not None:
+                bodies['br'] = compress_bytes(raw, 'br', level)
+
+        asset = _Asset(logical, fingerprinted, mimetype, f'"{digest}"',
+                       os.path.getmtime(full_path), bodies)
+        old = self._by_logical.get(logical)
+        if old:
+            self._by_fingerprint.pop(old.fingerprinted, None)
+        self._by_logical[logical] = asset
+        self._by_fingerprint[fingerprinted] = asset
+        return asset
+
+    def url(self, filename):
+        """Jinja helper: fingerprinted URL for a file under static/."""
+        asset = self._by_logical.get(filename)
+        if asset and self._app.debug:
+            # Pick up edits without a restart while developing
+            full = os.path.join(self._app.static_folder, filename)
+            if os.path.getmtime(full) != asset.mtime:
+                asset = self._load(filename, full)
+        if asset is None:
+            return url_for('static', filename=filename)
+        return url_for('asset', filename=asset.fingerprinted)
+
+    def serve(self, filename):
+        asset = self._by_fingerprint.get(filename)
+        if asset is None:
+            abort(404)
+
+        headers = {'Cache-Control': IMMUTABLE_CACHE_CONTROL, 'ETag': asset.etag, 'Vary': 'Accept-Encoding'}
+        if asset.etag in request.headers.get('If-None-Match', ''):
+            return Response(status=304, headers=headers)
+
+        encoding = choose_encoding(request)
+        if encoding not in asset.bodies:
+            encoding = 'gzip' if encoding == 'br' and 'gzip' in asset.bodies else None
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return Response(asset.bodies[encoding], mimetype=asset.mimetype, headers=headers)
+
+
+assets = AssetPipeline()
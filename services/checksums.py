@@ -0,0 +1,168 @@
+"""
+checksums.py
+------------
+Content digests for NASberryPi.
+Uploads are hashed incrementally while they are written, optionally checked
+against a digest supplied by the client, and the result is recorded so sync
+tools can compare files without downloading them.
+
+Digests are stored in a 'user.nasberry.digest' extended attribute when the
+filesystem supports it, and in the FileChecksum table otherwise. Either way
+the record carries the file's size and mtime, and is ignored once they change.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import secrets
+
+from models import db, FileChecksum
+from services.io_policy import open_for_upload
+
+XATTR_NAME = 'user.nasberry.digest'
+
+DIGEST_ALGORITHMS = {
+    'sha256': hashlib.sha256,
+    'blake2b': hashlib.blake2b,
+}
+
+# RFC 9530 (Content-Digest) / RFC 3230 (Digest) algorithm tokens
+_HTTP_ALGORITHM_NAMES = {
+    'sha-256': 'sha256',
+    'sha256': 'sha256',
+    'blake2b': 'blake2b',
+    'blake2b-512': 'blake2b',
+}
+
+
+class ChecksumMismatch(Exception):
+    """Raised when an upload does not match the digest the client announced."""
+
+
+def parse_expected_digest(headers):
+    """
+    Extracts a client-provided digest from request headers.
+    Accepts 'X-Checksum-SHA256: <hex>' / 'X-Checksum-BLAKE2b: <hex>', or the
+    standard 'Content-Digest: sha-256=:<base64>:' and legacy 'Digest: SHA-256=<base64>'.
+    Returns (algorithm, hexdigest) or None. Raises ValueError on a malformed header.
+    """
+    for algorithm in DIGEST_ALGORITHMS:
+        value = headers.get(f'X-Checksum-{algorithm}')
+        if value:
+            value = value.strip().lower()
+            try:
+                bytes.fromhex(value)
+            except ValueError:
+                raise ValueError(f'X-Checksum-{algorithm} must be hexadecimal.')
+            return algorithm, value
+
+    for header in ('Content-Digest', 'Digest'):
+        value = headers.get(header)
+        if not value:
+            continue
+        for part in value.split(','):
+            token, _, encoded = part.strip().partition('=')
+            algorithm = _HTTP_ALGORITHM_NAMES.get(token.strip().lower())
+            if not algorithm:
+                continue
+            try:
+                raw = base64.b64decode(encoded.strip().strip(':'), validate=True)
+            except (binascii.Error, ValueError):
+                raise ValueError(f'{header} value is not valid base64.')
+            return algorithm, raw.hex()
+    return None
+
+
+def save_upload(file_storage, dest_path, algorithm='sha256', expected=None, chunk_size=1024 * 1024,
+                size_hint=None, io_config=None):
+    """
+    Streams an uploaded file to dest_path while hashing it.
+    The data goes to a temporary file in the destination folder and is only
+    renamed into place once it is complete (and matches `expected`, an
+    (algorithm, hexdigest) tuple, if given).
+    With io_config (the app config), large uploads follow the page-cache
+    policy in services/io_policy.py; size_hint is the expected size, if known.
+    Returns the hex digest computed with `algorithm`.
+    """
+    hashers = {algorithm: DIGEST_ALGORITHMS[algorithm]()}
+    if expected and expected[0] not in hashers:
+        hashers[expected[0]] = DIGEST_ALGORITHMS[expected[0]]()
+
+    directory, name = os.path.split(dest_path)
+    temp_path = os.path.join(directory, f'.{name}.upload-{secrets.token_hex(4)}')
+    write_behind = None
+    try:
+        if io_config is not None:
+            out, write_behind = open_for_upload(temp_path, size_hint, io_config)
+        else:
+            out = open(temp_path, 'wb')
+        with out:
+            while True:
+                chunk = file_storage.stream.read(chunk_size)
+                if not chunk:
+                    break
+                for h in hashers.values():
+                    h.update(chunk)
+                out.write(chunk)
+                if write_behind:
+                    write_behind.advance(len(chunk))
+            if write_behind:
+                out.flush()
+                os.fdatasync(out.fileno())
+                write_behind.finish()
+
+        if expected and hashers[expected[0]].hexdigest() != expected[1]:
+            raise ChecksumMismatch(
+                f'{expected[0]} mismatch: expected {expected[1]}, got {hashers[expected[0]].hexdigest()}')
+        os.replace(temp_path, dest_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    digest = hashers[algorithm].hexdigest()
+    store_digest(dest_path, algorithm, digest)
+    return digest
+
+
+def store_digest(abs_path, algorithm, digest, rel_path=None):
+    """Records a digest for abs_path, keyed by its current inode, size and mtime."""
+    st = os.stat(abs_path)
+    value = f'{algorithm}:{digest}:{st.st_size}:{st.st_mtime_ns}'
+    try:
+        os.setxattr(abs_path, XATTR_NAME, value.encode())
+        return
+    except (AttributeError, OSError):
+        pass  # No xattr support (e.g. FAT/exFAT USB disks, Windows): use the database
+
+    record = FileChecksum.query.filter_by(device=st.st_dev, inode=st.st_ino).first()
+    if record is None:
+        record = FileChecksum(device=st.st_dev, inode=st.st_ino)
+        db.session.add(record)
+    record.size = st.st_size
+    record.mtime_ns = st.st_mtime_ns
+    record.algorithm = algorithm
+    record.digest = digest
+    record.path = rel_path or abs_path
+    db.session.commit()
+
+
+def lookup_digest(abs_path, st=None):
+    """
+    Returns {'algorithm', 'value'} for abs_path if a digest was recorded and
+    the file is unchanged since (same size and mtime), else None.
+    """
+    st = st or os.stat(abs_path)
+    try:
+        raw = os.getxattr(abs_path, XATTR_NAME).decode()
+        algorithm, digest, size, mtime_ns = raw.split(':')
+        if int(size) == st.st_size and int(mtime_ns) == st.st_mtime_ns:
+            return {'algorithm': algorithm, 'value': digest}
+        return None
+    except (AttributeError, OSError, ValueError):
+        pass
+
+    record = FileChecksum.query.filter_by(device=st.st_dev, inode=st.st_ino).first()
+    if record and record.size == st.st_size and record.mtime_ns == st.st_mtime_ns:
+        return {'algorithm': record.algorithm, 'value': record.digest}
+    return None
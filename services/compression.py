@@ -0,0 +1,80 @@
+"""
+compression.py
+--------------
+HTTP response compression for NASberryPi.
+Responses are compressed only when the client advertises support for it
+in Accept-Encoding and the body is large enough to benefit. Brotli is used
+when the optional 'brotli' package is installed, gzip otherwise.
+"""
+import gzip
+
+from flask import request as current_request
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is always available
+    brotli = None
+
+MIN_COMPRESS_SIZE = 1024  # Bytes; smaller bodies are sent as-is
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/javascript',
+    'application/javascript', 'application/json', 'application/msgpack',
+    'image/svg+xml',
+}
+
+
+def is_compressible(mimetype):
+    return mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def choose_encoding(request):
+    """Returns 'br', 'gzip' or None depending on what the client accepts (and we support)."""
+    encodings = request.accept_encodings
+    br_q = encodings['br'] if brotli is not None else 0
+    gzip_q = encodings['gzip']
+    if not br_q and not gzip_q:
+        return None
+    return 'br' if br_q >= gzip_q else 'gzip'
+
+
+def compress_bytes(data, encoding, level=6):
+    """Compresses data with 'br' or 'gzip'. Brotli quality is mapped from the gzip-style level."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(11, level + 3))
+    return gzip.compress(data, compresslevel=level)
+
+
+def compress_response(response, request, level=6, min_size=MIN_COMPRESS_SIZE):
+    """
+    Compresses a buffered response body in place using the best encoding the
+    client accepts. Streamed, already-encoded and non-200 responses are left
+    untouched. Returns the response.
+    """
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request)
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    response.set_data(compress_bytes(data, encoding, level))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_app(app):
+    """Compresses every compressible HTML/JSON/text response the app produces."""
+    @app.after_request
+    def _compress(response):
+        if not app.config.get('COMPRESS_RESPONSES', True) or not is_compressible(response.mimetype):
+            return response
+        return compress_response(response, current_request,
+                                 app.config.get('COMPRESS_LEVEL', 6),
+                                 app.config.get('COMPRESS_MIN_SIZE', MIN_COMPRESS_SIZE))
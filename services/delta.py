@@ -0,0 +1,206 @@
+"""
+delta.py
+--------
+rsync-style delta updates for NASberryPi.
+A client that already has an old version of a large file asks for its block
+signature, finds the unchanged blocks locally with a rolling checksum, and
+uploads only a delta: references to those blocks plus the new bytes in
+between. The server rebuilds the file next to the original and swaps it in.
+
+Signature format (all integers big-endian):
+    b'NSIG' | version u8 | block_size u32 | file_size u64
+    then per block: adler32 u32 | blake2b-128 (16 bytes)
+The last block may be short. Adler-32 is the weak checksum because it can be
+rolled one byte at a time on the client (zlib.adler32 on each window works too).
+
+Delta format:
+    b'NDLT' | version u8 | block_size u32
+    then a sequence of ops:
+        b'C' | first_block u64 | count u32    copy blocks from the old file
+        b'L' | length u32 | <length bytes>    literal data
+"""
+import hashlib
+import os
+import secrets
+import struct
+import zlib
+
+from services.checksums import DIGEST_ALGORITHMS, ChecksumMismatch, store_digest
+from services.io_policy import drop_cache
+
+SIGNATURE_MAGIC = b'NSIG'
+DELTA_MAGIC = b'NDLT'
+FORMAT_VERSION = 1
+STRONG_DIGEST_SIZE = 16
+
+_SIG_HEADER = struct.Struct('>4sBIQ')
+_SIG_BLOCK = struct.Struct(f'>I{STRONG_DIGEST_SIZE}s')
+_DELTA_HEADER = struct.Struct('>4sBI')
+_COPY_OP = struct.Struct('>QI')
+_LITERAL_OP = struct.Struct('>I')
+
+MIN_BLOCK_SIZE = 4 * 1024
+MAX_BLOCK_SIZE = 16 * 1024 * 1024
+MAX_LITERAL = 16 * 1024 * 1024  # Per op; clients split longer runs
+
+
+class DeltaError(ValueError):
+    """Raised for a malformed delta or one that does not fit the base file."""
+
+
+def default_block_size(file_size, minimum=MIN_BLOCK_SIZE):
+    """rsync's heuristic: roughly sqrt(size), rounded to a multiple of 1 KiB."""
+    size = int(file_size ** 0.5) // 1024 * 1024
+    return max(minimum, min(MAX_BLOCK_SIZE, size))
+
+
+def version_tag(st):
+    """Identifies one version of a file; used as the signature ETag and checked on patch."""
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def _block_signature(block):
+    return _SIG_BLOCK.pack(zlib.adler32(block),
+                           hashlib.blake2b(block, digest_size=STRONG_DIGEST_SIZE).digest())
+
+
+def _cache_path(cache_dir, st, block_size):
+    # Size and mtime are part of the name, so a changed file never hits a stale entry
+    return os.path.join(cache_dir, f'{st.st_dev:x}-{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}-{block_size}.sig')
+
+
+def get_signature(abs_path, cache_dir, block_size=None):
+    """
+    Returns (signature_path, block_size, st) for abs_path, computing the
+    signature only when there is no cached one for this exact file version.
+    """
+    st = os.stat(abs_path)
+    block_size = block_size or default_block_size(st.st_size)
+    if not MIN_BLOCK_SIZE <= block_size <= MAX_BLOCK_SIZE:
+        raise ValueError(f'block_size must be between {MIN_BLOCK_SIZE} and {MAX_BLOCK_SIZE}.')
+
+    cached = _cache_path(cache_dir, st, block_size)
+    if os.path.exists(cached):
+        return cached, block_size, st
+
+    os.makedirs(cache_dir, exist_ok=True)
+    stale_prefix = f'{st.st_dev:x}-{st.st_ino:x}-'
+    for old in os.listdir(cache_dir):
+        if old.startswith(stale_prefix):
+            try:
+                os.remove(os.path.join(cache_dir, old))
+            except OSError:
+                pass
+
+    temp_path = f'{cached}.{secrets.token_hex(4)}'
+    with open(abs_path, 'rb') as src, open(temp_path, 'wb') as out:
+        out.write(_SIG_HEADER.pack(SIGNATURE_MAGIC, FORMAT_VERSION, block_size, st.st_size))
+        while True:
+            block = src.read(block_size)
+            if not block:
+                break
+            out.write(_block_signature(block))
+    os.replace(temp_path, cached)
+    return cached, block_size, st
+
+
+def _read_exact(stream, size):
+    data = stream.read(size)
+    while len(data) < size:
+        more = stream.read(size - len(data))
+        if not more:
+            raise DeltaError('Delta ended unexpectedly.')
+        data += more
+    return data
+
+
+def _copy_range(src, out, offset, length, hashers):
+    """Copies old data, preferring copy_file_range so CoW filesystems can share extents."""
+    remaining = length
+    while remaining:
+        chunk = os.pread(src.fileno(), min(remaining, 1024 * 1024), offset)
+        if not chunk:
+            raise DeltaError('Block reference points past the end of the base file.')
+        for h in hashers.values():
+            h.update(chunk)
+        copied = 0
+        if hasattr(os, 'copy_file_range'):
+            out.flush()
+            position = out.tell()
+            try:
+                copied = os.copy_file_range(src.fileno(), out.fileno(), len(chunk), offset, position)
+            except OSError:
+                copied = 0  # e.g. EXDEV or a filesystem without support
+            out.seek(position + copied)
+        if copied < len(chunk):
+            out.write(chunk[copied:])
+        offset += len(chunk)
+        remaining -= len(chunk)
+
+
+def apply_delta(abs_path, delta_stream, algorithm='sha256', expected=None):
+    """
+    Rebuilds abs_path from its current contents and a delta read from
+    delta_stream. The result is written to a temporary file in the same
+    folder and renamed over the original once complete (and, if `expected`
+    is an (algorithm, hexdigest) tuple, once it matches).
+    Returns (hexdigest, bytes_reused, bytes_received).
+    """
+    magic, version, block_size = _DELTA_HEADER.unpack(_read_exact(delta_stream, _DELTA_HEADER.size))
+    if magic != DELTA_MAGIC or version != FORMAT_VERSION:
+        raise DeltaError('Not a supported delta stream.')
+    if not MIN_BLOCK_SIZE <= block_size <= MAX_BLOCK_SIZE:
+        raise DeltaError('Invalid block size in delta header.')
+
+    hashers = {algorithm: DIGEST_ALGORITHMS[algorithm]()}
+    if expected and expected[0] not in hashers:
+        hashers[expected[0]] = DIGEST_ALGORITHMS[expected[0]]()
+
+    base_size = os.stat(abs_path).st_size
+    directory, name = os.path.split(abs_path)
+    temp_path = os.path.join(directory, f'.{name}.delta-{secrets.token_hex(4)}')
+    reused = received = 0
+    try:
+        with open(abs_path, 'rb') as src, open(temp_path, 'wb') as out:
+            while True:
+                op = delta_stream.read(1)
+                if not op:
+                    break
+                if op == b'C':
+                    first, count = _COPY_OP.unpack(_read_exact(delta_stream, _COPY_OP.size))
+                    offset = first * block_size
+                    length = min(count * block_size, base_size - offset)
+                    if count == 0 or length <= 0:
+                        raise DeltaError('Block reference points past the end of the base file.')
+                    _copy_range(src, out, offset, length, hashers)
+                    reused += length
+                elif op == b'L':
+                    (length,) = _LITERAL_OP.unpack(_read_exact(delta_stream, _LITERAL_OP.size))
+                    if length > MAX_LITERAL:
+                        raise DeltaError(f'Literal runs are limited to {MAX_LITERAL} bytes.')
+                    data = _read_exact(delta_stream, length)
+                    for h in hashers.values():
+                        h.update(data)
+                    out.write(data)
+                    received += length
+                else:
+                    raise DeltaError(f'Unknown delta op {op!r}.')
+            out.flush()
+            os.fsync(out.fileno())
+            # Both versions were just streamed end to end; keep them from evicting hotter data
+            drop_cache(out.fileno())
+            drop_cache(src.fileno())
+
+        if expected and hashers[expected[0]].hexdigest() != expected[1]:
+            raise ChecksumMismatch(
+                f'{expected[0]} mismatch: expected {expected[1]}, got {hashers[expected[0]].hexdigest()}')
+        os.chmod(temp_path, os.stat(abs_path).st_mode & 0o7777)
+        os.replace(temp_path, abs_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    digest = hashers[algorithm].hexdigest()
+    store_digest(abs_path, algorithm, digest)
+    return digest, reused, received
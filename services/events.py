@@ -0,0 +1,297 @@
+"""
+events.py
+---------
+Directory change notifications for NASberryPi.
+Every mutating file operation calls notify_change(); open file browsers
+subscribe to the folder they show (Server-Sent Events, or long-polling as a
+fallback) and apply the add/remove/rename events to their table instead of
+reloading the whole listing. A watcher thread polls only the folders that
+somebody is looking at, to pick up changes made outside the app (or by
+another gunicorn worker).
+"""
+import os
+import posixpath
+import threading
+import time
+from collections import deque
+
+from flask import current_app
+
+from services.journal import record_change, record_detected_change
+from services.path_resolver import invalidate_path
+from services.spindown import spindown
+from utils import TRASH_DIR_NAME, safe_join
+
+HISTORY_PER_DIR = 200  # Events kept per watched folder for reconnects / long-poll
+
+
+def _parent(rel_path):
+    return posixpath.dirname(rel_path.strip('/'))
+
+
+def _entry_info(nas_root, rel_path):
+    """Row data for an entry, in the same shape as file_ops.list_directory()."""
+    abs_path = safe_join(nas_root, rel_path)
+    try:
+        st = os.stat(abs_path)
+    except (OSError, TypeError):
+        return None
+    is_dir = os.path.isdir(abs_path)
+    return {
+        'name': posixpath.basename(rel_path),
+        'is_dir': is_dir,
+        'size': 0 if is_dir else st.st_size,
+        'mtime': int(st.st_mtime),
+        'path': rel_path,
+    }
+
+
+class _DirStream:
+    __slots__ = ('watchers', 'events', 'floor', 'idle_since')
+
+    def __init__(self, floor):
+        self.watchers = 0
+        self.events = deque(maxlen=HISTORY_PER_DIR)
+        self.floor = floor  # Events at or below this sequence number are not available
+        self.idle_since = None
+
+
+class ChangeBroker:
+    """
+    In-process pub/sub keyed by folder (relative to NAS_ROOT). Events get a
+    process-wide increasing sequence number, used in the SSE event id.
+    Only folders that are (or were, within STREAM_GRACE seconds) watched keep
+    history, so long-poll clients do not lose events between two polls.
+    """
+
+    STREAM_GRACE = 60
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._streams = {}
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def _prune(self):
+        now = time.monotonic()
+        for dir_rel, stream in list(self._streams.items()):
+            if stream.watchers <= 0 and now - stream.idle_since > self.STREAM_GRACE:
+                del self._streams[dir_rel]
+
+    def watch(self, dir_rel):
+        with self._cond:
+            self._prune()
+            stream = self._streams.get(dir_rel)
+            if stream is None:
+                stream = self._streams[dir_rel] = _DirStream(self._seq)
+            stream.watchers += 1
+            stream.idle_since = None
+
+    def unwatch(self, dir_rel):
+        with self._cond:
+            stream = self._streams.get(dir_rel)
+            if stream is not None:
+                stream.watchers -= 1
+                if stream.watchers <= 0:
+                    stream.idle_since = time.monotonic()
+
+    def watched_dirs(self):
+        with self._cond:
+            self._prune()
+            return list(self._streams)
+
+    def publish(self, dir_rel, event):
+        with self._cond:
+            stream = self._streams.get(dir_rel)
+            if stream is None:
+                return
+            self._seq += 1
+            if len(stream.events) == stream.events.maxlen:
+                stream.floor = stream.events[0][0]
+            stream.events.append((self._seq, event))
+            self._cond.notify_all()
+
+    def wait(self, dir_rel, since, timeout):
+        """
+        Blocks up to timeout seconds for events newer than `since` in dir_rel
+        (the caller must be watching it). Returns (events, reset) where
+        reset=True means events were missed and the client must resync.
+        """
+        def pending():
+            stream = self._streams.get(dir_rel)
+            if stream is None:
+                return []
+            return [(seq, ev) for seq, ev in stream.events if seq > since]
+
+        with self._cond:
+            stream = self._streams.get(dir_rel)
+            if stream is None or since < stream.floor:
+                return [], True
+            self._cond.wait_for(pending, timeout)
+            return pending(), False
+
+
+broker = ChangeBroker()
+
+
+def format_event_id(seq):
+    """Event ids carry the worker pid: sequence numbers are only meaningful within one process."""
+    return f'{os.getpid()}-{seq}'
+
+
+def parse_event_id(value):
+    """
+    Returns (seq, reset) for a Last-Event-ID / since value. seq is None when no
+    id was given; reset=True when the id came from another process (or is
+    malformed), so the client must resync from the current sequence.
+    """
+    if not value:
+        return None, False
+    pid, _, seq = value.partition('-')
+    if pid != str(os.getpid()) or not seq.isdigit():
+        return None, True
+    return int(seq), False
+
+
+def notify_change(op, path, new_path=None):
+    """
+    Announces a change made by the app: pushes it to open browsers and
+    appends it to the change journal. op is 'add', 'modify', 'remove' or
+    'rename' (which also covers moves: pass new_path). Paths are relative to
+    NAS_ROOT. Must be called inside an application context.
+    """
+    nas_root = current_app.config['NAS_ROOT']
+    path = path.strip('/')
+    old_dir = _parent(path)
+    entry = None
+    if op in ('remove', 'rename'):
+        invalidate_path(path)
+    spindown.invalidate(path)
+    if new_path:
+        spindown.invalidate(new_path)
+
+    if op in ('add', 'modify'):
+        entry = _entry_info(nas_root, path)
+        if entry:
+            broker.publish(old_dir, {'op': op, 'name': entry['name'], 'entry': entry})
+            watcher.note(old_dir, entry)
+    elif op == 'remove':
+        broker.publish(old_dir, {'op': 'remove', 'name': posixpath.basename(path)})
+        watcher.forget(old_dir, posixpath.basename(path))
+    elif op == 'rename':
+        new_path = new_path.strip('/')
+        new_dir = _parent(new_path)
+        entry = _entry_info(nas_root, new_path)
+        if new_dir == old_dir:
+            broker.publish(old_dir, {'op': 'rename', 'name': posixpath.basename(path),
+                                     'new_name': posixpath.basename(new_path), 'entry': entry})
+        else:
+            broker.publish(old_dir, {'op': 'remove', 'name': posixpath.basename(path)})
+            if entry:
+                broker.publish(new_dir, {'op': 'add', 'name': entry['name'], 'entry': entry})
+        watcher.forget(old_dir, posixpath.basename(path))
+        if entry:
+            watcher.note(new_dir, entry)
+
+    record_change(op, path, new_path, entry)
+
+
+class DirectoryWatcher:
+    """
+    Detects external changes in watched folders. Each tick it stats the
+    folder and only re-lists it when its mtime moved; every
+    WATCH_FULL_SCAN_EVERY ticks it re-lists anyway, to catch files that were
+    rewritten in place (which does not touch the folder's mtime).
+    Changes made through notify_change() are noted in the snapshot first, so
+    they are not reported (or journaled) a second time; changes made by
+    another worker are journaled there, and record_detected_change() skips them.
+    """
+
+    def __init__(self, broker):
+        self._broker = broker
+        self._app = None
+        self._snapshots = {}  # dir_rel -> (dir_mtime_ns, {name: (is_dir, size, mtime)})
+
+    def init_app(self, app):
+        self._app = app
+        thread = threading.Thread(target=self._loop, name='nas-dir-watcher', daemon=True)
+        thread.start()
+
+    def note(self, dir_rel, entry):
+        snapshot = self._snapshots.get(dir_rel)
+        if snapshot is not None:
+            snapshot[1][entry['name']] = (entry['is_dir'], entry['size'], entry['mtime'])
+
+    def forget(self, dir_rel, name):
+        snapshot = self._snapshots.get(dir_rel)
+        if snapshot is not None:
+            snapshot[1].pop(name, None)
+
+    def _loop(self):
+        tick = 0
+        while True:
+            time.sleep(self._app.config.get('WATCH_INTERVAL', 2))
+            tick += 1
+            full = tick % max(1, self._app.config.get('WATCH_FULL_SCAN_EVERY', 5)) == 0
+            watched = set(self._broker.watched_dirs())
+            for dir_rel in list(self._snapshots):
+                if dir_rel not in watched:
+                    del self._snapshots[dir_rel]
+            for dir_rel in watched:
+                try:
+                    with self._app.app_context():
+                        self._check(dir_rel, full)
+                except Exception as e:
+                    print(f"Directory watcher error for '{dir_rel}': {e}")
+
+    def _scan(self, abs_dir):
+        entries = {}
+        with os.scandir(abs_dir) as it:
+            for entry in it:
+                if entry.name == TRASH_DIR_NAME:
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries[entry.name] = (is_dir, 0 if is_dir else st.st_size, int(st.st_mtime))
+        return entries
+
+    def _check(self, dir_rel, full):
+        abs_dir = safe_join(self._app.config['NAS_ROOT'], dir_rel)
+        if not abs_dir or spindown.is_idle(abs_dir):
+            return  # Nothing can change on a disk without I/O; polling it would only wake it
+        if not os.path.isdir(abs_dir):
+            return
+        dir_mtime = os.stat(abs_dir).st_mtime_ns
+        previous = self._snapshots.get(dir_rel)
+        if previous is not None and previous[0] == dir_mtime and not full:
+            return
+
+        current = self._scan(abs_dir)
+        self._snapshots[dir_rel] = (dir_mtime, current)
+        if previous is None:
+            return  # First look at this folder: nothing to compare against
+
+        old = previous[1]
+        for name in old.keys() - current.keys():
+            self._broker.publish(dir_rel, {'op': 'remove', 'name': name, 'external': True})
+            spindown.invalidate(posixpath.join(dir_rel, name))
+            record_detected_change('remove', posixpath.join(dir_rel, name) if dir_rel else name)
+        for name, info in current.items():
+            if old.get(name) == info:
+                continue
+            is_dir, size, mtime = info
+            entry = {'name': name, 'is_dir': is_dir, 'size': size, 'mtime': mtime,
+                     'path': posixpath.join(dir_rel, name) if dir_rel else name}
+            op = 'add' if name not in old else 'modify'
+            spindown.invalidate(entry['path'])
+            self._broker.publish(dir_rel, {'op': op, 'name': name, 'entry': entry, 'external': True})
+            record_detected_change(op, entry['path'], entry=entry)
+
+
+watcher = DirectoryWatcher(broker)
@@ -0,0 +1,205 @@
+"""
+file_ops.py
+-----------
+Directory listing and batch file operations for NASberryPi.
+A batch is authorized once up front, then executed with bounded
+parallelism; every operation reports its own result so one failure
+does not abort the rest.
+"""
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from flask import current_app
+
+from services.access_control import authorize_item, authorize_path
+from services.events import notify_change
+from services.spindown import spindown
+from services.trash import move_to_trash
+from utils import TRASH_DIR_NAME, safe_join
+
+BATCH_OPS = ('delete', 'move', 'rename', 'mkdir')
+
+
+def list_directory(abs_path, nas_root):
+    """
+    Returns the entries of abs_path as raw dicts with 'name', 'is_dir',
+    'size' (bytes, 0 for folders), 'mtime' (epoch seconds) and 'path'
+    (relative to nas_root), folders first. Trash folders are hidden.
+    Raises PermissionError if the folder cannot be read. On an idle
+    rotational disk the last listing is returned instead (see spindown.py).
+    """
+    cached = spindown.cached_listing(abs_path)
+    if cached is not None:
+        return cached
+    activity = spindown.activity(abs_path)  # Before reading: any I/O from here on invalidates the listing
+    entries = []
+    with os.scandir(abs_path) as it:
+        for entry in it:
+            if entry.name == TRASH_DIR_NAME:
+                continue
+            try:
+                is_dir = entry.is_dir()
+                st = entry.stat()
+            except OSError:
+                continue  # Broken symlink or entry removed while listing
+            entries.append({
+                'name': entry.name,
+                'is_dir': is_dir,
+                'size': 0 if is_dir else st.st_size,
+                'mtime': int(st.st_mtime),
+                'path': os.path.relpath(entry.path, nas_root).replace('\\', '/'),
+            })
+    entries.sort(key=lambda x: (not x['is_dir'], x['name'].lower()))
+    spindown.remember_listing(abs_path, entries, activity)
+    return entries
+
+
+def columnar_listing(rel_path, entries):
+    """
+    Packs list_directory() entries as parallel arrays for the /api/files
+    endpoint: one list per field instead of one object per entry, so the
+    keys are not repeated for every file.
+    """
+    return {
+        'path': rel_path,
+        'count': len(entries),
+        'names': [e['name'] for e in entries],
+        'types': ['d' if e['is_dir'] else 'f' for e in entries],
+        'sizes': [e['size'] for e in entries],
+        'mtimes': [e['mtime'] for e in entries],
+    }
+
+
+def _normalize(rel_path):
+    rel_path = (rel_path or '').replace('\\', '/').strip('/')
+    return posixpath.normpath(rel_path) if rel_path else ''
+
+
+def validate_batch(user, operations, nas_root):
+    """
+    Checks the shape of every operation and the user's access to every path
+    it touches (see authorize_item for deletes, moves and renames). Each
+    distinct path is checked only once.
+
+    Returns (normalized_operations, errors) where errors is a list of
+    {'index', 'message'} dicts; the batch must be rejected if it is non-empty.
+    """
+    allowed_cache = {}
+
+    def allowed(rel_path, check=authorize_path):
+        key = (check, rel_path)
+        if key not in allowed_cache:
+            allowed_cache[key] = check(user, rel_path, nas_root)
+        return allowed_cache[key]
+
+    normalized, errors = [], []
+    for index, raw in enumerate(operations):
+        if not isinstance(raw, dict):
+            errors.append({'index': index, 'message': 'Operation must be an object.'})
+            continue
+        op = raw.get('op')
+        path = _normalize(raw.get('path'))
+        item = {'index': index, 'op': op, 'path': path}
+
+        if op not in BATCH_OPS:
+            errors.append({'index': index, 'message': f'Unknown operation: {op}'})
+            continue
+        if not path or path == '.':
+            errors.append({'index': index, 'message': 'A path is required.'})
+            continue
+        if op == 'mkdir' and posixpath.basename(path) == TRASH_DIR_NAME:
+            errors.append({'index': index, 'message': f'"{TRASH_DIR_NAME}" is a reserved name.'})
+            continue
+
+        # Deletes, moves and renames take the item out of its folder.
+        checks = [allowed(path) if op == 'mkdir' else allowed(path, authorize_item)]
+        if op == 'move':
+            item['dest'] = _normalize(raw.get('dest'))
+            checks.append(allowed(item['dest']))
+        elif op == 'rename':
+            new_name = (raw.get('new_name') or '').strip()
+            if not new_name or '/' in new_name or '\\' in new_name or new_name in ('.', '..'):
+                errors.append({'index': index, 'message': 'Invalid new name.'})
+                continue
+            if new_name == TRASH_DIR_NAME:
+                errors.append({'index': index, 'message': f'"{TRASH_DIR_NAME}" is a reserved name.'})
+                continue
+            item['new_name'] = new_name
+
+        if any(resolved is None for resolved, _ in checks):
+            errors.append({'index': index, 'message': f'Access denied: {path}'})
+            continue
+        normalized.append(item)
+
+    return normalized, errors
+
+
+def _execute(user, item, nas_root):
+    op, path = item['op'], item['path']
+    abs_path = safe_join(nas_root, path)
+    if not abs_path:
+        raise ValueError('Invalid path.')
+
+    if op == 'mkdir':
+        os.makedirs(abs_path)
+        notify_change('add', path)
+        return path
+    if not os.path.lexists(abs_path):
+        raise FileNotFoundError(f'"{path}" does not exist.')
+
+    if op == 'delete':
+        move_to_trash(user, path, nas_root)
+        return None
+
+    if op == 'rename':
+        target = os.path.join(os.path.dirname(abs_path), item['new_name'])
+    else:
+        dest_dir = safe_join(nas_root, item['dest'])
+        if not dest_dir or not os.path.isdir(dest_dir):
+            raise NotADirectoryError(f'"{item["dest"]}" is not a folder.')
+        target = os.path.join(dest_dir, os.path.basename(abs_path))
+        if (target + os.sep).startswith(abs_path + os.sep):
+            raise ValueError('Cannot move a folder into itself.')
+
+    if os.path.lexists(target):
+        raise FileExistsError(f'"{os.path.basename(target)}" already exists.')
+    os.rename(abs_path, target)
+    new_path = os.path.relpath(target, nas_root).replace('\\', '/')
+    notify_change('rename', path, new_path)
+    return new_path
+
+
+def run_batch(user, operations, nas_root, max_workers=4):
+    """
+    Executes already-validated operations. Folder creation runs first (parents
+    before children) so later operations can target the new folders; the rest
+    run concurrently on up to max_workers threads.
+    Returns one result dict per operation, in request order.
+    """
+    app = current_app._get_current_object()
+    # Worker threads get their own DB sessions, so hand them a plain snapshot
+    # of the user rather than an ORM instance bound to the request session.
+    owner = SimpleNamespace(id=user.id, username=user.username, role=user.role)
+
+    def run(item):
+        result = {'index': item['index'], 'op': item['op'], 'path': item['path']}
+        with app.app_context():
+            try:
+                new_path = _execute(owner, item, nas_root)
+                result['status'] = 'ok'
+                if new_path and new_path != item['path']:
+                    result['new_path'] = new_path
+            except Exception as e:
+                result.update(status='error', message=str(e))
+        return result
+
+    mkdirs = sorted((i for i in operations if i['op'] == 'mkdir'), key=lambda i: i['path'].count('/'))
+    others = [i for i in operations if i['op'] != 'mkdir']
+
+    results = [run(item) for item in mkdirs]
+    if others:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            results.extend(pool.map(run, others))
+    return sorted(results, key=lambda r: r['index'])
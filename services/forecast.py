@@ -0,0 +1,247 @@
+"""
+forecast.py
+-----------
+Capacity forecasting for NASberryPi.
+Once per FORECAST_INTERVAL a background thread measures every user home
+(recorded as home.<username>.used_bytes in the metrics store, next to the
+disk.nas_root.* series) and feeds the hourly rollups that completed since
+the previous run into a trend model. The model is an exponentially weighted
+least-squares line per series, kept as five running sums, so an update only
+touches the new points and all series are fitted in one vectorized NumPy
+step. Page views read the cached result.
+
+Days until full = free space of the filesystem / growth per day. For a
+user, that is the growth of their home alone against the free space of the
+filesystem holding it. Homes on a sleeping disk are not measured (see
+spindown.py); their last measurement stands. Without NumPy, forecasting is
+disabled.
+"""
+import os
+import shutil
+import stat
+import threading
+import time
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+except ImportError:  # Optional: no forecasts without it
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: every worker scans
+    fcntl = None
+
+from services.metrics import metrics
+from services.spindown import spindown
+
+GB = 1024 ** 3
+NAS_ROOT_SERIES = 'disk.nas_root.used_gb'  # Recorded by app._nas_root_usage() via the metrics store
+
+
+def home_series(username):
+    return f'home.{username}.used_bytes'
+
+
+def directory_usage(path):
+    """Bytes allocated on disk under path (like du); symlinks are not followed."""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    blocks = getattr(st, 'st_blocks', None)
+                    total += blocks * 512 if blocks is not None else st.st_size
+                    if stat.S_ISDIR(st.st_mode):
+                        stack.append(entry.path)
+        except OSError:
+            continue  # Vanished or unreadable
+    return total
+
+
+class TrendModel:
+    """
+    Weighted least-squares line y = a + b*x for many series at once, with
+    weights halving every half_life seconds. The fit only needs the sums
+    of w, wx, wy, wxx and wxy per series; decaying them to a new reference
+    time is a single multiplication, so old points never have to be read
+    again.
+    """
+
+    def __init__(self, half_life):
+        self.half_life = half_life
+        self.names = []
+        self._index = {}
+        self.sums = np.zeros((5, 0))
+        self.first = np.zeros(0)   # Time of the first point per series
+        self.last = np.zeros(0)    # Time of the last point per series
+        self.ref = None            # Time the weights are relative to
+        self.origin = None         # x is measured in days from here, for numerical stability
+
+    def index(self, name):
+        i = self._index.get(name)
+        if i is None:
+            i = self._index[name] = len(self.names)
+            self.names.append(name)
+            self.sums = np.hstack([self.sums, np.zeros((5, 1))])
+            self.first = np.append(self.first, np.inf)
+            self.last = np.append(self.last, -np.inf)
+        return i
+
+    def update(self, series, t, y, now):
+        """Adds points: series (index per point), t (seconds) and y, all arrays of the same length."""
+        if self.ref is not None:
+            self.sums *= 0.5 ** ((now - self.ref) / self.half_life)
+        if self.origin is None:
+            self.origin = now
+        self.ref = now
+        if not len(t):
+            return
+        w = 0.5 ** ((now - t) / self.half_life)
+        x = (t - self.origin) / 86400
+        n = len(self.names)
+        for row, values in enumerate((w, w * x, w * y, w * x * x, w * x * y)):
+            self.sums[row] += np.bincount(series, weights=values, minlength=n)
+        np.minimum.at(self.first, series, t)
+        np.maximum.at(self.last, series, t)
+
+    def slopes(self):
+        """Growth per day for every series (NaN where there is no trend to fit)."""
+        w, wx, wy, wxx, wxy = self.sums
+        denominator = w * wxx - wx * wx
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(denominator > 1e-12, (w * wxy - wx * wy) / denominator, np.nan)
+
+
+class CapacityForecaster:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._app = None
+        self._model = None
+        self._scan_lock = None
+        self._last_homes = {}
+        self._snapshot = {'available': np is not None, 'updated': None, 'filesystem': None, 'users': {}}
+
+    def init_app(self, app):
+        self._app = app
+        if np is None:
+            print("NumPy is not installed; capacity forecasts are disabled.")
+            return
+        self._model = TrendModel(app.config.get('FORECAST_HALF_LIFE_DAYS', 7) * 86400)
+        thread = threading.Thread(target=self._loop, name='nas-forecast', daemon=True)
+        thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Capacity forecast failed: {e}")
+            time.sleep(self._app.config.get('FORECAST_INTERVAL', 3600))
+
+    def _homes(self):
+        users_dir = os.path.join(self._app.config['NAS_ROOT'], 'users')
+        if spindown.is_idle(users_dir):
+            return self._last_homes
+        try:
+            with os.scandir(users_dir) as it:
+                self._last_homes = {e.name: e.path for e in it if e.is_dir(follow_symlinks=False)}
+        except OSError:
+            self._last_homes = {}
+        return self._last_homes
+
+    def _owns_scan(self):
+        """With several gunicorn workers, only one measures the homes."""
+        if fcntl is None or self._scan_lock is not None:
+            return True
+        path = self._app.config.get('METRICS_DB')
+        if not path:
+            return True
+        lock = open(path + '.scan.lock', 'w')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return False
+        self._scan_lock = lock  # Held for the life of the process
+        return True
+
+    def refresh(self):
+        """Measures the homes, feeds new hourly points to the model and rebuilds the snapshot."""
+        homes = self._homes()
+        if self._owns_scan():
+            for username, path in homes.items():
+                if not spindown.is_idle(path):
+                    metrics.record(home_series(username), directory_usage(path))
+
+        now = time.time()
+        hour = now - now % 3600  # Only hours that are complete: their averages will not change any more
+        window = self._app.config.get('FORECAST_WINDOW_DAYS', 30) * 86400
+        model = self._model
+        indices, times, values = [], [], []
+        for name, scale in [(NAS_ROOT_SERIES, GB)] + [(home_series(u), 1) for u in homes]:
+            i = model.index(name)
+            since = model.last[i] + 1 if np.isfinite(model.last[i]) else now - window
+            for point in metrics.query(name, '1h', since, hour - 1):
+                indices.append(i)
+                times.append(point['t'])
+                values.append(point['avg'] * scale)
+        model.update(np.array(indices, dtype=np.intp), np.array(times, dtype=float),
+                     np.array(values, dtype=float), now)
+
+        slopes = model.slopes()
+        min_span = self._app.config.get('FORECAST_MIN_HISTORY_HOURS', 24) * 3600
+        nas_root = self._app.config['NAS_ROOT']
+
+        def entry(name, usage_path, used):
+            i = model.index(name)
+            try:
+                total, fs_used, free = shutil.disk_usage(usage_path)
+            except OSError:
+                return None
+            enough = model.last[i] - model.first[i] >= min_span
+            growth = slopes[i] if enough and np.isfinite(slopes[i]) else None
+            days = free / growth if growth is not None and growth > 0 else None
+            return {
+                'used_bytes': fs_used if used is None else used,
+                'free_bytes': free,
+                'total_bytes': total,
+                'growth_bytes_per_day': round(float(growth)) if growth is not None else None,
+                'days_until_full': round(float(days), 1) if days is not None else None,
+                'full_date': (datetime.fromtimestamp(now + days * 86400, timezone.utc).date().isoformat()
+                              if days is not None and days < 36500 else None),
+                'collecting': not enough,
+            }
+
+        users = {}
+        for username, path in sorted(homes.items()):
+            name = home_series(username)
+            latest = metrics.query(name, 'raw') or metrics.query(name, '1h', now - 2 * 86400)
+            if latest:
+                users[username] = entry(name, path, latest[-1].get('value', latest[-1].get('avg')))
+        snapshot = {
+            'available': True,
+            'updated': now,
+            'filesystem': entry(NAS_ROOT_SERIES, nas_root, None),
+            'users': {u: e for u, e in users.items() if e is not None},
+        }
+        with self._lock:
+            self._snapshot = snapshot
+
+    def snapshot(self, username=None):
+        """The last forecast; with username, only that user's entry is included."""
+        with self._lock:
+            snapshot = dict(self._snapshot)
+        if username is not None:
+            own = snapshot['users'].get(username)
+            snapshot['users'] = {username: own} if own else {}
+        return snapshot
+
+
+forecaster = CapacityForecaster()
@@ -0,0 +1,247 @@
+"""
+io_policy.py
+------------
+Page-cache policy for large sequential transfers.
+Streaming a multi-gigabyte file through the page cache evicts everything
+else the Pi keeps there (directory entries, the SQLite database, the static
+assets). For files above IO_POLICY_MIN_SIZE we therefore tell the kernel
+what is going on with posix_fadvise:
+
+* downloads: SEQUENTIAL for a larger read-ahead, WILLNEED for the next
+  window, and DONTNEED for the part that has already been sent;
+* uploads: DONTNEED for the part that has already been written, one window
+  behind the write position so the kernel has started writing it back.
+
+Huge uploads can optionally bypass the page cache altogether with O_DIRECT.
+On platforms without posix_fadvise (macOS, Windows) all of this is a no-op.
+"""
+import mmap
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: no O_DIRECT either
+    fcntl = None
+
+FADVISE = hasattr(os, 'posix_fadvise')
+DIRECT_IO = hasattr(os, 'O_DIRECT') and fcntl is not None
+DIRECT_ALIGN = 4096  # Covers the logical block size of SD cards, USB disks and SSDs
+
+DEFAULT_WINDOW = 8 * 1024 * 1024
+
+
+def _fadvise(fd, offset, length, advice):
+    try:
+        os.posix_fadvise(fd, offset, length, advice)
+    except (AttributeError, OSError):
+        pass
+
+
+def drop_cache(fd):
+    """Drops a file's clean pages from the page cache (no-op without fadvise)."""
+    if FADVISE:
+        _fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+class ReadAhead:
+    """Read-side policy for one file descriptor; call advance() as data is consumed."""
+
+    def __init__(self, fd, position=0, window=DEFAULT_WINDOW):
+        self.fd = fd
+        self.window = window
+        self._dropped = position - position % window
+        self._prefetched = position
+        if FADVISE:
+            _fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            self.advance(position)
+
+    def advance(self, position):
+        if not FADVISE:
+            return
+        if position + self.window > self._prefetched:
+            _fadvise(self.fd, position, self.window * 2, os.POSIX_FADV_WILLNEED)
+            self._prefetched = position + self.window * 2
+        drop_to = position - position % self.window
+        if drop_to > self._dropped:
+            _fadvise(self.fd, self._dropped, drop_to - self._dropped, os.POSIX_FADV_DONTNEED)
+            self._dropped = drop_to
+
+    def finish(self):
+        drop_cache(self.fd)
+
+
+class WriteBehind:
+    """Write-side policy: drops written pages once the kernel has had a window to flush them."""
+
+    def __init__(self, fd, window=DEFAULT_WINDOW):
+        self.fd = fd
+        self.window = window
+        self._written = 0
+        self._dropped = 0
+
+    def advance(self, nbytes):
+        if not FADVISE:
+            return
+        self._written += nbytes
+        # DONTNEED starts writeback of dirty pages and only drops the clean
+        # ones, so lag one window behind to let the previous window finish.
+        drop_to = self._written - self.window
+        drop_to -= drop_to % self.window
+        if drop_to - self._dropped >= self.window:
+            _fadvise(self.fd, self._dropped, drop_to - self._dropped, os.POSIX_FADV_DONTNEED)
+            self._dropped = drop_to
+
+    def finish(self):
+        """Call after fsync/fdatasync, when every page is clean and can really be dropped."""
+        drop_cache(self.fd)
+
+
+class _PolicyIterable:
+    """Wraps a file download body (werkzeug FileWrapper, possibly range-limited)."""
+
+    def __init__(self, iterable, file, window):
+        self._iterable = iterable
+        self._file = file
+        self._window = window
+
+    def __iter__(self):
+        policy = ReadAhead(self._file.fileno(), self._file.tell(), self._window)
+        pending = 0
+        for chunk in self._iterable:
+            pending += len(chunk)
+            if pending >= policy.window // 4:
+                pending = 0
+                policy.advance(self._file.tell())
+            yield chunk
+        policy.finish()
+
+    def close(self):
+        if hasattr(self._iterable, 'close'):
+            self._iterable.close()
+
+
+def _source_file(iterable):
+    wrapper = getattr(iterable, 'iterable', iterable)  # werkzeug's _RangeWrapper
+    return wrapper, getattr(wrapper, 'file', None) or getattr(wrapper, 'filelike', None)
+
+
+def apply_read_policy(response, config):
+    """
+    Applies the download policy to a send_file()/send_from_directory()
+    response for a file of at least IO_POLICY_MIN_SIZE bytes. Also raises the
+    read size from werkzeug's 8 KiB, which costs a lot of CPU on a Pi.
+    """
+    if response.status_code not in (200, 206) or not response.direct_passthrough:
+        return response
+    wrapper, file = _source_file(response.response)
+    if file is None or not hasattr(file, 'fileno'):
+        return response
+    try:
+        size = os.fstat(file.fileno()).st_size
+    except (OSError, ValueError):
+        return response
+    if size < config.get('IO_POLICY_MIN_SIZE', 64 * 1024 * 1024):
+        return response
+
+    if hasattr(wrapper, 'buffer_size'):
+        wrapper.buffer_size = config.get('IO_READ_CHUNK_SIZE', 256 * 1024)
+    response.response = _PolicyIterable(response.response, file,
+                                         config.get('IO_POLICY_WINDOW', DEFAULT_WINDOW))
+    return response
+
+
+class DirectWriter:
+    """
+    Write-only file opened with O_DIRECT. Data is staged in a page-aligned
+    buffer and written in aligned blocks; the unaligned tail is written
+    with O_DIRECT switched off. Falls back to buffered I/O where the
+    filesystem refuses O_DIRECT (e.g. tmpfs, some FUSE mounts).
+    """
+
+    def __init__(self, path, buffer_size=4 * 1024 * 1024):
+        buffer_size -= buffer_size % DIRECT_ALIGN
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        self._direct = False
+        try:
+            self._set_direct(True)
+        except OSError:
+            pass
+        self._buffer = mmap.mmap(-1, buffer_size)  # Anonymous mappings are page-aligned
+        self._fill = 0
+
+    def fileno(self):
+        return self._fd
+
+    def write(self, data):
+        view = memoryview(data)
+        while view:
+            take = min(len(view), len(self._buffer) - self._fill)
+            self._buffer[self._fill:self._fill + take] = view[:take]
+            self._fill += take
+            view = view[take:]
+            if self._fill == len(self._buffer):
+                self._flush_aligned()
+        return len(data)
+
+    def _write_all(self, data):
+        while data:
+            written = os.write(self._fd, data)
+            data = data[written:]
+
+    def _flush_aligned(self):
+        aligned = self._fill - self._fill % DIRECT_ALIGN
+        if aligned:
+            try:
+                self._write_all(memoryview(self._buffer)[:aligned])
+            except OSError:
+                if not self._direct:
+                    raise
+                self._set_direct(False)  # Filesystem accepted the flag but not the I/O
+                self._write_all(memoryview(self._buffer)[:aligned])
+            self._buffer.move(0, aligned, self._fill - aligned)
+            self._fill -= aligned
+
+    def _set_direct(self, enabled):
+        flags = fcntl.fcntl(self._fd, fcntl.F_GETFL)
+        flags = flags | os.O_DIRECT if enabled else flags & ~os.O_DIRECT
+        fcntl.fcntl(self._fd, fcntl.F_SETFL, flags)
+        self._direct = enabled
+
+    def flush(self):
+        self._flush_aligned()
+        if self._fill:
+            if self._direct:
+                self._set_direct(False)
+            self._write_all(memoryview(self._buffer)[:self._fill])
+            self._fill = 0
+
+    def close(self):
+        if self._fd is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self._buffer.close()
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_for_upload(path, expected_size, config):
+    """
+    Opens an upload destination according to the policy. Returns
+    (file, write_behind): write_behind is None when no fadvise bookkeeping
+    is needed (small files, or O_DIRECT which bypasses the cache anyway).
+    """
+    direct_min = config.get('IO_DIRECT_UPLOAD_MIN_SIZE', 0)
+    if DIRECT_IO and direct_min and expected_size and expected_size >= direct_min:
+        return DirectWriter(path), None
+    out = open(path, 'wb')
+    if expected_size is not None and expected_size < config.get('IO_POLICY_MIN_SIZE', 64 * 1024 * 1024):
+        return out, None
+    return out, WriteBehind(out.fileno(), config.get('IO_POLICY_WINDOW', DEFAULT_WINDOW))
@@ -0,0 +1,339 @@
+"""
+jobs.py
+-------
+Background job engine for long-running file operations in NASberryPi.
+Routes submit work here and return immediately; a small thread pool runs
+each job inside an application context and records its progress in the
+Job table so any request (or gunicorn worker) can report on it.
+"""
+import json
+import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+
+from models import db, DiskBenchmark, Job
+from services.events import notify_change
+from utils import safe_join
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+_HANDLERS = {}
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler once the user has asked to cancel the job."""
+
+
+def job_handler(kind):
+    """Registers a function as the handler for a job kind."""
+    def decorator(f):
+        _HANDLERS[kind] = f
+        return f
+    return decorator
+
+
+class JobContext:
+    """
+    Handed to every handler. Handlers call progress() as they go; it persists
+    the counters at most every JOB_PROGRESS_INTERVAL seconds and raises
+    JobCancelled when a cancellation has been requested.
+    """
+
+    def __init__(self, job_id, nas_root, min_interval):
+        self.job_id = job_id
+        self.nas_root = nas_root
+        self.min_interval = min_interval
+        self.done = 0
+        self.total = 0
+        self._last_flush = 0.0
+
+    def resolve(self, rel_path):
+        abs_path = safe_join(self.nas_root, rel_path)
+        if abs_path is None:
+            raise ValueError(f'Invalid path: {rel_path}')
+        return abs_path
+
+    def progress(self, done=None, total=None, message=None, force=False):
+        if done is not None:
+            self.done = done
+        if total is not None:
+            self.total = total
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.min_interval:
+            return
+        self._last_flush = now
+
+        values = {'progress_done': self.done, 'progress_total': self.total}
+        if message is not None:
+            values['message'] = message[:255]
+        Job.query.filter_by(id=self.job_id).update(values)
+        db.session.commit()
+
+        cancelled = db.session.query(Job.cancel_requested).filter_by(id=self.job_id).scalar()
+        if cancelled:
+            raise JobCancelled()
+
+    def check_cancelled(self):
+        """Cheap cancellation point for tight loops (throttled like progress())."""
+        self.progress()
+
+
+class JobManager:
+    """Owns the worker pool. Call init_app() once the database is ready."""
+
+    def __init__(self):
+        self._app = None
+        self._executor = None
+
+    def init_app(self, app):
+        self._app = app
+        self._executor = ThreadPoolExecutor(max_workers=app.config.get('JOB_WORKERS', 2),
+                                            thread_name_prefix='nas-job')
+        with app.app_context():
+            self._fail_orphaned_jobs()
+
+    def _fail_orphaned_jobs(self):
+        """Marks jobs whose owning process has died (e.g. after a restart) as failed."""
+        stale = Job.query.filter(Job.status.in_(('queued', 'running'))).all()
+        for job in stale:
+            if job.owner_pid and _pid_alive(job.owner_pid):
+                continue
+            job.status = 'failed'
+            job.message = 'Interrupted by server restart.'
+            job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    def submit(self, user, kind, **params):
+        """Persists a new job for user and queues it. Returns the Job row."""
+        if kind not in _HANDLERS:
+            raise ValueError(f'Unknown job type: {kind}')
+        job = Job(user_id=user.id, kind=kind, params=json.dumps(params), owner_pid=os.getpid())
+        db.session.add(job)
+        db.session.commit()
+        self._executor.submit(self._run, job.id)
+        return job
+
+    def cancel(self, job):
+        """Flags a job for cancellation; the handler stops at its next progress() call."""
+        if job.status == 'queued':
+            job.status = 'cancelled'
+            job.finished_at = datetime.utcnow()
+        job.cancel_requested = True
+        db.session.commit()
+
+    def _run(self, job_id):
+        with self._app.app_context():
+            job = db.session.get(Job, job_id)
+            if job is None or job.status != 'queued':
+                return
+            job.status = 'running'
+            db.session.commit()
+
+            ctx = JobContext(job_id, self._app.config['NAS_ROOT'],
+                             self._app.config.get('JOB_PROGRESS_INTERVAL', 0.5))
+            handler = _HANDLERS[job.kind]
+            try:
+                message = handler(ctx, **job.get_params())
+                status = 'done'
+            except JobCancelled:
+                message, status = 'Cancelled.', 'cancelled'
+            except Exception as e:
+                db.session.rollback()
+                message, status = f'Error: {e}', 'failed'
+
+            job = db.session.get(Job, job_id)
+            job.status = status
+            job.progress_done = ctx.done
+            job.progress_total = ctx.total
+            job.message = (message or '')[:255] or None
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+jobs = JobManager()
+
+
+# ─────────────────────────────────────────────
+# Helpers shared with other services
+# ─────────────────────────────────────────────
+
+def remove_tree(path, on_item=None):
+    """
+    Removes a file or directory tree bottom-up, calling on_item() after each
+    entry so callers can report progress, throttle or abort (by raising).
+    Returns the number of entries removed.
+    """
+    if os.path.islink(path) or not os.path.isdir(path):
+        os.remove(path)
+        if on_item:
+            on_item()
+        return 1
+
+    removed = 0
+    for dirpath, dirnames, filenames in os.walk(path, topdown=False):
+        for name in filenames:
+            os.remove(os.path.join(dirpath, name))
+            removed += 1
+            if on_item:
+                on_item()
+        for name in dirnames:
+            sub = os.path.join(dirpath, name)
+            if os.path.islink(sub):
+                os.remove(sub)
+            else:
+                os.rmdir(sub)
+            removed += 1
+            if on_item:
+                on_item()
+    os.rmdir(path)
+    if on_item:
+        on_item()
+    return removed + 1
+
+
+def _walk_files(path):
+    """Yields (abs_path, size) for every regular file under path (or path itself)."""
+    if not os.path.isdir(path):
+        yield path, os.path.getsize(path)
+        return
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            fp = os.path.join(dirpath, name)
+            if not os.path.islink(fp):
+                yield fp, os.path.getsize(fp)
+
+
+def _human_size(num_bytes):
+    return f'{num_bytes / (1024 * 1024):.2f} MB'
+
+
+# ─────────────────────────────────────────────
+# Handlers
+# ─────────────────────────────────────────────
+
+@job_handler('copy')
+def _copy(ctx, src, dest_dir):
+    src_abs = ctx.resolve(src)
+    dest_abs = os.path.join(ctx.resolve(dest_dir), os.path.basename(src_abs))
+    if not os.path.exists(src_abs):
+        raise FileNotFoundError(src)
+    if os.path.exists(dest_abs):
+        raise FileExistsError(f'"{os.path.basename(dest_abs)}" already exists in the destination.')
+    if os.path.isdir(src_abs) and (dest_abs + os.sep).startswith(src_abs + os.sep):
+        raise ValueError('Cannot copy a folder into itself.')
+
+    files = list(_walk_files(src_abs))
+    ctx.progress(0, sum(size for _, size in files), force=True)
+
+    try:
+        if os.path.isdir(src_abs):
+            for dirpath, _, _ in os.walk(src_abs):
+                os.makedirs(os.path.join(dest_abs, os.path.relpath(dirpath, src_abs)), exist_ok=True)
+        for fp, _ in files:
+            target = dest_abs if fp == src_abs else os.path.join(dest_abs, os.path.relpath(fp, src_abs))
+            with open(fp, 'rb') as fsrc, open(target, 'wb') as fdst:
+                while True:
+                    chunk = fsrc.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    fdst.write(chunk)
+                    ctx.progress(ctx.done + len(chunk))
+            shutil.copystat(fp, target)
+    except JobCancelled:
+        if os.path.lexists(dest_abs):
+            remove_tree(dest_abs)
+        raise
+
+    notify_change('add', os.path.relpath(dest_abs, ctx.nas_root).replace('\\', '/'))
+    return f'Copied "{os.path.basename(src_abs)}" ({_human_size(ctx.total)}).'
+
+
+@job_handler('archive')
+def _archive(ctx, path):
+    src_abs = ctx.resolve(path)
+    if not os.path.exists(src_abs):
+        raise FileNotFoundError(path)
+    zip_path = src_abs.rstrip(os.sep) + '.zip'
+    if os.path.exists(zip_path):
+        raise FileExistsError(f'"{os.path.basename(zip_path)}" already exists.')
+
+    files = list(_walk_files(src_abs))
+    ctx.progress(0, sum(size for _, size in files), force=True)
+
+    base = os.path.dirname(src_abs)
+    partial = os.path.join(base, f'.{os.path.basename(zip_path)}.part')
+    try:
+        with zipfile.ZipFile(partial, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            if os.path.isdir(src_abs):
+                for dirpath, dirnames, filenames in os.walk(src_abs):
+                    if not dirnames and not filenames:
+                        zf.write(dirpath, os.path.relpath(dirpath, base))
+            for fp, size in files:
+                zf.write(fp, os.path.relpath(fp, base))
+                ctx.progress(ctx.done + size)
+        os.replace(partial, zip_path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+    notify_change('add', os.path.relpath(zip_path, ctx.nas_root).replace('\\', '/'))
+    return f'Created "{os.path.basename(zip_path)}".'
+
+
+@job_handler('rescan')
+def _rescan(ctx, path):
+    root = ctx.resolve(path)
+    if not os.path.isdir(root):
+        raise NotADirectoryError(path)
+
+    file_count = dir_count = total = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dir_count += len(dirnames)
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                continue
+            file_count += 1
+        ctx.progress(file_count)
+
+    return (f'"{os.path.basename(root) or "/"}": {file_count} files, '
+            f'{dir_count} folders, {_human_size(total)}.')
+
+
+@job_handler('disk_benchmark')
+def _disk_benchmark(ctx, mount_point, disk_key, disk_name, filesystem=None):
+    from disk_manager.benchmark import STAGES, run_benchmark
+
+    config = current_app.config
+    results = run_benchmark(
+        mount_point,
+        file_size=config.get('BENCHMARK_FILE_SIZE', 256 * 1024 * 1024),
+        random_seconds=config.get('BENCHMARK_RANDOM_SECONDS', 5),
+        fsync_count=config.get('BENCHMARK_FSYNC_COUNT', 100),
+        progress=lambda stage, message: ctx.progress(stage, len(STAGES), message),
+    )
+    ctx.progress(len(STAGES), len(STAGES))
+    db.session.add(DiskBenchmark(disk_key=disk_key, disk_name=disk_name, mount_point=mount_point,
+                                 filesystem=filesystem, job_id=ctx.job_id, **results))
+    db.session.commit()
+    return (f'{mount_point}: read {results["seq_read_bps"] / 1024 ** 2:.0f} MB/s, '
+            f'write {results["seq_write_bps"] / 1024 ** 2:.0f} MB/s, '
+            f'{results["rand_read_iops"]:.0f}/{results["rand_write_iops"]:.0f} IOPS (4K read/write), '
+            f'fsync {results["fsync_avg_ms"]:.1f} ms.')
@@ -0,0 +1,293 @@
+"""
+journal.py
+----------
+Persistent change journal for NASberryPi.
+Every change announced through events.notify_change() (and every external
+change the directory watcher detects) is appended with a strictly increasing
+sequence number, so sync clients can ask for "everything since seq N" instead
+of walking the whole tree.
+
+The watcher only polls folders that somebody has open. Elsewhere, a
+JournalScanner compares every folder's mtime with its previous pass and
+journals a 'rescan' of each folder whose entries changed: the names are not
+known, so clients re-list that folder. Files rewritten in place do not move
+their folder's mtime; outside watched folders, those are not journaled.
+"""
+import json
+import os
+import posixpath
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows: every worker scans
+    fcntl = None
+
+from flask import current_app
+
+from models import db, ChangeJournalEntry
+from services.access_control import ensure_path_allowed, get_user_home_rel
+from services.spindown import spindown
+from utils import TRASH_DIR_NAME
+
+PRUNE_EVERY = 500  # Inserts between retention clean-ups (per process)
+DETECTED_WINDOW = 60  # Seconds of journal a watcher-detected change is compared against
+
+_inserts_since_prune = 0
+
+
+def record_change(op, path, new_path=None, entry=None):
+    """Appends one change. entry is the row dict from file_ops/events (may be None)."""
+    global _inserts_since_prune
+    db.session.add(ChangeJournalEntry(
+        op=op, path=path, new_path=new_path,
+        is_dir=bool(entry and entry['is_dir']),
+        size=entry['size'] if entry else None,
+        mtime=entry['mtime'] if entry else None,
+    ))
+    db.session.commit()
+
+    _inserts_since_prune += 1
+    if _inserts_since_prune >= PRUNE_EVERY:
+        _inserts_since_prune = 0
+        prune_journal()
+
+
+@contextmanager
+def _journal_lock():
+    """Serializes record_detected_change() across gunicorn workers (no-op without fcntl)."""
+    if fcntl is None:
+        yield
+        return
+    path = current_app.config['JOURNAL_LOCK_FILE']
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _already_journaled(op, path, entry):
+    """True when the latest recent row for path already leaves it in the detected state."""
+    cutoff = datetime.utcnow() - timedelta(seconds=DETECTED_WINDOW)
+    latest = (ChangeJournalEntry.query
+              .filter(ChangeJournalEntry.created_at >= cutoff,
+                      db.or_(ChangeJournalEntry.path == path, ChangeJournalEntry.new_path == path))
+              .order_by(ChangeJournalEntry.seq.desc())
+              .first())
+    if latest is None:
+        return False
+    if latest.op == 'rename':
+        exists = latest.new_path == path
+    else:
+        exists = latest.op != 'remove'
+    if op == 'remove':
+        return not exists
+    return exists and (latest.size, latest.mtime) == (entry['size'], entry['mtime'])
+
+
+def record_detected_change(op, path, entry=None):
+    """
+    Journals a change a directory watcher found ('add', 'modify' or 'remove')
+    unless another worker already did: each worker runs its own watcher, and
+    the worker that made a change journals it through notify_change().
+    Returns True when a row was added.
+    """
+    with _journal_lock():
+        if _already_journaled(op, path, entry):
+            return False
+        record_change(op, path, entry=entry)
+    return True
+
+
+def prune_journal():
+    """Drops entries older than JOURNAL_RETENTION_DAYS."""
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config.get('JOURNAL_RETENTION_DAYS', 30))
+    ChangeJournalEntry.query.filter(ChangeJournalEntry.created_at < cutoff).delete()
+    db.session.commit()
+
+
+def _last_issued():
+    """Highest seq ever handed out; AUTOINCREMENT keeps it in sqlite_sequence after pruning."""
+    try:
+        seq = db.session.execute(db.text('SELECT seq FROM sqlite_sequence WHERE name = :table'),
+                                 {'table': ChangeJournalEntry.__tablename__}).scalar()
+    except Exception:
+        db.session.rollback()  # Not SQLite
+        seq = None
+    if seq is None:
+        seq = db.session.query(db.func.max(ChangeJournalEntry.seq)).scalar()
+    return seq or 0
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _scope_filter(user):
+    """SQL pre-filter on the path prefixes a regular user could possibly see."""
+    clauses = []
+    for root in (get_user_home_rel(user), 'shared'):
+        prefix = _escape_like(root) + '/%'
+        for column in (ChangeJournalEntry.path, ChangeJournalEntry.new_path):
+            clauses.append(column == root)
+            clauses.append(column.like(prefix, escape='\\'))
+    return db.or_(*clauses)
+
+
+def changes_since(user, since, nas_root, limit=1000):
+    """
+    Returns the changes after `since` that `user` may see.
+    Result: {'changes': [...], 'last_seq': int, 'has_more': bool, 'reset': bool}.
+    last_seq advances past filtered-out rows too, so clients always make progress.
+    reset=True means `since` predates the retained journal (or comes from
+    another database) and the client must do a full listing before resuming
+    from last_seq. A 'rescan' change means: list that folder again.
+    """
+    issued = _last_issued()
+    oldest = db.session.query(db.func.min(ChangeJournalEntry.seq)).scalar()
+    first_kept = oldest if oldest is not None else issued + 1  # Pruning may have emptied the journal
+    reset = since < first_kept - 1 or since > issued
+
+    query = ChangeJournalEntry.query.filter(ChangeJournalEntry.seq > since)
+    if user.role != 'admin':
+        query = query.filter(_scope_filter(user))
+    rows = query.order_by(ChangeJournalEntry.seq).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    allowed_dirs = {}
+
+    def allowed_dir(dir_rel):
+        # Authorization is per folder, so it is cached for the whole page
+        if dir_rel not in allowed_dirs:
+            allowed_dirs[dir_rel] = ensure_path_allowed(user, dir_rel, nas_root)[0]
+        return allowed_dirs[dir_rel]
+
+    def allowed(rel_path):
+        # A change is visible to whoever may list the folder it happened in
+        return allowed_dir(posixpath.dirname(rel_path))
+
+    changes = []
+    for row in rows:
+        change = row.to_dict()
+        if row.op == 'rescan':
+            if allowed_dir(row.path):
+                changes.append(change)
+            continue
+        old_ok = allowed(row.path)
+        if row.op == 'rename':
+            new_ok = allowed(row.new_path)
+            if old_ok and not new_ok:
+                change.update(op='remove', new_path=None)
+            elif new_ok and not old_ok:
+                change.update(op='add', path=row.new_path, new_path=None)
+            elif not old_ok:
+                continue
+        elif not old_ok:
+            continue
+        changes.append(change)
+
+    last_seq = rows[-1].seq if has_more else issued
+    return {'changes': changes, 'last_seq': last_seq, 'has_more': has_more, 'reset': reset}
+
+
+class JournalScanner:
+    """
+    Background thread that walks NAS_ROOT every JOURNAL_SCAN_INTERVAL and
+    journals a 'rescan' for each folder whose mtime moved since the previous
+    pass. Only folder mtimes are kept (in JOURNAL_SCAN_STATE, so changes made
+    while the server was down are found by the first pass). Subtrees on an
+    idle disk (spindown.py) keep their old mtimes and are compared once the
+    disk is active again. A lock file keeps gunicorn workers from scanning
+    concurrently.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._scan_lock = None
+        self._dirs = None  # dir_rel -> mtime_ns at the previous pass
+
+    def init_app(self, app):
+        self._app = app
+        if not app.config.get('JOURNAL_SCAN_INTERVAL'):
+            return
+        os.makedirs(os.path.dirname(app.config['JOURNAL_SCAN_STATE']), exist_ok=True)
+        thread = threading.Thread(target=self._loop, name='nas-journal-scan', daemon=True)
+        thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                if self._owns_scan():
+                    with self._app.app_context():
+                        self.scan()
+            except Exception as e:
+                print(f"Journal scan failed: {e}")
+            time.sleep(self._app.config['JOURNAL_SCAN_INTERVAL'])
+
+    def _owns_scan(self):
+        """With several gunicorn workers, only one walks the tree."""
+        if fcntl is None or self._scan_lock is not None:
+            return True
+        lock = open(self._app.config['JOURNAL_SCAN_STATE'] + '.lock', 'w')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return False
+        self._scan_lock = lock  # Held for the life of the process
+        return True
+
+    def _load(self):
+        try:
+            with open(self._app.config['JOURNAL_SCAN_STATE']) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, dirs):
+        path = self._app.config['JOURNAL_SCAN_STATE']
+        with open(path + '.part', 'w') as f:
+            json.dump(dirs, f)
+        os.replace(path + '.part', path)
+
+    def _walk(self, nas_root, previous):
+        """{dir_rel: mtime_ns} for every folder under nas_root; trash folders are skipped."""
+        current = {}
+        stack = ['']
+        while stack:
+            dir_rel = stack.pop()
+            abs_dir = os.path.join(nas_root, dir_rel) if dir_rel else nas_root
+            if spindown.is_idle(abs_dir):
+                prefix = dir_rel + '/'
+                current.update((d, m) for d, m in previous.items()
+                               if not dir_rel or d == dir_rel or d.startswith(prefix))
+                continue
+            try:
+                current[dir_rel] = os.stat(abs_dir).st_mtime_ns  # Before listing: later changes move it again
+                with os.scandir(abs_dir) as it:
+                    for entry in it:
+                        if entry.name != TRASH_DIR_NAME and entry.is_dir(follow_symlinks=False):
+                            stack.append(posixpath.join(dir_rel, entry.name) if dir_rel else entry.name)
+            except OSError:
+                current.pop(dir_rel, None)  # Vanished or unreadable
+        return current
+
+    def scan(self):
+        """One pass. Returns the folders journaled for a rescan."""
+        if self._dirs is None:
+            self._dirs = self._load()
+        previous = self._dirs
+        current = self._walk(os.path.abspath(self._app.config['NAS_ROOT']), previous)
+        changed = sorted(d for d, mtime in current.items() if d in previous and previous[d] != mtime)
+        for dir_rel in changed:
+            record_change('rescan', dir_rel, entry={'is_dir': True, 'size': 0, 'mtime': current[dir_rel] // 10 ** 9})
+        self._dirs = current
+        self._save(current)
+        return changed
+
+
+journal_scanner = JournalScanner()
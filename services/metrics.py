@@ -0,0 +1,346 @@
+"""
+metrics.py
+----------
+Embedded time-series store for NASberryPi.
+Every series keeps its most recent raw points in a fixed-size ring buffer
+(two array('d'), so a series costs a few KiB whatever its history). Points
+are also aggregated per minute (count, sum, min, max); once a minute is
+over it is merged into the 1m, 1h and 1d rollups in a small SQLite file,
+so the coarser resolutions need no separate rollup pass and several
+gunicorn workers can feed the same rows. Each resolution has its own
+retention.
+
+Values come from record() calls (e.g. request latencies) and from sources
+polled every METRICS_SAMPLE_INTERVAL seconds: gauges (disk usage) or
+cumulative counters (bytes transferred). Each worker counts only its own
+transfers, so counters are stored as increments: the rollups add up every
+worker's share and queries divide the total by the bucket length. Their
+min/max are the slowest and busiest minute of the bucket (while the 1m
+rows are retained), which assumes METRICS_SAMPLE_INTERVAL <= 60.
+"""
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+
+from flask import g, request
+
+RESOLUTIONS = {'1m': 60, '1h': 3600, '1d': 86400}
+DEFAULT_RETENTION_DAYS = {'1m': 2, '1h': 90, '1d': 5 * 365}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL DEFAULT 'gauge'  -- 'gauge' or 'counter' (rollups hold increments)
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    series_id INTEGER NOT NULL,
+    resolution INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    PRIMARY KEY (series_id, resolution, ts)
+) WITHOUT ROWID;
+"""
+
+UPSERT = """
+INSERT INTO rollups (series_id, resolution, ts, count, sum, min, max) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (series_id, resolution, ts) DO UPDATE SET
+    count = count + excluded.count,
+    sum = sum + excluded.sum,
+    min = MIN(min, excluded.min),
+    max = MAX(max, excluded.max)
+"""
+
+
+class RingBuffer:
+    """Fixed-capacity (time, value) buffer; the oldest point is overwritten when full."""
+    __slots__ = ('_times', '_values', '_next', '_count')
+
+    def __init__(self, capacity):
+        self._times = array('d', bytes(8 * capacity))
+        self._values = array('d', bytes(8 * capacity))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, value):
+        self._times[self._next] = timestamp
+        self._values[self._next] = value
+        self._next = (self._next + 1) % len(self._times)
+        self._count = min(self._count + 1, len(self._times))
+
+    def items(self, since=0):
+        """[(time, value), ...] oldest first, from `since` on."""
+        capacity = len(self._times)
+        start = (self._next - self._count) % capacity
+        points = []
+        for i in range(self._count):
+            j = (start + i) % capacity
+            if self._times[j] >= since:
+                points.append((self._times[j], self._values[j]))
+        return points
+
+
+class _Series:
+    __slots__ = ('kind', 'ring', 'minute', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, capacity, kind):
+        self.kind = kind
+        self.ring = RingBuffer(capacity)
+        self.minute = None
+        self.count = 0
+        self.sum = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+
+class MetricsStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._series = {}
+        self._series_ids = {}
+        self._closed = []  # Finished minutes waiting for flush(): (name, kind, minute, count, sum, min, max)
+        self._sources = []  # [fn, is_counter, previous values, previous time]
+        self._app = None
+        self._path = None
+        self._raw_points = 360
+        self._last_prune = 0.0
+
+    def init_app(self, app):
+        self._app = app
+        self._path = app.config.get('METRICS_DB')
+        self._raw_points = app.config.get('METRICS_RAW_POINTS', 360)
+        if self._path:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(SCHEMA)
+                if 'kind' not in [row[1] for row in conn.execute('PRAGMA table_info(series)')]:
+                    try:
+                        conn.execute("ALTER TABLE series ADD COLUMN kind TEXT NOT NULL DEFAULT 'gauge'")
+                    except sqlite3.OperationalError:
+                        pass  # Another worker added it first
+        app.before_request(self._start_timer)
+        app.after_request(self._record_latency)
+        thread = threading.Thread(target=self._loop, name='nas-metrics', daemon=True)
+        thread.start()
+
+    def _start_timer(self):
+        g.metrics_started = time.perf_counter()
+
+    def _record_latency(self, response):
+        # Time to build the response; event streams stay open by design and are skipped
+        started = g.pop('metrics_started', None)
+        if started is not None and request.endpoint != 'static' and response.mimetype != 'text/event-stream':
+            self.record('http.request_ms', (time.perf_counter() - started) * 1000)
+        return response
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self._path, timeout=10)
+        try:
+            with conn:  # Commits, or rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    # ── Input ──
+
+    def record(self, name, value, timestamp=None):
+        """Adds one point to a series (created on first use)."""
+        self._add(name, 'gauge', value, value, timestamp)
+
+    def record_counter(self, name, increase, elapsed, timestamp=None):
+        """
+        Adds what a cumulative counter grew by over the last `elapsed` seconds.
+        Raw points hold this worker's rate; the rollups hold the increase.
+        """
+        self._add(name, 'counter', increase / elapsed, increase, timestamp)
+
+    def _add(self, name, kind, raw_value, value, timestamp):
+        timestamp = time.time() if timestamp is None else timestamp
+        minute = int(timestamp // 60 * 60)
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = _Series(self._raw_points, kind)
+            series.ring.append(timestamp, raw_value)
+            if series.minute != minute:
+                self._close_minute(name, series)
+                series.minute = minute
+                series.min = series.max = value
+            series.count += 1
+            series.sum += value
+            series.min = min(series.min, value)
+            series.max = max(series.max, value)
+
+    def _close_minute(self, name, series):
+        if series.count:
+            self._closed.append((name, series.kind, series.minute, series.count, series.sum, series.min, series.max))
+        series.count = 0
+        series.sum = 0.0
+
+    def add_source(self, fn, counters=False):
+        """
+        Registers fn() -> {series name: value}, polled every
+        METRICS_SAMPLE_INTERVAL. With counters=True the values are cumulative
+        totals (of this worker) and are recorded with record_counter().
+        """
+        self._sources.append([fn, counters, None, None])
+
+    def _sample_sources(self):
+        now = time.time()
+        for source in self._sources:
+            fn, counters, previous, previous_at = source
+            try:
+                values = fn()
+            except Exception as e:
+                print(f"Metrics source failed: {e}")
+                continue
+            if counters:
+                source[2], source[3] = values, now
+                if previous is None or now <= previous_at:
+                    continue
+                for name, value in values.items():
+                    self.record_counter(name, max(0, value - previous.get(name, value)), now - previous_at, now)
+                continue
+            for name, value in values.items():
+                if value is not None:
+                    self.record(name, value, now)
+
+    # ── Storage ──
+
+    def _series_id(self, conn, name, kind):
+        series_id = self._series_ids.get(name)
+        if series_id is None:
+            conn.execute('INSERT OR IGNORE INTO series (name, kind) VALUES (?, ?)', (name, kind))
+            series_id, stored = conn.execute('SELECT id, kind FROM series WHERE name = ?', (name,)).fetchone()
+            if stored != kind:
+                # Stored as the other kind by an earlier version: those points mean something else
+                conn.execute('DELETE FROM rollups WHERE series_id = ?', (series_id,))
+                conn.execute('UPDATE series SET kind = ? WHERE id = ?', (kind, series_id))
+            self._series_ids[name] = series_id
+        return series_id
+
+    def flush(self):
+        """Writes every finished minute into the 1m/1h/1d rollups."""
+        current = int(time.time() // 60 * 60)
+        with self._lock:
+            for name, series in self._series.items():
+                if series.minute is not None and series.minute < current:
+                    self._close_minute(name, series)
+                    series.minute = None
+            closed, self._closed = self._closed, []
+        if not closed or not self._path:
+            return
+        try:
+            with self._db_lock, self._connect() as conn:
+                rows = []
+                for name, kind, minute, count, total, low, high in closed:
+                    series_id = self._series_id(conn, name, kind)
+                    for seconds in RESOLUTIONS.values():
+                        rows.append((series_id, seconds, minute - minute % seconds, count, total, low, high))
+                conn.executemany(UPSERT, rows)
+        except sqlite3.Error:
+            self._series_ids.clear()  # Ids inserted by the rolled-back transaction are gone
+            with self._lock:
+                self._closed[:0] = closed  # Retried on the next flush (e.g. database was locked)
+            raise
+
+    def prune(self):
+        """Drops rollups older than their resolution's retention."""
+        self._last_prune = time.monotonic()
+        if not self._path:
+            return
+        retention = dict(DEFAULT_RETENTION_DAYS, **self._app.config.get('METRICS_RETENTION_DAYS', {}))
+        now = time.time()
+        with self._db_lock, self._connect() as conn:
+            for label, seconds in RESOLUTIONS.items():
+                conn.execute('DELETE FROM rollups WHERE resolution = ? AND ts < ?',
+                             (seconds, now - retention[label] * 86400))
+
+    def _loop(self):
+        last_flush = time.monotonic()
+        while True:
+            time.sleep(self._app.config.get('METRICS_SAMPLE_INTERVAL', 60))
+            self._sample_sources()
+            try:
+                if time.monotonic() - last_flush >= self._app.config.get('METRICS_FLUSH_INTERVAL', 60):
+                    last_flush = time.monotonic()
+                    self.flush()
+                if time.monotonic() - self._last_prune >= 86400:
+                    self.prune()
+            except sqlite3.Error as e:
+                print(f"Metrics flush failed: {e}")
+
+    # ── Queries ──
+
+    def series_names(self):
+        names = set(self._series)
+        if self._path:
+            with self._connect() as conn:
+                names.update(row[0] for row in conn.execute('SELECT name FROM series'))
+        return sorted(names)
+
+    def query(self, name, resolution='1h', since=0, until=None):
+        """
+        Points of a series at a resolution ('raw', '1m', '1h' or '1d'):
+        raw gives [{'t', 'value'}], rollups [{'t', 'avg', 'min', 'max', 'count'}].
+        """
+        if resolution == 'raw':
+            with self._lock:
+                series = self._series.get(name)
+                points = series.ring.items(since) if series else []
+            return [{'t': t, 'value': v} for t, v in points if until is None or t <= until]
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f'Unknown resolution: {resolution}')
+        if not self._path:
+            return []
+        try:
+            self.flush()  # Include the minutes that finished since the last periodic flush
+        except sqlite3.Error:
+            pass  # Kept for the next flush; answer from what is stored
+        seconds = RESOLUTIONS[resolution]
+        until = until if until is not None else time.time()
+        with self._connect() as conn:
+            row = conn.execute('SELECT id, kind FROM series WHERE name = ?', (name,)).fetchone()
+            if row is None:
+                return []
+            series_id, kind = row
+            rows = conn.execute(
+                'SELECT ts, count, sum, min, max FROM rollups '
+                'WHERE series_id = ? AND resolution = ? AND ts >= ? AND ts <= ? ORDER BY ts',
+                (series_id, seconds, since, until)).fetchall()
+            if kind != 'counter':
+                return [{'t': ts, 'avg': total / count, 'min': low, 'max': high, 'count': count}
+                        for ts, count, total, low, high in rows]
+
+            # Counters: increments of all workers over the bucket's length
+            minutes = {}
+            if seconds > 60 and rows:
+                minutes = {ts: (low, high) for ts, low, high in conn.execute(
+                    'SELECT ts - ts % ?, MIN(sum), MAX(sum) FROM rollups '
+                    'WHERE series_id = ? AND resolution = 60 AND ts >= ? AND ts <= ? GROUP BY 1',
+                    (seconds, series_id, rows[0][0], until))}
+        current_minute = int(time.time() // 60 * 60)  # The minute in progress is not flushed yet
+        points = []
+        for ts, count, total, low, high in rows:
+            span = min(seconds, max(60, current_minute - ts))
+            rate = total / span
+            low, high = minutes.get(ts, (None, None)) if seconds > 60 else (total, total)
+            points.append({'t': ts, 'avg': rate, 'count': count,
+                           'min': low / 60 if low is not None else rate,
+                           'max': high / 60 if high is not None else rate})
+        return points
+
+
+metrics = MetricsStore()
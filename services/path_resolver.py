@@ -0,0 +1,120 @@
+"""
+path_resolver.py
+----------------
+Symlink-safe resolution of user-supplied paths for NASberryPi.
+A path is walked one component at a time from a directory descriptor held
+on NAS_ROOT (fstatat-style, so nothing is re-parsed from the filesystem
+root). A symlink is followed only when its target stays inside NAS_ROOT;
+otherwise the whole path is refused.
+
+Every resolution lstats each component again: a folder swapped for a
+symlink outside the app is caught by the next request, with no cached
+verdict to outlive it. Within a request, each path is resolved once and
+the same ResolvedPath is reused by the access check, the route and the
+file operation; notify_change() drops that memo after a rename or delete.
+"""
+import os
+import posixpath
+import stat
+import threading
+
+from flask import g, has_request_context
+
+
+class ResolvedPath:
+    """
+    A path under a root: rel (normalized, as typed), abs (root + rel, what
+    operations use, so a symlink itself is renamed or deleted rather than its
+    target) and real / real_rel (every symlink resolved; what access is
+    checked against).
+    """
+    __slots__ = ('rel', 'abs', 'real', 'real_rel')
+
+    def __init__(self, rel, abs_path, real, real_rel):
+        self.rel = rel
+        self.abs = abs_path
+        self.real = real
+        self.real_rel = real_rel
+
+    def __repr__(self):
+        return f'ResolvedPath({self.rel!r})'
+
+
+class PathResolver:
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.root_real = os.path.realpath(self.root)
+        try:
+            self._root_fd = os.open(self.root_real, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+        except OSError:
+            self._root_fd = None  # Root not created yet: fall back to absolute paths
+
+    def _lstat(self, real_rel):
+        if self._root_fd is not None:
+            return os.stat(real_rel, dir_fd=self._root_fd, follow_symlinks=False)
+        return os.lstat(os.path.join(self.root_real, real_rel))
+
+    def _inside(self, real_abs):
+        return real_abs == self.root_real or real_abs.startswith(self.root_real.rstrip(os.sep) + os.sep)
+
+    def resolve(self, rel_path):
+        """Returns a ResolvedPath, or None if the path escapes the root (via '..' or a symlink)."""
+        rel = posixpath.normpath((rel_path or '').replace('\\', '/').strip('/'))
+        if rel == '.':
+            return ResolvedPath('', self.root, self.root_real, '')
+        if rel == '..' or rel.startswith('../'):
+            return None
+
+        parts = rel.split('/')
+        real_rel = ''
+        for i, name in enumerate(parts):
+            child = posixpath.join(real_rel, name)
+            try:
+                st = self._lstat(child)
+            except (FileNotFoundError, NotADirectoryError):
+                # Not created yet (upload target, new folder): nothing further can be a symlink
+                real_rel = posixpath.join(child, *parts[i + 1:])
+                break
+            if stat.S_ISLNK(st.st_mode):
+                target = os.path.realpath(os.path.join(self.root_real, child))
+                if not self._inside(target):
+                    return None
+                child = os.path.relpath(target, self.root_real).replace('\\', '/')
+                child = '' if child == '.' else child
+            real_rel = child
+
+        return ResolvedPath(rel, os.path.join(self.root, rel), os.path.join(self.root_real, real_rel), real_rel)
+
+
+_resolvers = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_resolver(root):
+    key = os.path.abspath(root)
+    resolver = _resolvers.get(key)
+    if resolver is None:
+        with _resolvers_lock:
+            resolver = _resolvers.setdefault(key, PathResolver(key))
+    return resolver
+
+
+def resolve_path(root, rel_path):
+    """
+    Resolves rel_path under root, memoized for the current request so the
+    access check, the route and the file operation share one ResolvedPath.
+    """
+    resolver = get_resolver(root)
+    if not has_request_context():
+        return resolver.resolve(rel_path)
+    memo = g.setdefault('_resolved_paths', {})
+    key = (resolver.root, rel_path)
+    if key not in memo:
+        memo[key] = resolver.resolve(rel_path)
+    return memo[key]
+
+
+def invalidate_path(rel_path):
+    """Called when rel_path was renamed, removed or replaced during the current request."""
+    if has_request_context():
+        g.pop('_resolved_paths', None)
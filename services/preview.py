@@ -0,0 +1,136 @@
+"""
+preview.py
+----------
+Text previews for NASberryPi.
+The head, a byte window, or the last N lines of a file are read through a
+memory map of just the part that is needed, so previewing a multi-gigabyte
+log costs the same as previewing a small one. follow() yields whatever is
+appended to a growing file, for the "tail -f" event stream.
+"""
+import mmap
+import os
+import time
+
+SNIFF_BYTES = 8192
+
+
+def _map_window(f, start, end):
+    """Maps [start, end) of an open file. Returns (mmap, base) where base is the mapped offset."""
+    base = start - start % mmap.ALLOCATIONGRANULARITY  # mmap offsets must be aligned
+    return mmap.mmap(f.fileno(), end - base, access=mmap.ACCESS_READ, offset=base), base
+
+
+def _result(data, offset, size):
+    return {
+        'offset': offset,
+        'end': offset + len(data),
+        'size': size,
+        'text': data.decode('utf-8', errors='replace'),
+    }
+
+
+def is_binary(abs_path):
+    """Heuristic used by grep and git: a NUL byte in the first few KiB means binary."""
+    with open(abs_path, 'rb') as f:
+        return b'\0' in f.read(SNIFF_BYTES)
+
+
+def read_head(abs_path, lines, max_bytes):
+    """The first `lines` lines (at most max_bytes)."""
+    with open(abs_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        end = min(size, max_bytes)
+        if not end:
+            return _result(b'', 0, size)
+        mm, _ = _map_window(f, 0, end)
+        with mm:
+            pos = 0
+            for _ in range(lines):
+                newline = mm.find(b'\n', pos, end)
+                if newline < 0:
+                    pos = end
+                    break
+                pos = newline + 1
+            return _result(mm[:pos], 0, size)
+
+
+def read_range(abs_path, offset, length):
+    """length bytes starting at offset (clamped to the file)."""
+    with open(abs_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        offset = min(max(0, offset), size)
+        end = min(size, offset + max(0, length))
+        if end <= offset:
+            return _result(b'', offset, size)
+        mm, base = _map_window(f, offset, end)
+        with mm:
+            return _result(mm[offset - base:end - base], offset, size)
+
+
+def read_tail(abs_path, lines, max_bytes):
+    """The last `lines` lines (at most max_bytes), starting on a line boundary."""
+    with open(abs_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        start = max(0, size - max_bytes)
+        if size == start:
+            return _result(b'', size, size)
+        mm, base = _map_window(f, start, size)
+        with mm:
+            lo, hi = start - base, size - base
+            pos = hi - 1 if mm[hi - 1:hi] == b'\n' else hi  # A trailing newline ends the last line
+            found = 0
+            while found < lines:
+                newline = mm.rfind(b'\n', lo, pos)
+                if newline < 0:
+                    break
+                pos = newline
+                found += 1
+            if found == lines:
+                first = pos + 1
+            elif start == 0:
+                first = lo  # The whole file has fewer lines than asked for
+            else:
+                # The byte window starts mid-line: drop that partial line
+                newline = mm.find(b'\n', lo, hi)
+                first = newline + 1 if newline >= 0 else lo
+            return _result(mm[first:hi], base + first, size)
+
+
+def follow(abs_path, position, poll_interval, max_chunk, deadline):
+    """
+    Yields ('append', result) for whole lines appended after `position`,
+    ('reset', result) when the file shrank or was replaced (log rotation),
+    and ('idle', None) on every poll without news, until `deadline` (monotonic).
+    """
+    f = open(abs_path, 'rb')
+    try:
+        while time.monotonic() < deadline:
+            st = os.fstat(f.fileno())
+            if st.st_size < position:
+                position = 0
+                yield 'reset', _result(b'', 0, st.st_size)
+            if st.st_size > position:
+                data = os.pread(f.fileno(), min(st.st_size - position, max_chunk), position)
+                # Only send whole lines: an unterminated line waits for its newline,
+                # unless it already fills max_chunk
+                cut = data.rfind(b'\n') + 1
+                if cut or len(data) >= max_chunk:
+                    data = data[:cut or len(data)]
+                    yield 'append', _result(data, position, st.st_size)
+                    position += len(data)
+                    continue
+
+            try:
+                current = os.stat(abs_path)
+            except FileNotFoundError:
+                current = None  # Rotated away; the new file may not exist yet
+            if current is not None and (current.st_dev, current.st_ino) != (st.st_dev, st.st_ino):
+                f.close()
+                f = open(abs_path, 'rb')
+                position = 0
+                yield 'reset', _result(b'', 0, current.st_size)
+                continue
+            yield 'idle', None
+            time.sleep(poll_interval)
+    finally:
+        f.close()
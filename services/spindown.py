@@ -0,0 +1,224 @@
+"""
+spindown.py
+-----------
+Spin-down awareness for NASberryPi.
+Archive HDDs spin up whenever a folder listing misses the kernel's inode
+cache. With SPINDOWN_AWARE set, a background thread maps the mounts under
+NAS_ROOT to their disks and, for rotational ones, watches the I/O counters
+in /proc/diskstats and /sys/block/<disk>/device/state. A disk whose counters
+have not moved for SPINDOWN_IDLE_SECONDS (or that is not 'running') counts
+as idle: folder listings on it are answered from the last listing the app
+made, and the hourly home scans and the folder watcher leave it alone.
+Opening a file still reads the disk, which makes it active again.
+
+Every listing is stored with the disk's read/write counters as they were
+just before the folder was read, and is only served while they are
+unchanged: any I/O since then (a file created outside the app while the
+disk was active, in a folder nobody watches) makes the next listing live.
+Listings are also dropped when the app changes something (notify_change()).
+A change still in the page cache is not counted until it is written back,
+so it can stay unseen for up to the kernel's writeback delay (~30 s).
+"""
+import os
+import posixpath
+import threading
+import time
+from collections import OrderedDict
+
+
+DISKSTATS_PATH = '/proc/diskstats'
+
+
+def _disk_activity(name):
+    """(reads, writes) completed by a disk so far, or None if /proc/diskstats does not list it."""
+    try:
+        with open(DISKSTATS_PATH) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 8 and fields[2] == name:
+                    return int(fields[3]), int(fields[7])
+    except OSError:
+        pass
+    return None
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
+
+class SpinDownGuard:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._app = None
+        self.enabled = False
+        self._mounts = []   # [(mount point, disk name, rotational)], longest mount point first
+        self._disks = {}    # disk name -> {'activity', 'changed', 'state'} for rotational disks
+        self._listings = OrderedDict()  # rel dir -> (disk activity when listed, [entry, ...]); LRU
+
+    def init_app(self, app):
+        self._app = app
+        if not app.config.get('SPINDOWN_AWARE') or not os.path.exists(DISKSTATS_PATH):
+            return
+        self.enabled = True
+        thread = threading.Thread(target=self._loop, name='nas-spindown', daemon=True)
+        thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Spin-down check failed: {e}")
+            time.sleep(self._app.config.get('SPINDOWN_CHECK_INTERVAL', 10))
+
+    def sample(self):
+        """Refreshes the mount -> disk map and the activity of every rotational disk."""
+        from disk_manager.core import get_all_disks  # Imported late: the blueprint imports the services
+        from disk_manager.diskstats import parse_diskstats
+
+        mounts = []
+        for disk in get_all_disks():
+            name = os.path.basename(disk.id)
+            for mount_point in disk.mount_points:
+                if mount_point.startswith('/'):
+                    mounts.append((os.path.normpath(mount_point), name, disk.is_rotational))
+        mounts.sort(key=lambda m: len(m[0]), reverse=True)
+
+        counters = parse_diskstats()
+        now = time.monotonic()
+        disks = {}
+        for _, name, rotational in mounts:
+            if not rotational or name in disks:
+                continue
+            c = counters.get(name)
+            activity = (c[0], c[3]) if c else None  # Reads and writes completed
+            previous = self._disks.get(name)
+            changed = previous['changed'] if previous and previous['activity'] == activity else now
+            disks[name] = {'activity': activity, 'changed': changed,
+                           'state': _read(f'/sys/block/{name}/device/state')}
+        with self._lock:
+            self._mounts = mounts
+            self._disks = disks
+
+    def _disk_for(self, abs_path):
+        """Rotational disk holding abs_path, or None."""
+        abs_path = os.path.normpath(abs_path)
+        for mount_point, name, rotational in self._mounts:
+            if abs_path == mount_point or abs_path.startswith(mount_point.rstrip('/') + '/'):
+                return name if rotational else None
+        return None
+
+    def _idle(self, name):
+        info = self._disks.get(name)
+        if info is None:
+            return False
+        if info['state'] not in ('', 'running'):
+            return True  # offline / blocked: do not send it requests
+        return time.monotonic() - info['changed'] >= self._app.config.get('SPINDOWN_IDLE_SECONDS', 120)
+
+    def is_idle(self, abs_path):
+        """True when abs_path is on a rotational disk that has been idle long enough to be left alone."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            name = self._disk_for(abs_path)
+            return name is not None and self._idle(name)
+
+    # ── Listing snapshot ──
+
+    def _key(self, abs_path):
+        rel = os.path.relpath(abs_path, self._app.config['NAS_ROOT']).replace('\\', '/')
+        return '' if rel == '.' else rel
+
+    def activity(self, abs_path):
+        """
+        Current I/O counters of the rotational disk holding abs_path (None if
+        there is none). Read them before listing a folder, for remember_listing().
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            name = self._disk_for(abs_path)
+        return _disk_activity(name) if name else None
+
+    def cached_listing(self, abs_path):
+        """The remembered entries of a folder on an idle, untouched disk, or None to list it live."""
+        if not self.is_idle(abs_path):
+            return None
+        key = self._key(abs_path)
+        with self._lock:
+            name = self._disk_for(abs_path)
+            remembered = self._listings.get(key)
+        if remembered is None or _disk_activity(name) != remembered[0]:
+            return None  # Never listed, or the disk did I/O since: the folder may have changed
+        with self._lock:
+            if key in self._listings:
+                self._listings.move_to_end(key)
+        return [dict(e) for e in remembered[1]]  # Callers reformat the entries in place
+
+    def remember_listing(self, abs_path, entries, activity):
+        """
+        Keeps a live listing of a folder on a rotational disk for when the disk
+        is idle. activity is what activity() returned before the folder was read.
+        """
+        if not self.enabled or activity is None:
+            return
+        limit = self._app.config.get('SPINDOWN_SNAPSHOT_DIRS', 10000)
+        with self._lock:
+            if self._disk_for(abs_path) is None:
+                return
+            key = self._key(abs_path)
+            self._listings[key] = (activity, [dict(e) for e in entries])
+            self._listings.move_to_end(key)
+            while len(self._listings) > limit:
+                self._listings.popitem(last=False)
+
+    def invalidate(self, rel_path):
+        """Forgets the listings of rel_path, everything below it and its parent folder."""
+        if not self.enabled:
+            return
+        rel_path = rel_path.strip('/')
+        prefix = rel_path + '/'
+        parent = posixpath.dirname(rel_path)
+        with self._lock:
+            for key in [k for k in self._listings
+                        if k == rel_path or k == parent or k.startswith(prefix) or not rel_path]:
+                del self._listings[key]
+
+    def status(self):
+        """Rotational disks holding part of NAS_ROOT: the subtrees on them and whether they are idle."""
+        nas_root = os.path.normpath(self._app.config['NAS_ROOT'])
+        disks = {}
+        with self._lock:
+            now = time.monotonic()
+            # The mount NAS_ROOT itself lives on (mounts are sorted longest first)
+            root_mount = next((m for m in self._mounts
+                               if nas_root == m[0] or nas_root.startswith(m[0].rstrip('/') + '/')), None)
+            for mount in self._mounts:
+                mount_point, name, rotational = mount
+                if not rotational:
+                    continue
+                if mount_point.startswith(nas_root.rstrip('/') + '/'):
+                    subtree = os.path.relpath(mount_point, nas_root).replace('\\', '/')
+                elif mount == root_mount:
+                    subtree = ''
+                else:
+                    continue
+                info = self._disks.get(name, {})
+                entry = disks.setdefault(name, {
+                    'disk': name,
+                    'subtrees': [],
+                    'idle': self._idle(name),
+                    'idle_seconds': round(now - info['changed']) if info else None,
+                    'device_state': info.get('state') or None,
+                })
+                entry['subtrees'].append(subtree)
+            snapshot_dirs = len(self._listings)
+        return {'enabled': self.enabled, 'snapshot_dirs': snapshot_dirs, 'disks': list(disks.values())}
+
+
+spindown = SpinDownGuard()
@@ -0,0 +1,339 @@
+"""
+transfers.py
+------------
+Bandwidth shaping and admission control for NASberryPi downloads and uploads.
+Every transfer draws from two token buckets: its user's and a global one.
+The global rate is split between the users that currently have transfers
+running, in proportion to their role's weight, so one user streaming
+several large files cannot starve everybody else. Rates of 0 mean unlimited.
+Buckets are per process, so the limits assume a single server worker.
+
+Before it starts, a transfer must also get one of TRANSFER_MAX_ACTIVE slots
+(at most TRANSFER_MAX_PER_USER per user). Transfers that cannot start wait
+in a bounded FIFO queue; when the queue is full, or the wait times out, the
+request is turned away with 503 and a Retry-After header. Slots are
+counted per process too.
+"""
+import itertools
+import threading
+import time
+from collections import deque
+
+from flask import g, jsonify, request, session
+
+WAIT_SAMPLES = 200  # Recent queue waits kept for the admin metrics
+
+UPLOAD_ENDPOINTS = {'file_action', 'delta_patch'}
+
+
+class TokenBucket:
+    """
+    Classic token bucket in "debt" form: reserve() always succeeds and
+    returns how long the caller has to wait before using the bytes.
+    """
+
+    def __init__(self, rate, burst):
+        self._lock = threading.Lock()
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._stamp = time.monotonic()
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def reserve(self, amount):
+        with self._lock:
+            if self.rate <= 0:
+                return 0.0
+            self._refill()
+            self._tokens -= amount
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class Transfer:
+    __slots__ = ('id', 'username', 'direction', 'path', 'bytes', 'started')
+
+    def __init__(self, transfer_id, username, direction, path):
+        self.id = transfer_id
+        self.username = username
+        self.direction = direction
+        self.path = path
+        self.bytes = 0
+        self.started = time.monotonic()
+
+    def to_dict(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return {
+            'id': self.id,
+            'username': self.username,
+            'direction': self.direction,
+            'path': self.path,
+            'bytes': self.bytes,
+            'seconds': round(elapsed, 1),
+            'rate': int(self.bytes / elapsed),
+        }
+
+
+class TransferRejected(Exception):
+    """Raised when a transfer cannot be admitted; served as 503 with Retry-After."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _UserShare:
+    __slots__ = ('bucket', 'weight', 'transfers')
+
+    def __init__(self, burst, weight):
+        self.bucket = TokenBucket(0, burst)
+        self.weight = weight
+        self.transfers = {}
+
+
+class ThrottledIterable:
+    """Wraps a response body; every chunk is paid for before it is sent."""
+
+    def __init__(self, iterable, scheduler, transfer):
+        self._iterable = iterable
+        self._scheduler = scheduler
+        self.transfer = transfer
+
+    def __iter__(self):
+        for chunk in self._iterable:
+            self._scheduler.throttle(self.transfer, len(chunk))
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self._iterable, 'close'):
+                self._iterable.close()
+        finally:
+            self._scheduler.finish(self.transfer)
+
+
+class ThrottledInput:
+    """Wraps wsgi.input so request bodies are read (and acknowledged by TCP) at the shaped rate."""
+
+    def __init__(self, stream, scheduler, transfer):
+        self._stream = stream
+        self._scheduler = scheduler
+        self.transfer = transfer
+
+    def read(self, size=-1):
+        data = self._stream.read(size)
+        self._scheduler.throttle(self.transfer, len(data))
+        return data
+
+    def readline(self, size=-1):
+        data = self._stream.readline(size)
+        self._scheduler.throttle(self.transfer, len(data))
+        return data
+
+    def readlines(self, hint=-1):
+        return list(iter(self.readline, b''))
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+
+class TransferScheduler:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._users = {}
+        self._app = None
+        self._global = TokenBucket(0, 0)
+        self._waiting = []  # Queued (ticket, username), oldest first
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self._stats = {'admitted': 0, 'queued': 0, 'rejected': 0, 'timed_out': 0, 'max_queue_depth': 0}
+        self._bytes = {'download': 0, 'upload': 0}  # Totals since start, for the metrics store
+
+    def init_app(self, app):
+        self._app = app
+        rate = app.config.get('TRANSFER_GLOBAL_RATE', 0)
+        self._global = TokenBucket(rate, self._burst(rate))
+        app.before_request(self._shape_upload)
+        app.teardown_request(self._finish_upload)
+        app.register_error_handler(TransferRejected, self._rejected)
+
+    def _rejected(self, e):
+        response = jsonify({'status': 'error', 'message': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+
+    def _burst(self, rate):
+        # Enough for a few chunks, so shaping stays smooth without long stalls
+        return max(rate * self._app.config.get('TRANSFER_BURST_SECONDS', 0.25), 256 * 1024)
+
+    def _weight(self, role):
+        weights = self._app.config.get('TRANSFER_ROLE_WEIGHTS', {})
+        return max(weights.get(role, 1), 1e-3)
+
+    def _active_count(self, username=None):
+        if username is not None:
+            share = self._users.get(username)
+            return len(share.transfers) if share else 0
+        return sum(len(share.transfers) for share in self._users.values())
+
+    def _has_slot(self, username):
+        config = self._app.config
+        max_active = config.get('TRANSFER_MAX_ACTIVE', 0)
+        max_per_user = config.get('TRANSFER_MAX_PER_USER', 0)
+        return ((not max_active or self._active_count() < max_active)
+                and (not max_per_user or self._active_count(username) < max_per_user))
+
+    def _admit(self, username):
+        """Waits (with self._cond held) until username may start a transfer."""
+        config = self._app.config
+        retry_after = config.get('TRANSFER_RETRY_AFTER', 5)
+        if not self._waiting and self._has_slot(username):
+            self._stats['admitted'] += 1
+            return
+
+        if len(self._waiting) >= config.get('TRANSFER_QUEUE_SIZE', 16):
+            self._stats['rejected'] += 1
+            raise TransferRejected('Too many transfers in progress, try again later.', retry_after)
+
+        ticket = (next(self._ids), username)
+        self._waiting.append(ticket)
+        self._stats['queued'] += 1
+        self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], len(self._waiting))
+        started = time.monotonic()
+
+        def my_turn():
+            # First come, first served among the waiters that could start now, so
+            # a user at their own limit does not hold up everybody queued behind
+            eligible = next((t for t in self._waiting if self._has_slot(t[1])), None)
+            return eligible == ticket
+
+        try:
+            if not self._cond.wait_for(my_turn, config.get('TRANSFER_QUEUE_TIMEOUT', 20)):
+                self._stats['timed_out'] += 1
+                raise TransferRejected('Timed out waiting for a transfer slot.', retry_after)
+        finally:
+            self._waiting.remove(ticket)
+            self._cond.notify_all()
+        self._waits.append(time.monotonic() - started)
+        self._stats['admitted'] += 1
+
+    def start(self, username, role, direction, path):
+        """
+        Admits and registers a transfer, rebalancing the shares. Pair with
+        finish(). Raises TransferRejected when no slot frees up in time.
+        """
+        transfer = Transfer(next(self._ids), username, direction, path)
+        with self._cond:
+            self._admit(username)
+            share = self._users.get(username)
+            if share is None:
+                share = self._users[username] = _UserShare(self._burst(0), self._weight(role))
+            share.transfers[transfer.id] = transfer
+            self._rebalance()
+        return transfer
+
+    def finish(self, transfer):
+        with self._cond:
+            share = self._users.get(transfer.username)
+            if share is None or share.transfers.pop(transfer.id, None) is None:
+                return
+            if not share.transfers:
+                del self._users[transfer.username]
+            self._rebalance()
+            self._cond.notify_all()
+
+    def _rebalance(self):
+        global_rate = self._app.config.get('TRANSFER_GLOBAL_RATE', 0)
+        user_limit = self._app.config.get('TRANSFER_USER_RATE', 0)
+        total_weight = sum(share.weight for share in self._users.values())
+        for share in self._users.values():
+            fair = global_rate * share.weight / total_weight if global_rate else 0
+            limits = [r for r in (fair, user_limit) if r]
+            rate = int(min(limits)) if limits else 0
+            share.bucket.burst = self._burst(rate)
+            share.bucket.set_rate(rate)
+
+    def throttle(self, transfer, amount):
+        """Blocks until `amount` bytes of `transfer` may move."""
+        if not amount:
+            return
+        transfer.bytes += amount
+        self._bytes[transfer.direction] += amount
+        share = self._users.get(transfer.username)
+        if share is not None:
+            delay = share.bucket.reserve(amount)
+            if delay:
+                time.sleep(delay)
+        delay = self._global.reserve(amount)
+        if delay:
+            time.sleep(delay)
+
+    def wrap_response(self, response, username, role, path):
+        """Shapes a download response (also disables sendfile, which would bypass shaping)."""
+        if response.status_code not in (200, 206):
+            return response
+        try:
+            transfer = self.start(username, role, 'download', path)
+        except TransferRejected:
+            response.close()
+            raise
+        response.response = ThrottledIterable(response.response, self, transfer)
+        return response
+
+    def _shape_upload(self):
+        if request.endpoint not in UPLOAD_ENDPOINTS or request.method != 'POST':
+            return
+        if 'username' not in session or not request.content_length:
+            return
+        if request.endpoint == 'file_action' and request.mimetype != 'multipart/form-data':
+            return  # Plain form posts (rename, create folder...) are not transfers
+        transfer = self.start(session['username'], session.get('role'), 'upload', request.path)
+        request.environ['wsgi.input'] = ThrottledInput(request.environ['wsgi.input'], self, transfer)
+        g.upload_transfer = transfer
+
+    def _finish_upload(self, exc=None):
+        transfer = g.pop('upload_transfer', None)
+        if transfer is not None:
+            self.finish(transfer)
+
+    def byte_counters(self):
+        """Bytes moved since start per direction (a metrics counter source)."""
+        return {f'transfers.{direction}_bps': total for direction, total in self._bytes.items()}
+
+    def snapshot(self):
+        """Current allocations and admission metrics, for the admin view."""
+        with self._cond:
+            users = [{
+                'username': username,
+                'weight': share.weight,
+                'rate_limit': share.bucket.rate,
+                'transfers': [t.to_dict() for t in share.transfers.values()],
+            } for username, share in sorted(self._users.items())]
+            waits = sorted(self._waits)
+            admission = dict(self._stats,
+                             active=self._active_count(),
+                             queue_depth=len(self._waiting),
+                             max_active=self._app.config.get('TRANSFER_MAX_ACTIVE', 0),
+                             max_per_user=self._app.config.get('TRANSFER_MAX_PER_USER', 0),
+                             wait_avg=round(sum(waits) / len(waits), 3) if waits else 0,
+                             wait_p95=round(waits[int(len(waits) * 0.95)], 3) if waits else 0,
+                             wait_max=round(waits[-1], 3) if waits else 0)
+        return {
+            'global_rate_limit': self._global.rate,
+            'user_rate_limit': self._app.config.get('TRANSFER_USER_RATE', 0),
+            'users': users,
+            'admission': admission,
+        }
+
+
+transfers = TransferScheduler()
@@ -0,0 +1,225 @@
+"""
+trash.py
+--------
+Recoverable deletes for NASberryPi.
+Deleting an item is a single os.rename into a per-user .trash folder on the
+same filesystem, so it is instant regardless of the size of the tree.
+A rate-limited background purger reclaims the space later, while the
+server is idle.
+"""
+import fcntl
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from models import db, TrashItem
+from services.events import notify_change
+from services.jobs import remove_tree
+from utils import TRASH_DIR_NAME, safe_join
+
+
+class _PurgeInterrupted(Exception):
+    """Raised by the purger's throttle when requests resume; the item is finished later."""
+
+
+def _trash_root_for(nas_root, abs_path):
+    """
+    Returns the highest directory under nas_root that shares abs_path's filesystem.
+    Keeping the trash there guarantees the move is a same-device rename.
+    """
+    dev = os.lstat(abs_path).st_dev
+    root = os.path.dirname(abs_path)
+    while root != nas_root and os.lstat(os.path.dirname(root)).st_dev == dev:
+        root = os.path.dirname(root)
+    return root
+
+
+def move_to_trash(user, rel_path, nas_root):
+    """
+    Moves rel_path (relative to nas_root) into the user's trash.
+    Raises ValueError/OSError on failure. Returns the TrashItem.
+    """
+    nas_root = os.path.abspath(nas_root)
+    abs_path = safe_join(nas_root, rel_path)
+    if not abs_path or abs_path == nas_root:
+        raise ValueError('Invalid path.')
+    if not os.path.lexists(abs_path):
+        raise FileNotFoundError(f'"{rel_path}" does not exist.')
+
+    user_trash = os.path.join(_trash_root_for(nas_root, abs_path), TRASH_DIR_NAME, user.username)
+    os.makedirs(user_trash, exist_ok=True)
+
+    item = TrashItem(user_id=user.id, name=os.path.basename(abs_path),
+                     original_path=os.path.relpath(abs_path, nas_root).replace('\\', '/'),
+                     is_dir=os.path.isdir(abs_path) and not os.path.islink(abs_path))
+    db.session.add(item)
+    db.session.flush()  # Assigns item.id, used to keep trash names unique
+
+    target = os.path.join(user_trash, f'{item.id}-{item.name}')
+    try:
+        os.rename(abs_path, target)
+    except OSError:
+        db.session.rollback()
+        raise
+
+    item.trash_path = os.path.relpath(target, nas_root).replace('\\', '/')
+    db.session.commit()
+    notify_change('remove', item.original_path)
+    return item
+
+
+def restore_item(item, nas_root):
+    """
+    Moves a trashed item back to its original location. If that name is taken
+    again, a ' (restored)' suffix is added. Returns the restored relative path.
+    """
+    nas_root = os.path.abspath(nas_root)
+    source = safe_join(nas_root, item.trash_path)
+    if not source or not os.path.lexists(source):
+        raise FileNotFoundError('The trashed item no longer exists.')
+
+    target = safe_join(nas_root, item.original_path)
+    if not target:
+        raise ValueError('Invalid original path.')
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    stem, ext = os.path.splitext(target) if not item.is_dir else (target, '')
+    counter = 1
+    while os.path.lexists(target):
+        suffix = ' (restored)' if counter == 1 else f' (restored {counter})'
+        target = f'{stem}{suffix}{ext}'
+        counter += 1
+
+    os.rename(source, target)
+    db.session.delete(item)
+    db.session.commit()
+    restored = os.path.relpath(target, nas_root).replace('\\', '/')
+    notify_change('add', restored)
+    return restored
+
+
+def find_item(user, item_id):
+    """The user's trashed item with this id (a string from a form), or None; never another user's."""
+    item_id = str(item_id or '')
+    item = db.session.get(TrashItem, int(item_id)) if item_id.isdigit() else None
+    if item is None or item.user_id != user.id or item.purge_requested:
+        return None
+    return item
+
+
+def request_purge(items):
+    """Hides items from the trash listing and lets the background purger remove them."""
+    for item in items:
+        item.purge_requested = True
+    db.session.commit()
+
+
+class TrashPurger:
+    """
+    Background thread that permanently removes expired or purge-requested items.
+    It only works while no requests have arrived for TRASH_IDLE_SECONDS and
+    removes at most TRASH_PURGE_RATE entries per second, so it never competes
+    with interactive traffic for the disk. Every gunicorn worker stamps the
+    mtime of TRASH_ACTIVITY_FILE on requests, so idleness is judged for the
+    whole server rather than for one worker. A lock file keeps workers from
+    purging concurrently.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._activity_file = None
+        self._last_request = time.time()
+        self._last_stamp = 0.0
+
+    def init_app(self, app):
+        self._app = app
+        self._activity_file = app.config.get('TRASH_ACTIVITY_FILE')
+        if self._activity_file:
+            os.makedirs(os.path.dirname(self._activity_file), exist_ok=True)
+        self.touch()
+        app.before_request(self.touch)
+        thread = threading.Thread(target=self._loop, name='nas-trash-purger', daemon=True)
+        thread.start()
+
+    def touch(self):
+        now = time.time()
+        self._last_request = now
+        if self._activity_file and now - self._last_stamp >= 1:  # One utime per second is plenty
+            self._last_stamp = now
+            try:
+                with open(self._activity_file, 'a'):
+                    os.utime(self._activity_file)
+            except OSError:
+                pass
+
+    def _last_activity(self):
+        """Time of the latest request seen by any worker (this worker's own if the file is unusable)."""
+        try:
+            return max(self._last_request, os.stat(self._activity_file).st_mtime)
+        except (OSError, TypeError):
+            return self._last_request
+
+    def _is_idle(self):
+        return time.time() - self._last_activity() >= self._app.config.get('TRASH_IDLE_SECONDS', 30)
+
+    def _loop(self):
+        while True:
+            time.sleep(self._app.config.get('TRASH_PURGE_INTERVAL', 60))
+            if not self._is_idle():
+                continue
+            try:
+                with self._app.app_context():
+                    self.purge_once()
+            except Exception as e:
+                print(f"Trash purge failed: {e}")
+
+    def purge_once(self):
+        """Runs one purge pass. Returns the number of items fully removed."""
+        nas_root = os.path.abspath(self._app.config['NAS_ROOT'])
+        lock_dir = os.path.join(nas_root, TRASH_DIR_NAME)
+        os.makedirs(lock_dir, exist_ok=True)
+
+        with open(os.path.join(lock_dir, '.purge.lock'), 'w') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0  # Another worker is already purging
+
+            cutoff = datetime.utcnow() - timedelta(days=self._app.config.get('TRASH_RETENTION_DAYS', 30))
+            due = (TrashItem.query
+                   .filter((TrashItem.purge_requested == True) | (TrashItem.deleted_at < cutoff))  # noqa: E712
+                   .order_by(TrashItem.purge_requested.desc(), TrashItem.deleted_at)
+                   .all())
+
+            purged = 0
+            for item in due:
+                path = safe_join(nas_root, item.trash_path) if item.trash_path else None
+                try:
+                    if path and os.path.lexists(path):
+                        remove_tree(path, self._throttle())
+                except _PurgeInterrupted:
+                    break
+                db.session.delete(item)
+                db.session.commit()
+                purged += 1
+            return purged
+
+    def _throttle(self):
+        rate = max(1, self._app.config.get('TRASH_PURGE_RATE', 200))
+        interval = 1.0 / rate
+        state = {'next': time.monotonic()}
+
+        def on_item():
+            if not self._is_idle():
+                raise _PurgeInterrupted()
+            state['next'] += interval
+            delay = state['next'] - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                state['next'] = time.monotonic()
+        return on_item
+
+
+trash_purger = TrashPurger()
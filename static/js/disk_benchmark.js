@@ -0,0 +1,114 @@
+// Storage benchmarks: starts a disk_benchmark job on a mounted filesystem,
+// follows it through /api/jobs/<id> and lists the stored results per disk
+// (grouped by serial number) so runs can be compared over time.
+
+document.addEventListener('DOMContentLoaded', function () {
+    const panel = document.getElementById('benchmark-panel');
+    if (!panel) return;
+
+    const mountSelect = document.getElementById('benchmark-mount');
+    const runButton = document.getElementById('benchmark-run');
+    const status = document.getElementById('benchmark-status');
+
+    runButton.addEventListener('click', start);
+    loadMounts();
+    loadResults();
+
+    function loadMounts() {
+        fetch('/api/disks')
+            .then(response => response.json())
+            .then(data => {
+                mountSelect.innerHTML = '';
+                data.disks.forEach(disk => {
+                    const mounts = disk.mount_points.map(m => ({ mount: m, fs: disk.filesystem }))
+                        .concat(disk.partitions.filter(p => p.mount_point).map(p => ({ mount: p.mount_point, fs: p.filesystem })));
+                    mounts.forEach(m => {
+                        const option = document.createElement('option');
+                        option.value = m.mount;
+                        option.textContent = `${m.mount} (${disk.name}${m.fs ? ', ' + m.fs : ''})`;
+                        mountSelect.appendChild(option);
+                    });
+                });
+                runButton.disabled = mountSelect.options.length === 0;
+            })
+            .catch(error => console.error('Error loading mount points:', error));
+    }
+
+    function start() {
+        runButton.disabled = true;
+        fetch('/api/disks/benchmark', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ mount_point: mountSelect.value })
+        })
+            .then(response => response.json().then(data => ({ ok: response.ok, data })))
+            .then(({ ok, data }) => {
+                if (!ok) {
+                    status.innerHTML = `<p class="text-danger">${escapeText(data.message)}</p>`;
+                    runButton.disabled = false;
+                    return;
+                }
+                follow(data.id);
+            })
+            .catch(error => {
+                console.error('Error starting benchmark:', error);
+                runButton.disabled = false;
+            });
+    }
+
+    function follow(jobId) {
+        fetch(`/api/jobs/${jobId}`)
+            .then(response => response.json())
+            .then(job => {
+                const active = job.status === 'queued' || job.status === 'running';
+                const percent = job.progress_total ? job.progress_done / job.progress_total * 100 : 0;
+                status.innerHTML = `<p>${escapeText(job.message || job.status)}</p>` + (active
+                    ? `<div class="job-progress"><div class="job-progress-bar" style="width: ${percent}%;"></div></div>`
+                    : '');
+                if (active) {
+                    setTimeout(() => follow(jobId), 1000);
+                } else {
+                    runButton.disabled = false;
+                    loadResults();
+                }
+            })
+            .catch(error => console.error('Error polling benchmark:', error));
+    }
+
+    function loadResults() {
+        fetch('/api/disks/benchmarks')
+            .then(response => response.json())
+            .then(data => renderResults(data.disks))
+            .catch(error => console.error('Error loading benchmark results:', error));
+    }
+
+    function renderResults(disks) {
+        const container = document.getElementById('benchmark-results');
+        if (disks.length === 0) {
+            container.innerHTML = '<p>No benchmarks have been run yet.</p>';
+            return;
+        }
+        container.innerHTML = disks.map(disk => `
+            <h4 style="margin: 1rem 0 0.5rem;">${escapeText(disk.disk_name)} <small class="text-muted">${escapeText(disk.disk_key)}</small></h4>
+            <table>
+                <thead><tr>
+                    <th>Date</th><th>Mount</th><th>Seq. read</th><th>Seq. write</th>
+                    <th>4K IOPS (r / w)</th><th>fsync (avg / p99)</th>
+                </tr></thead>
+                <tbody>${disk.runs.map(run => `<tr>
+                    <td>${new Date(run.created_at + 'Z').toLocaleString()}</td>
+                    <td><code>${escapeText(run.mount_point)}</code>${run.filesystem ? ' ' + escapeText(run.filesystem) : ''}</td>
+                    <td>${formatBytes(run.seq_read_bps, 1)}/s</td>
+                    <td>${formatBytes(run.seq_write_bps, 1)}/s</td>
+                    <td>${run.rand_read_iops.toFixed(0)} / ${run.rand_write_iops.toFixed(0)}</td>
+                    <td>${run.fsync_avg_ms.toFixed(2)} / ${run.fsync_p99_ms.toFixed(2)} ms</td>
+                </tr>`).join('')}</tbody>
+            </table>`).join('');
+    }
+
+    function escapeText(text) {
+        const div = document.createElement('div');
+        div.textContent = text || '';
+        return div.innerHTML;
+    }
+});
@@ -86,6 +86,7 @@ function renderDisks(disks) {
 
                 let title = `${part.name} (${part.filesystem})`;
                 if (part.mount_point) title += ` Mounted at: ${part.mount_point}`;
+                if (part.usage) title += ` Used: ${formatBytes(part.usage.used_bytes)} of ${formatBytes(part.usage.total_bytes)}`;
                 partDiv.title = title;
 
                 partDiv.innerHTML = `<span>${part.name}</span><span>${formatBytes(part.size_bytes)}</span>`;
@@ -115,10 +116,41 @@ function renderDisks(disks) {
         }
 
         diskDiv.appendChild(barContainer);
+        diskDiv.appendChild(renderUsage(disk));
         container.appendChild(diskDiv);
     });
 }
 
+function renderUsage(disk) {
+    // One line per mounted filesystem: space and inode usage from statvfs
+    const mounts = [];
+    if (disk.usage) mounts.push({ mount_point: disk.mount_points[0], usage: disk.usage });
+    (disk.partitions || []).forEach(part => {
+        if (part.mount_point) mounts.push({ mount_point: part.mount_point, usage: part.usage });
+    });
+
+    const list = document.createElement('div');
+    list.style.marginTop = '8px';
+    list.style.fontSize = '0.85rem';
+    mounts.forEach(m => {
+        const line = document.createElement('div');
+        if (!m.usage) {
+            line.innerHTML = `<code>${m.mount_point}</code> <span class="text-muted">usage unavailable (mount not responding)</span>`;
+        } else {
+            const u = m.usage;
+            const percent = u.total_bytes ? (u.used_bytes / u.total_bytes * 100) : 0;
+            let text = `<code>${m.mount_point}</code> ${formatBytes(u.used_bytes)} used, ${formatBytes(u.free_bytes)} free (${percent.toFixed(1)}%)`;
+            if (u.total_inodes) {
+                text += ` &middot; inodes ${(u.used_inodes / u.total_inodes * 100).toFixed(1)}% used`;
+            }
+            if (u.stale) text += ' <span class="text-muted">(stale)</span>';
+            line.innerHTML = text;
+        }
+        list.appendChild(line);
+    });
+    return list;
+}
+
 function getFsColor(fs) {
     if (!fs || fs === 'Unknown') return '#6c757d'; // gray
     switch (fs.toLowerCase()) {
@@ -131,9 +163,71 @@ function getFsColor(fs) {
     }
 }
 
+let raidTimer = null;
+
 function renderRaids(raids) {
     const container = document.getElementById('raid-list');
-    container.innerHTML = '<p>RAID management is read-only and currently disabled in this deployment.</p>';
+    if (!raids || raids.length === 0) {
+        container.innerHTML = '<p>No software RAID (md) arrays found.</p>';
+        return;
+    }
+    container.innerHTML = '';
+    raids.forEach(raid => {
+        const div = document.createElement('div');
+        div.className = 'disk-item';
+        div.style.marginBottom = '20px';
+        div.style.padding = '15px';
+        div.style.border = '1px solid #ddd';
+        div.style.borderRadius = '5px';
+
+        const badge = (cls, color, text) => `<span class="badge ${cls}" style="background:${color}; color:#fff; padding:2px 6px; border-radius:4px; font-size:0.8rem; margin-left:10px;">${text}</span>`;
+        let status;
+        if (raid.state === 'inactive') status = badge('badge-secondary', '#6c757d', 'Inactive');
+        else if (raid.degraded > 0) status = badge('badge-danger', '#dc3545', `Degraded (${raid.active_disks}/${raid.raid_disks})`);
+        else status = badge('badge-success', '#28a745', 'Healthy');
+
+        const members = raid.members.map(m => {
+            const color = m.state === 'faulty' ? '#dc3545' : m.state === 'rebuilding' ? '#fd7e14' : m.state === 'spare' ? '#6c757d' : '#28a745';
+            return `<span style="display: inline-block; margin: 0 0.5rem 0.25rem 0;">
+                <code>${m.name}</code> <small style="color: ${color};">${m.state.replace('_', ' ')}${m.slot !== null ? ' #' + m.slot : ''}</small>
+            </span>`;
+        }).join('');
+
+        let sync = '';
+        if (raid.sync_action !== 'idle') {
+            const details = [];
+            if (raid.sync_speed_kbps) details.push(`${formatBytes(raid.sync_speed_kbps * 1024, 1)}/s`);
+            if (raid.sync_eta_seconds !== null) details.push(`${formatDuration(raid.sync_eta_seconds)} left`);
+            const percent = raid.sync_progress !== null ? raid.sync_progress : 0;
+            sync = `<div style="margin-top: 0.5rem;">
+                <small><strong>${raid.sync_action}</strong> ${raid.sync_progress !== null ? percent.toFixed(1) + '%' : '(waiting)'} ${details.join(', ')}</small>
+                <div style="background: #e0e0e0; border-radius: 4px; height: 8px; margin-top: 0.25rem;">
+                    <div style="background: #fd7e14; width: ${percent}%; height: 100%; border-radius: 4px;"></div>
+                </div>
+            </div>`;
+        }
+
+        div.innerHTML = `<div><strong>${raid.name}</strong> - ${raid.level || 'unknown level'}, ${formatBytes(raid.size_bytes)} <small class="text-muted">${raid.state}</small> ${status}</div>
+            <div style="margin-top: 0.5rem;">${members}</div>${sync}`;
+        container.appendChild(div);
+    });
+
+    // Follow resyncs and rebuilds live
+    clearTimeout(raidTimer);
+    if (raids.some(r => r.sync_action !== 'idle')) {
+        raidTimer = setTimeout(() => {
+            fetch('/api/raids')
+                .then(response => response.json())
+                .then(data => renderRaids(data.raids))
+                .catch(error => console.error('Error loading RAID status:', error));
+        }, 5000);
+    }
+}
+
+function formatDuration(seconds) {
+    const hours = Math.floor(seconds / 3600);
+    const minutes = Math.round((seconds % 3600) / 60);
+    return hours ? `${hours} h ${minutes} min` : `${minutes} min`;
 }
 
 function updateRaidCandidateList(disks) {
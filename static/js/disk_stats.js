@@ -0,0 +1,174 @@
+// Disk activity: current rates per disk and SVG charts for the selected one.
+// Data comes from /api/disks/stats (sampled from /proc/diskstats on the server).
+
+document.addEventListener('DOMContentLoaded', function () {
+    const panel = document.getElementById('stats-panel');
+    if (!panel) return;
+
+    const deviceSelect = document.getElementById('stats-device');
+    const rangeSelect = document.getElementById('stats-range');
+    const historyHours = (parseInt(panel.dataset.historyDays, 10) || 7) * 24;
+    let refreshTimer = null;
+    let interval = 5;
+    let historyStep = 300;
+
+    deviceSelect.addEventListener('change', loadSeries);
+    rangeSelect.addEventListener('change', () => { loadSeries(); schedule(); });
+
+    loadCurrent().then(() => { loadSeries(); schedule(); });
+
+    function schedule() {
+        clearInterval(refreshTimer);
+        const seconds = rangeSelect.value === 'history' ? historyStep : interval;
+        refreshTimer = setInterval(() => { loadCurrent(); loadSeries(); }, Math.max(seconds, 1) * 1000);
+    }
+
+    function loadCurrent() {
+        return fetch('/api/disks/stats')
+            .then(response => response.json())
+            .then(data => {
+                interval = data.interval || interval;
+                historyStep = data.history_step || historyStep;
+                if (!data.available) {
+                    document.getElementById('stats-current').innerHTML =
+                        '<p>Disk statistics are only available on Linux (/proc/diskstats).</p>';
+                    clearInterval(refreshTimer);
+                    return;
+                }
+                updateDeviceList(Object.keys(data.devices));
+                renderCurrent(data.devices);
+            })
+            .catch(error => console.error('Error loading disk statistics:', error));
+    }
+
+    function updateDeviceList(names) {
+        const selected = deviceSelect.value;
+        const current = Array.from(deviceSelect.options).map(o => o.value);
+        if (current.join() === names.join()) return;
+        deviceSelect.innerHTML = '';
+        names.forEach(name => {
+            const option = document.createElement('option');
+            option.value = name;
+            option.textContent = name;
+            deviceSelect.appendChild(option);
+        });
+        if (names.includes(selected)) deviceSelect.value = selected;
+    }
+
+    function renderCurrent(devices) {
+        const container = document.getElementById('stats-current');
+        const names = Object.keys(devices);
+        if (names.length === 0) {
+            container.innerHTML = '<p>Collecting the first samples...</p>';
+            return;
+        }
+        const rows = names.map(name => {
+            const d = devices[name];
+            return `<tr>
+                <td>${name}</td>
+                <td>${formatRate(d.read_bps)}</td>
+                <td>${formatRate(d.write_bps)}</td>
+                <td>${d.read_iops.toFixed(1)} / ${d.write_iops.toFixed(1)}</td>
+                <td>${d.await_ms.toFixed(1)} ms</td>
+                <td>${utilBar(d.util)}</td>
+            </tr>`;
+        });
+        container.innerHTML = `<table>
+            <thead><tr>
+                <th>Disk</th><th>Read</th><th>Write</th><th>IOPS (r / w)</th><th>Avg latency</th><th style="width: 180px;">Utilization</th>
+            </tr></thead>
+            <tbody>${rows.join('')}</tbody>
+        </table>`;
+    }
+
+    function loadSeries() {
+        const device = deviceSelect.value;
+        const charts = document.getElementById('stats-charts');
+        if (!device) {
+            charts.innerHTML = '';
+            return;
+        }
+        let url = `/api/disks/stats/${encodeURIComponent(device)}`;
+        if (rangeSelect.value === 'history') url += `?range=history&hours=${historyHours}`;
+        fetch(url)
+            .then(response => response.json())
+            .then(data => renderCharts(charts, data))
+            .catch(error => console.error('Error loading disk statistics:', error));
+    }
+
+    function renderCharts(container, data) {
+        const column = name => {
+            const i = data.fields.indexOf(name);
+            return data.points.map(p => p[i]);
+        };
+        const times = column('time');
+        container.innerHTML = '';
+        if (times.length < 2) {
+            container.innerHTML = '<p>Not enough samples yet.</p>';
+            return;
+        }
+        container.appendChild(chart('Throughput', times, [
+            { label: 'Read', color: '#007bff', values: column('read_bps') },
+            { label: 'Write', color: '#fd7e14', values: column('write_bps') }
+        ], formatRate));
+        container.appendChild(chart('IOPS', times, [
+            { label: 'Read', color: '#007bff', values: column('read_iops') },
+            { label: 'Write', color: '#fd7e14', values: column('write_iops') }
+        ], v => v.toFixed(0)));
+        container.appendChild(chart('Average latency', times, [
+            { label: 'Await', color: '#6610f2', values: column('await_ms') }
+        ], v => `${v.toFixed(1)} ms`));
+        container.appendChild(chart('Utilization', times, [
+            { label: 'Busy', color: '#dc3545', values: column('util') }
+        ], v => `${v.toFixed(0)}%`, 100));
+    }
+
+    function chart(title, times, series, format, fixedMax) {
+        const width = 400, height = 140, pad = 4;
+        const max = fixedMax || Math.max(1e-9, ...series.flatMap(s => s.values));
+        const t0 = times[0], span = Math.max(1, times[times.length - 1] - t0);
+        const x = t => pad + (t - t0) / span * (width - 2 * pad);
+        const y = v => height - pad - v / max * (height - 2 * pad);
+
+        const lines = series.map(s => {
+            const points = s.values.map((v, i) => `${x(times[i]).toFixed(1)},${y(v).toFixed(1)}`).join(' ');
+            return `<polyline points="${points}" fill="none" stroke="${s.color}" stroke-width="1.5" vector-effect="non-scaling-stroke"/>`;
+        }).join('');
+        const legend = series.map(s =>
+            `<span style="color: ${s.color}; margin-right: 10px;">&#9632; ${s.label} ${format(s.values[s.values.length - 1])}</span>`
+        ).join('');
+
+        const div = document.createElement('div');
+        div.innerHTML = `
+            <div style="display: flex; justify-content: space-between; font-size: 0.85rem;">
+                <strong>${title}</strong><span class="text-muted">max ${format(max)}</span>
+            </div>
+            <svg viewBox="0 0 ${width} ${height}" preserveAspectRatio="none"
+                 style="width: 100%; height: ${height}px; background: #f8f9fa; border: 1px solid #ddd; border-radius: 4px;">
+                ${lines}
+            </svg>
+            <div style="display: flex; justify-content: space-between; font-size: 0.75rem; color: #6c757d;">
+                <span>${formatTime(t0)}</span><span>${legend}</span><span>${formatTime(times[times.length - 1])}</span>
+            </div>`;
+        return div;
+    }
+
+    function formatRate(bytesPerSecond) {
+        return bytesPerSecond ? `${formatBytes(bytesPerSecond, 1)}/s` : '0 B/s';
+    }
+
+    function formatTime(seconds) {
+        const date = new Date(seconds * 1000);
+        return rangeSelect.value === 'history'
+            ? date.toLocaleDateString([], { month: 'short', day: 'numeric' }) + ' ' + date.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })
+            : date.toLocaleTimeString();
+    }
+
+    function utilBar(util) {
+        const color = util > 80 ? '#dc3545' : util > 50 ? '#ffc107' : '#28a745';
+        return `<div style="background: #e0e0e0; border-radius: 4px; height: 14px; position: relative;">
+            <div style="background: ${color}; width: ${util}%; height: 100%; border-radius: 4px;"></div>
+            <small style="position: absolute; top: -2px; left: 6px;">${util.toFixed(0)}%</small>
+        </div>`;
+    }
+});
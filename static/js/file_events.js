@@ -0,0 +1,130 @@
+// Live updates for the file browser: subscribes to change events for the
+// folder being shown (SSE, or long-polling where EventSource is missing)
+// and patches the table rows in place instead of reloading the page.
+document.addEventListener('DOMContentLoaded', function () {
+    const table = document.getElementById('fileTable');
+    if (table) {
+        subscribeToFolder(table);
+    }
+});
+
+function subscribeToFolder(table) {
+    const eventsUrl = table.dataset.eventsUrl;
+
+    if (window.EventSource) {
+        const source = new EventSource(eventsUrl);
+        source.addEventListener('change', e => applyFileEvent(table, JSON.parse(e.data)));
+        source.addEventListener('reset', () => resyncListing(table));
+        return;
+    }
+
+    // Long-poll fallback
+    let lastId = '';
+    function poll() {
+        const url = eventsUrl + '?mode=poll' + (lastId ? '&since=' + encodeURIComponent(lastId) : '');
+        fetch(url)
+            .then(response => response.json())
+            .then(data => {
+                if (data.reset && lastId) {
+                    resyncListing(table);
+                }
+                (data.events || []).forEach(ev => applyFileEvent(table, ev));
+                lastId = data.last_id;
+                poll();
+            })
+            .catch(() => setTimeout(poll, 5000));
+    }
+    poll();
+}
+
+function applyFileEvent(table, ev) {
+    if (ev.op === 'remove') {
+        removeFileRow(table, ev.name);
+    } else if (ev.op === 'rename') {
+        removeFileRow(table, ev.name);
+        if (ev.entry) upsertFileRow(table, ev.entry);
+    } else if (ev.entry) {
+        upsertFileRow(table, ev.entry);
+    }
+}
+
+function findFileRow(table, name) {
+    return Array.from(table.querySelectorAll('tbody tr.file-row')).find(tr => tr.dataset.name === name);
+}
+
+function formatFileSize(entry) {
+    return entry.is_dir ? '-' : (entry.size / (1024 * 1024)).toFixed(2) + ' MB';
+}
+
+function removeFileRow(table, name) {
+    const row = findFileRow(table, name);
+    if (row) row.remove();
+    if (!table.querySelector('tbody tr.file-row') && !document.getElementById('emptyFolderRow')) {
+        const empty = document.createElement('tr');
+        empty.id = 'emptyFolderRow';
+        empty.innerHTML = '<td colspan="5" style="text-align: center; color: #6c757d;">Folder is empty</td>';
+        table.querySelector('tbody').appendChild(empty);
+    }
+}
+
+function upsertFileRow(table, entry) {
+    const existing = findFileRow(table, entry.name);
+    if (existing && (existing.dataset.dir === '1') === entry.is_dir) {
+        existing.querySelector('.file-size').textContent = formatFileSize(entry);
+        return;
+    }
+    if (existing) existing.remove();
+
+    const row = document.getElementById('fileRowTemplate').content.querySelector('tr').cloneNode(true);
+    row.dataset.name = entry.name;
+    row.dataset.dir = entry.is_dir ? '1' : '0';
+    row.querySelector('.select-item').value = entry.path;
+    row.querySelector('input[name="item_name"]').value = entry.name;
+    row.querySelector('.file-size').textContent = formatFileSize(entry);
+
+    const encodedPath = entry.path.split('/').map(encodeURIComponent).join('/');
+    const link = row.querySelector('.file-link');
+    link.textContent = entry.name;
+    link.href = table.dataset.filesUrl + '/' + encodedPath;
+    if (entry.is_dir) {
+        row.querySelectorAll('.file-only').forEach(el => el.remove());
+    } else {
+        link.target = '_blank';
+        row.querySelector('.file-icon').className = 'fas fa-file file-icon file-icon-default';
+        row.querySelectorAll('.dir-only').forEach(el => el.remove());
+        row.querySelector('.preview-link').href = table.dataset.previewUrl.replace('__path__', encodedPath);
+    }
+
+    // Keep the server's ordering: folders first, then case-insensitive by name
+    const key = r => (r.dataset.dir === '1' ? '0' : '1') + r.dataset.name.toLowerCase();
+    const rowKey = key(row);
+    const next = Array.from(table.querySelectorAll('tbody tr.file-row')).find(tr => key(tr) > rowKey);
+    const tbody = table.querySelector('tbody');
+    if (next) {
+        tbody.insertBefore(row, next);
+    } else {
+        tbody.appendChild(row);
+    }
+
+    const empty = document.getElementById('emptyFolderRow');
+    if (empty) empty.remove();
+}
+
+function resyncListing(table) {
+    fetch(table.dataset.listUrl, { headers: { 'Accept': 'application/json' } })
+        .then(response => response.json())
+        .then(listing => {
+            const names = new Set(listing.names);
+            table.querySelectorAll('tbody tr.file-row').forEach(tr => {
+                if (!names.has(tr.dataset.name)) removeFileRow(table, tr.dataset.name);
+            });
+            listing.names.forEach((name, i) => upsertFileRow(table, {
+                name: name,
+                is_dir: listing.types[i] === 'd',
+                size: listing.sizes[i],
+                mtime: listing.mtimes[i],
+                path: listing.path ? listing.path + '/' + name : name,
+            }));
+        })
+        .catch(error => console.error('Error resyncing listing:', error));
+}
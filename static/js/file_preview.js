@@ -0,0 +1,64 @@
+// Text preview page: loads the head or tail of a file through the preview
+// API and, with "Follow" checked, appends new lines as they are written
+// (tail -f over Server-Sent Events).
+let followSource = null;
+
+document.addEventListener('DOMContentLoaded', function () {
+    if (document.getElementById('previewCard')) {
+        loadPreview('tail');
+    }
+});
+
+function previewInfo(data) {
+    const mb = (data.size / (1024 * 1024)).toFixed(2);
+    document.getElementById('previewInfo').textContent =
+        'Up to byte ' + data.end + ' of ' + data.size + ' (' + mb + ' MB)';
+}
+
+function loadPreview(mode) {
+    const card = document.getElementById('previewCard');
+    const lines = document.getElementById('previewLines').value;
+    const pre = document.getElementById('previewText');
+    fetch(card.dataset.previewUrl + '?mode=' + mode + '&lines=' + encodeURIComponent(lines))
+        .then(response => response.json())
+        .then(data => {
+            if (data.binary) {
+                pre.textContent = 'This looks like a binary file; download it instead.';
+                return;
+            }
+            pre.textContent = data.text;
+            previewInfo(data);
+            card.dataset.end = data.end;
+            const follow = document.getElementById('previewFollow');
+            if (mode === 'tail') {
+                pre.scrollTop = pre.scrollHeight;
+                toggleFollow(follow.checked);
+            } else {
+                // Following only makes sense from the end of the file
+                follow.checked = false;
+                toggleFollow(false);
+            }
+        });
+}
+
+function toggleFollow(enabled) {
+    const card = document.getElementById('previewCard');
+    if (followSource) {
+        followSource.close();
+        followSource = null;
+    }
+    if (!enabled || !window.EventSource) return;
+
+    const pre = document.getElementById('previewText');
+    followSource = new EventSource(card.dataset.tailUrl + '?from=' + (card.dataset.end || ''));
+    followSource.addEventListener('append', e => {
+        const data = JSON.parse(e.data);
+        const atBottom = pre.scrollTop + pre.clientHeight >= pre.scrollHeight - 5;
+        pre.textContent += data.text;
+        previewInfo(data);
+        if (atBottom) pre.scrollTop = pre.scrollHeight;
+    });
+    followSource.addEventListener('reset', () => {
+        pre.textContent = '';
+    });
+}
@@ -0,0 +1,93 @@
+// Background jobs panel: shows the current user's recent jobs and polls
+// while any of them are still queued or running.
+const JOBS_POLL_MS = 2000;
+let jobsTimer = null;
+
+document.addEventListener('DOMContentLoaded', function () {
+    if (document.getElementById('jobs-panel')) {
+        loadJobs();
+    }
+});
+
+function loadJobs() {
+    fetch('/api/jobs', { headers: { 'Accept': 'application/json' } })
+        .then(response => response.ok ? response.json() : { jobs: [] })
+        .then(data => {
+            renderJobs(data.jobs || []);
+            const active = (data.jobs || []).some(j => j.status === 'queued' || j.status === 'running');
+            clearTimeout(jobsTimer);
+            if (active) {
+                jobsTimer = setTimeout(loadJobs, JOBS_POLL_MS);
+            }
+        })
+        .catch(error => console.error('Error loading jobs:', error));
+}
+
+function renderJobs(jobs) {
+    const panel = document.getElementById('jobs-panel');
+    const list = document.getElementById('jobs-list');
+
+    // Only show active jobs plus anything that finished in the last few minutes
+    const cutoff = Date.now() - 5 * 60 * 1000;
+    const visible = jobs.filter(j =>
+        j.status === 'queued' || j.status === 'running' ||
+        (j.finished_at && Date.parse(j.finished_at + 'Z') > cutoff));
+
+    if (visible.length === 0) {
+        panel.style.display = 'none';
+        return;
+    }
+    panel.style.display = 'block';
+    list.innerHTML = '';
+
+    visible.forEach(job => {
+        const item = document.createElement('div');
+        item.className = 'job-item';
+
+        const target = job.params.path || job.params.src || job.params.mount_point || '';
+        const title = document.createElement('div');
+        title.innerHTML = `<strong>${job.kind}</strong> <span>${escapeHtml(target)}</span>`;
+        item.appendChild(title);
+
+        const status = document.createElement('div');
+        status.className = job.status === 'failed' ? 'job-failed' : (job.status === 'done' ? 'job-done' : '');
+        status.textContent = job.message || job.status;
+        item.appendChild(status);
+
+        if (job.status === 'queued' || job.status === 'running') {
+            const bar = document.createElement('div');
+            bar.className = 'job-progress';
+            const fill = document.createElement('div');
+            fill.className = 'job-progress-bar';
+            if (job.progress_total > 0) {
+                fill.style.width = Math.min(100, (job.progress_done / job.progress_total) * 100) + '%';
+            } else {
+                fill.classList.add('indeterminate');
+            }
+            bar.appendChild(fill);
+            item.appendChild(bar);
+
+            if (!job.cancel_requested) {
+                const cancel = document.createElement('button');
+                cancel.className = 'btn btn-sm btn-danger';
+                cancel.style.marginTop = '0.35rem';
+                cancel.textContent = 'Cancel';
+                cancel.onclick = () => cancelJob(job.id);
+                item.appendChild(cancel);
+            }
+        }
+        list.appendChild(item);
+    });
+}
+
+function cancelJob(jobId) {
+    fetch(`/api/jobs/${jobId}/cancel`, { method: 'POST' })
+        .then(() => loadJobs())
+        .catch(error => console.error('Error cancelling job:', error));
+}
+
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
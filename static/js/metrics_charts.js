@@ -0,0 +1,64 @@
+// Small history charts for the dashboard. Every .metric-chart element names a
+// series of the metrics store (data-series, data-resolution, data-hours) and
+// is filled with an SVG area chart of the average, with the max as a thin line.
+
+document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('.metric-chart').forEach(loadChart);
+});
+
+function loadChart(el) {
+    const params = new URLSearchParams({
+        resolution: el.dataset.resolution || '1h',
+        hours: el.dataset.hours || '24'
+    });
+    fetch(`/api/metrics/${el.dataset.series}?${params}`)
+        .then(response => response.ok ? response.json() : { points: [] })
+        .then(data => drawMetricChart(el, data.points))
+        .catch(error => console.error('Error loading metrics:', error));
+}
+
+function formatMetric(value, unit) {
+    if (unit === 'B/s') {
+        const units = ['B/s', 'KiB/s', 'MiB/s', 'GiB/s'];
+        let i = 0;
+        while (value >= 1024 && i < units.length - 1) {
+            value /= 1024;
+            i++;
+        }
+        return `${value.toFixed(1)} ${units[i]}`;
+    }
+    return `${value.toFixed(value < 10 ? 1 : 0)}${unit === '%' ? '%' : ' ' + (unit || '')}`;
+}
+
+function drawMetricChart(el, points) {
+    const unit = el.dataset.unit;
+    const title = `<div style="display: flex; justify-content: space-between; font-size: 0.85rem;">
+        <strong>${el.dataset.title || el.dataset.series}</strong>
+        <span style="color: #6c757d;">${points.length ? 'now ' + formatMetric(points[points.length - 1].avg, unit) : ''}</span>
+    </div>`;
+    if (points.length < 2) {
+        el.innerHTML = title + '<p style="color: #6c757d; font-size: 0.85rem;">Not enough history yet.</p>';
+        return;
+    }
+
+    const width = 400, height = 100;
+    const max = unit === '%' ? 100 : Math.max(1e-9, ...points.map(p => p.max));
+    const t0 = points[0].t, span = Math.max(1, points[points.length - 1].t - t0);
+    const x = t => ((t - t0) / span * width).toFixed(1);
+    const y = v => (height - v / max * height).toFixed(1);
+
+    const avg = points.map(p => `${x(p.t)},${y(p.avg)}`).join(' ');
+    const peaks = points.map(p => `${x(p.t)},${y(p.max)}`).join(' ');
+    const start = new Date(t0 * 1000).toLocaleString([], { month: 'short', day: 'numeric', hour: '2-digit', minute: '2-digit' });
+
+    el.innerHTML = `${title}
+        <svg viewBox="0 0 ${width} ${height}" preserveAspectRatio="none"
+             style="width: 100%; height: ${height}px; background: #f8f9fa; border: 1px solid #ddd; border-radius: 4px;">
+            <polygon points="0,${height} ${avg} ${width},${height}" fill="var(--primary-color)" fill-opacity="0.2"/>
+            <polyline points="${avg}" fill="none" stroke="var(--primary-color)" stroke-width="1.5" vector-effect="non-scaling-stroke"/>
+            <polyline points="${peaks}" fill="none" stroke="#dc3545" stroke-width="0.75" stroke-opacity="0.6" vector-effect="non-scaling-stroke"/>
+        </svg>
+        <div style="display: flex; justify-content: space-between; font-size: 0.75rem; color: #6c757d;">
+            <span>${start}</span><span>max ${formatMetric(max, unit)}</span>
+        </div>`;
+}
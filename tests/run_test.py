@@ -4,14 +4,17 @@ import os
 # Add the project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from disk_manager.core import get_all_disks
+from disk_manager.core import configure, get_all_disks
 import json
 
-def test_run():
-    print("Testing get_all_disks()...")
+def test_run(mock=False):
+    """Prints get_all_disks(); mock='linux' or 'windows' replays the fixtures in the project root."""
+    configure({'MOCK_HARDWARE': mock, 'DISK_STATS_INTERVAL': 0})
+    print(f"Testing get_all_disks() ({'replaying ' + mock + ' fixtures' if mock else 'this machine'})...")
     disks = get_all_disks()
     out = [d.to_dict() for d in disks]
     print(json.dumps(out, indent=2))
 
 if __name__ == "__main__":
-    test_run()
+    # python tests/run_test.py [linux|windows]
+    test_run(sys.argv[1] if len(sys.argv) > 1 else False)
@@ -0,0 +1,57 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from collections import namedtuple
+
+import pytest
+
+from disk_manager import benchmark
+from disk_manager.benchmark import MIN_FILE_SIZE, SEQ_CHUNK, STAGES, benchmark_file_size, run_benchmark
+
+Usage = namedtuple('Usage', 'total used free')
+GB = 1024 ** 3
+
+
+@pytest.fixture
+def free_space(monkeypatch):
+    def set_free(free):
+        monkeypatch.setattr(benchmark.shutil, 'disk_usage', lambda path: Usage(free * 2, free, free))
+    return set_free
+
+
+def test_requested_size_when_there_is_room(free_space):
+    free_space(100 * GB)
+    assert benchmark_file_size('/mnt', 256 * 1024 * 1024) == 256 * 1024 * 1024
+
+
+def test_capped_at_a_share_of_free_space(free_space):
+    free_space(GB + 12345)
+    size = benchmark_file_size('/mnt', 256 * 1024 * 1024)
+    assert size <= (GB + 12345) * benchmark.MAX_FREE_FRACTION
+    assert size % SEQ_CHUNK == 0 and size > (GB + 12345) * benchmark.MAX_FREE_FRACTION - SEQ_CHUNK
+
+
+def test_refused_when_nearly_full(free_space):
+    free_space(int(MIN_FILE_SIZE / benchmark.MAX_FREE_FRACTION) - 1)
+    with pytest.raises(ValueError, match='Not enough free space'):
+        benchmark_file_size('/mnt', 256 * 1024 * 1024)
+
+
+def test_run_removes_its_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark, 'benchmark_file_size', lambda mount_point, requested: MIN_FILE_SIZE)
+    stages = []
+    results = run_benchmark(str(tmp_path), random_seconds=0.05, fsync_count=3,
+                            progress=lambda stage, message: stages.append(stage))
+    assert results['file_size'] == MIN_FILE_SIZE
+    assert results['seq_write_bps'] > 0 and results['fsync_p99_ms'] >= 0
+    assert sorted(set(stages)) == list(range(len(STAGES)))
+    assert os.listdir(tmp_path) == []
+
+    def cancel(stage, message):
+        raise RuntimeError('cancelled')
+    with pytest.raises(RuntimeError):
+        run_benchmark(str(tmp_path), progress=cancel)
+    assert os.listdir(tmp_path) == []
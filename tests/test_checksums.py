@@ -0,0 +1,86 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import base64
+import hashlib
+import io
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+from werkzeug.datastructures import Headers
+
+from models import db
+from services import checksums
+from services.checksums import ChecksumMismatch, lookup_digest, parse_expected_digest, save_upload
+
+DATA = b'hello nas' * 1000
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite:///' + str(tmp_path / 'checksums.db'))
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+@pytest.fixture(params=['xattr', 'database'])
+def storage(request, monkeypatch):
+    if request.param == 'database':
+        def no_xattr(*args):
+            raise OSError('not supported')
+        monkeypatch.setattr(checksums.os, 'setxattr', no_xattr)
+        monkeypatch.setattr(checksums.os, 'getxattr', no_xattr)
+    return request.param
+
+
+def upload(data=DATA):
+    return SimpleNamespace(stream=io.BytesIO(data))
+
+
+@pytest.mark.parametrize('headers, expected', [
+    ({'X-Checksum-SHA256': SHA256.upper()}, ('sha256', SHA256)),
+    ({'Content-Digest': 'sha-256=:' + base64.b64encode(bytes.fromhex(SHA256)).decode() + ':'}, ('sha256', SHA256)),
+    ({'Digest': 'MD5=xyz, SHA-256=' + base64.b64encode(bytes.fromhex(SHA256)).decode()}, ('sha256', SHA256)),
+    ({'Digest': 'MD5=xyz'}, None),
+    ({}, None),
+])
+def test_parse_expected_digest(headers, expected):
+    assert parse_expected_digest(Headers(headers)) == expected
+
+
+@pytest.mark.parametrize('headers', [{'X-Checksum-SHA256': 'not hex'}, {'Content-Digest': 'sha-256=:!!:'}])
+def test_parse_expected_digest_rejects_malformed(headers):
+    with pytest.raises(ValueError):
+        parse_expected_digest(Headers(headers))
+
+
+def test_save_upload_records_digest(app, tmp_path, storage):
+    dest = str(tmp_path / 'file.bin')
+    assert save_upload(upload(), dest, expected=('sha256', SHA256), chunk_size=1000) == SHA256
+    with open(dest, 'rb') as f:
+        assert f.read() == DATA
+    assert lookup_digest(dest) == {'algorithm': 'sha256', 'value': SHA256}
+
+    with open(dest, 'ab') as f:
+        f.write(b'changed')
+    assert lookup_digest(dest) is None  # Stale once size or mtime move
+
+
+def test_mismatch_leaves_nothing_behind(app, tmp_path):
+    dest = str(tmp_path / 'file.bin')
+    with pytest.raises(ChecksumMismatch):
+        save_upload(upload(b'corrupted'), dest, expected=('sha256', SHA256))
+    assert os.listdir(tmp_path) == ['checksums.db']
+
+
+def test_blake2b(app, tmp_path):
+    digest = save_upload(upload(), str(tmp_path / 'file.bin'), algorithm='blake2b')
+    assert digest == hashlib.blake2b(DATA).hexdigest()
@@ -0,0 +1,71 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import time
+
+import pytest
+
+from disk_manager import utils
+
+
+def python(code):
+    return [sys.executable, '-c', code]
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    utils.clear_command_cache()
+    yield
+    utils.clear_command_cache()
+
+
+def test_success_and_failure():
+    assert utils.run_command(python('print("  sda  ")'), use_cache=False) == (True, 'sda')
+    ok, error = utils.run_command(python('import sys; sys.stderr.write("boom"); sys.exit(3)'), use_cache=False)
+    assert (ok, error) == (False, 'boom')
+    ok, error = utils.run_command(['definitely-not-a-command-xyz'], use_cache=False)
+    assert not ok and 'not found' in error
+
+
+def test_timeout_kills_the_command():
+    started = time.monotonic()
+    ok, error = utils.run_command(python('import time; time.sleep(30)'), timeout=0.3, use_cache=False)
+    assert not ok and 'timed out' in error
+    assert time.monotonic() - started < 5
+
+
+def test_output_is_capped():
+    ok, error = asyncio.run(utils.run_command_async(python('print("x" * 1000000)'), timeout=10, max_output=1000))
+    assert not ok and 'exceeded 1000 bytes' in error
+
+
+def test_commands_run_concurrently():
+    started = time.monotonic()
+    results = utils.run_commands([python(f'import time; time.sleep(0.5); print({i})') for i in range(4)],
+                                 use_cache=False)
+    assert results == [(True, '0'), (True, '1'), (True, '2'), (True, '3')]
+    assert time.monotonic() - started < 1.8
+
+
+def test_successful_results_are_cached(tmp_path):
+    counter = tmp_path / 'runs'
+    cmd = python(f'open({str(counter)!r}, "a").write("x"); print("ok")')
+    assert utils.run_command(cmd) == utils.run_command(cmd) == (True, 'ok')
+    assert counter.read_text() == 'x'
+    utils.clear_command_cache()
+    utils.run_command(cmd)
+    assert counter.read_text() == 'xx'
+
+
+def test_runner_replaces_execution():
+    calls = []
+    utils.set_command_runner(lambda cmds, timeout: calls.append(cmds) or [(True, 'fixture')] * len(cmds))
+    try:
+        assert utils.run_command(['lsblk', '-J']) == (True, 'fixture')
+    finally:
+        utils.set_command_runner(None)
+    assert calls == [[['lsblk', '-J']]]
@@ -0,0 +1,91 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import gzip
+
+import pytest
+from flask import Flask, jsonify, render_template_string
+
+from services import compression
+from services.assets import IMMUTABLE_CACHE_CONTROL, AssetPipeline
+
+CSS = b'body { color: #333; }\n' * 200
+
+
+@pytest.fixture
+def app(tmp_path):
+    static = tmp_path / 'static'
+    static.mkdir()
+    (static / 'style.css').write_bytes(CSS)
+    (static / 'tiny.js').write_bytes(b'let x = 1;\n')
+
+    app = Flask(__name__, static_folder=str(static))
+    compression.init_app(app)
+    AssetPipeline().init_app(app)
+
+    @app.route('/big')
+    def big():
+        return jsonify(items=list(range(2000)))
+
+    @app.route('/small')
+    def small():
+        return jsonify(ok=True)
+
+    @app.route('/page')
+    def page():
+        return render_template_string("{{ asset_url('style.css') }} {{ asset_url('missing.css') }}")
+
+    return app
+
+
+def test_gzip_when_accepted(app):
+    response = app.test_client().get('/big', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data).startswith(b'{"items":[0,1,2')
+
+
+def test_left_alone(app):
+    client = app.test_client()
+    assert 'Content-Encoding' not in client.get('/big').headers
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+    app.config['COMPRESS_RESPONSES'] = False
+    assert 'Content-Encoding' not in client.get('/big', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_brotli_preferred_only_when_installed(app, monkeypatch):
+    client = app.test_client()
+    headers = {'Accept-Encoding': 'br, gzip;q=0.8'}
+    monkeypatch.setattr(compression, 'brotli', None)
+    assert client.get('/big', headers=headers).headers['Content-Encoding'] == 'gzip'
+
+    brotli = pytest.importorskip('brotli')
+    monkeypatch.setattr(compression, 'brotli', brotli)
+    response = client.get('/big', headers=headers)
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data).startswith(b'{"items":')
+
+
+def test_asset_urls_are_fingerprinted(app):
+    html = app.test_client().get('/page').get_data(as_text=True)
+    fingerprinted, missing = html.split()
+    assert fingerprinted.startswith('/assets/style.') and fingerprinted.endswith('.css')
+    assert missing == '/static/missing.css'
+
+
+def test_assets_are_served_precompressed_and_immutable(app):
+    client = app.test_client()
+    url = client.get('/page').get_data(as_text=True).split()[0]
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == CSS
+
+    plain = client.get(url)
+    assert plain.data == CSS and 'Content-Encoding' not in plain.headers
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert client.get('/assets/style.0000000000.css').status_code == 404
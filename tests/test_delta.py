@@ -0,0 +1,100 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import hashlib
+import io
+import struct
+
+import pytest
+from flask import Flask
+
+from models import db
+from services.checksums import ChecksumMismatch
+from services.delta import (DeltaError, apply_delta, get_signature, _COPY_OP, _DELTA_HEADER,
+                            _LITERAL_OP, _SIG_BLOCK, _SIG_HEADER, DELTA_MAGIC, FORMAT_VERSION)
+
+BLOCK = 4096
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite:///' + str(tmp_path / 'delta.db'))
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+@pytest.fixture
+def base(tmp_path):
+    path = tmp_path / 'big.bin'
+    path.write_bytes(b'a' * BLOCK + b'b' * BLOCK + b'c' * 100)
+    return str(path)
+
+
+def delta(*ops):
+    out = io.BytesIO()
+    out.write(_DELTA_HEADER.pack(DELTA_MAGIC, FORMAT_VERSION, BLOCK))
+    for op in ops:
+        if isinstance(op, bytes):
+            out.write(b'L' + _LITERAL_OP.pack(len(op)) + op)
+        else:
+            out.write(b'C' + _COPY_OP.pack(*op))
+    out.seek(0)
+    return out
+
+
+def test_signature_is_cached_per_version(tmp_path, base):
+    cache = str(tmp_path / 'sigs')
+    sig_path, block_size, st = get_signature(base, cache, BLOCK)
+    with open(sig_path, 'rb') as f:
+        data = f.read()
+    magic, version, size, file_size = _SIG_HEADER.unpack_from(data)
+    assert (magic, size, file_size) == (b'NSIG', BLOCK, st.st_size)
+    assert len(data) == _SIG_HEADER.size + 3 * _SIG_BLOCK.size
+    assert get_signature(base, cache, BLOCK)[0] == sig_path
+
+    with open(base, 'ab') as f:
+        f.write(b'more')
+    assert get_signature(base, cache, BLOCK)[0] != sig_path
+    assert len(os.listdir(cache)) == 1  # The stale signature was dropped
+
+
+def test_round_trip(app, base):
+    new = b'a' * BLOCK + b'inserted' + b'c' * 100
+    digest, reused, received = apply_delta(base, delta((0, 1), b'inserted', (2, 1)))
+    with open(base, 'rb') as f:
+        assert f.read() == new
+    assert digest == hashlib.sha256(new).hexdigest()
+    assert (reused, received) == (BLOCK + 100, len(b'inserted'))
+
+
+def test_corrupted_patch_is_rejected(app, tmp_path, base):
+    # The route answers ChecksumMismatch with 422
+    with open(base, 'rb') as f:
+        original = f.read()
+    expected = ('sha256', hashlib.sha256(b'what the client meant').hexdigest())
+    with pytest.raises(ChecksumMismatch):
+        apply_delta(base, delta((0, 1), b'garbled'), expected=expected)
+    with open(base, 'rb') as f:
+        assert f.read() == original
+    assert not [name for name in os.listdir(tmp_path) if '.delta-' in name]  # No temporary file left
+
+
+@pytest.mark.parametrize('stream', [
+    io.BytesIO(b'NOPE' + bytes(5)),
+    delta((5, 1)),
+    io.BytesIO(delta((0, 1)).getvalue() + b'L' + struct.pack('>I', 10) + b'short'),
+    io.BytesIO(delta().getvalue() + b'Z'),
+])
+def test_malformed_delta(app, base, stream):
+    with open(base, 'rb') as f:
+        original = f.read()
+    with pytest.raises(DeltaError):
+        apply_delta(base, stream)
+    with open(base, 'rb') as f:
+        assert f.read() == original
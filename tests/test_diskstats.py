@@ -0,0 +1,51 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from disk_manager.diskstats import compute_rates, parse_diskstats
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'diskstats')
+SYS_BLOCK = os.path.join(FIXTURE, 'sys_block')
+
+
+def load(name, sys_block=SYS_BLOCK):
+    return parse_diskstats(os.path.join(FIXTURE, name), sys_block)
+
+
+def test_parse_whole_disks_only():
+    counters = load('diskstats_t0')
+    # Partitions are not in /sys/block, loop devices are skipped, short lines (sdb) ignored
+    assert sorted(counters) == ['cciss/c0d0', 'nvme0n1', 'sda']
+    assert counters['sda'] == (1000, 80000, 500, 2000, 160000, 1500, 1800)
+
+
+def test_parse_without_sys_block():
+    counters = load('diskstats_t0', sys_block=os.path.join(FIXTURE, 'missing'))
+    assert sorted(counters) == ['cciss/c0d0', 'nvme0n1', 'nvme0n1p1', 'sda', 'sda1']
+
+
+def test_rates_count_512_byte_sectors():
+    read_bps, write_bps, read_iops, write_iops, await_ms, _ = compute_rates(
+        load('diskstats_t0')['sda'], load('diskstats_t1')['sda'], 2.0)
+    assert (read_bps, write_bps) == (2048 * 512 / 2, 6144 * 512 / 2)
+    assert (read_iops, write_iops) == (50.0, 150.0)
+    assert await_ms == 1.5  # (200 + 400) ms over 400 I/Os
+
+
+def test_util_is_capped_at_100():
+    # 2500 ms busy in 2 s (the counter is not exact across merged requests)
+    assert compute_rates(load('diskstats_t0')['sda'], load('diskstats_t1')['sda'], 2.0)[5] == 100.0
+    assert compute_rates(load('diskstats_t0')['sda'], load('diskstats_t1')['sda'], 50.0)[5] == 5.0
+
+
+def test_idle_disk():
+    idle = load('diskstats_t0')['cciss/c0d0']
+    assert compute_rates(idle, idle, 5.0) == (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+
+def test_counters_going_backwards():
+    # nvme0n1 was replaced between the two samples
+    assert compute_rates(load('diskstats_t0')['nvme0n1'], load('diskstats_t1')['nvme0n1'], 2.0) is None
+    assert compute_rates(load('diskstats_t0')['sda'], load('diskstats_t1')['sda'], 0) is None
@@ -0,0 +1,101 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from services.access_control import authorize_item, is_scope_root
+from services.file_ops import columnar_listing, list_directory, validate_batch
+
+
+class FakeUser:
+    def __init__(self, username, role='user'):
+        self.id = 1
+        self.username = username
+        self.role = role
+
+
+@pytest.fixture
+def nas_root(tmp_path):
+    root = tmp_path / 'nas'
+    for folder in ('users/bob/docs', 'users/alice/private', 'shared'):
+        (root / folder).mkdir(parents=True)
+    (root / 'users/bob/docs/report.txt').write_text('bob')
+    (root / 'users/alice/private/diary.txt').write_text('alice')
+    os.symlink('../alice', root / 'users/bob/alice')
+    return str(root)
+
+
+def rejected(user, operations, nas_root):
+    normalized, errors = validate_batch(user, operations, nas_root)
+    return [e['index'] for e in errors]
+
+
+def test_scope_roots():
+    for rel in ('', 'shared', 'users', 'users/bob'):
+        assert is_scope_root(rel)
+    for rel in ('shared/x', 'users/bob/docs', 'sharedx'):
+        assert not is_scope_root(rel)
+
+
+def test_user_cannot_remove_scope_roots(nas_root):
+    bob = FakeUser('bob')
+    operations = [
+        {'op': 'delete', 'path': 'shared'},
+        {'op': 'delete', 'path': 'users/bob'},
+        {'op': 'move', 'path': 'users/bob', 'dest': 'users/bob/docs'},
+        {'op': 'rename', 'path': 'users/bob/', 'new_name': 'robert'},
+        {'op': 'delete', 'path': 'users/bob/docs/..'},
+    ]
+    assert rejected(bob, operations, nas_root) == [0, 1, 2, 3, 4]
+    assert os.path.isdir(os.path.join(nas_root, 'shared'))
+
+
+def test_admin_cannot_remove_scope_roots(nas_root):
+    admin = FakeUser('admin', role='admin')
+    operations = [{'op': 'delete', 'path': 'users/alice'}, {'op': 'move', 'path': 'shared', 'dest': 'users'}]
+    assert rejected(admin, operations, nas_root) == [0, 1]
+    assert rejected(admin, [{'op': 'delete', 'path': 'users/alice/private'}], nas_root) == []
+
+
+def test_user_batch_stays_in_home(nas_root):
+    bob = FakeUser('bob')
+    operations = [
+        {'op': 'delete', 'path': 'users/bob/docs/report.txt'},
+        {'op': 'rename', 'path': 'users/bob/docs', 'new_name': 'papers'},
+        {'op': 'mkdir', 'path': 'users/bob/new'},
+        {'op': 'delete', 'path': 'users/alice/private/diary.txt'},
+        {'op': 'move', 'path': 'users/bob/docs/report.txt', 'dest': 'users/alice'},
+        {'op': 'delete', 'path': 'users/bob/alice/private'},
+        {'op': 'mkdir', 'path': 'users/bob/.trash'},
+    ]
+    assert rejected(bob, operations, nas_root) == [3, 4, 5, 6]
+
+
+def test_authorize_item_needs_the_parent_folder(nas_root):
+    bob = FakeUser('bob')
+    resolved, reason = authorize_item(bob, 'users/bob/docs/report.txt', nas_root)
+    assert resolved.rel == 'users/bob/docs/report.txt' and reason is None
+    resolved, reason = authorize_item(bob, 'users/bob', nas_root)
+    assert resolved is None and reason
+
+
+def test_columnar_listing(nas_root):
+    with open(os.path.join(nas_root, 'users/bob/Zeta.txt'), 'w') as f:
+        f.write('12345')
+    os.makedirs(os.path.join(nas_root, 'users/bob/.trash'))
+    entries = list_directory(os.path.join(nas_root, 'users/bob'), nas_root)
+    listing = columnar_listing('users/bob', entries)
+    assert listing['names'] == ['alice', 'docs', 'Zeta.txt']  # Folders first, then by name; trash hidden
+    assert listing['types'] == ['d', 'd', 'f']
+    assert listing['sizes'] == [0, 0, 5]
+    assert listing['count'] == 3 and len(listing['mtimes']) == 3
+    assert entries[2]['path'] == 'users/bob/Zeta.txt'
+
+
+def test_columnar_listing_msgpack_round_trip():
+    msgpack = pytest.importorskip('msgpack')
+    listing = columnar_listing('shared', [{'name': 'a', 'is_dir': False, 'size': 2 ** 40, 'mtime': 1700000000}])
+    assert msgpack.unpackb(msgpack.packb(listing)) == listing
@@ -0,0 +1,63 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from services.forecast import TrendModel, directory_usage
+
+DAY = 86400
+
+
+def test_linear_growth_is_recovered():
+    model = TrendModel(half_life=7 * DAY)
+    a, b = model.index('disk'), model.index('home.alice')
+    assert model.index('disk') == a
+    t = np.arange(0, 10 * DAY, 3600, dtype=float)
+    now = t[-1]
+    series = np.array([a] * len(t) + [b] * len(t), dtype=np.intp)
+    model.update(series, np.concatenate([t, t]), np.concatenate([100 + 5 * t / DAY, 2000 - t / DAY]), now)
+    assert model.slopes() == pytest.approx([5, -1])
+    assert (model.first[a], model.last[a]) == (0, now)
+
+
+def test_incremental_updates_match_one_fit():
+    t = np.arange(0, 6 * DAY, 3600, dtype=float)
+    y = 3 * (t / DAY) ** 2  # Accelerating, so the weighting matters
+    series = np.zeros(len(t), dtype=np.intp)
+
+    whole = TrendModel(half_life=2 * DAY)
+    whole.index('s')
+    whole.update(series[:1], t[:1], y[:1], t[0])  # x is measured from the first update
+    whole.update(series[1:], t[1:], y[1:], t[-1])
+
+    parts = TrendModel(half_life=2 * DAY)
+    parts.index('s')
+    parts.update(series[:1], t[:1], y[:1], t[0])
+    for start in range(1, len(t), 24):
+        end = min(start + 24, len(t))
+        parts.update(series[start:end], t[start:end], y[start:end], t[end - 1])
+    assert parts.slopes() == pytest.approx(whole.slopes())
+    assert parts.sums == pytest.approx(whole.sums)
+
+
+def test_no_trend_without_two_points():
+    model = TrendModel(half_life=DAY)
+    model.index('empty')
+    one = model.index('one')
+    model.update(np.array([one], dtype=np.intp), np.array([0.0]), np.array([42.0]), 0.0)
+    assert np.isnan(model.slopes()).all()
+    model.update(np.array([], dtype=np.intp), np.array([]), np.array([]), DAY)  # Only decays
+    assert model.ref == DAY and np.isnan(model.slopes()).all()
+
+
+def test_directory_usage(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'data.bin').write_bytes(os.urandom(64 * 1024))
+    (tmp_path / 'link').symlink_to('/usr')
+    assert 64 * 1024 <= directory_usage(str(tmp_path)) < 1024 * 1024
+    assert directory_usage(str(tmp_path / 'missing')) == 0
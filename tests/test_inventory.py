@@ -0,0 +1,114 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import socket
+
+import pytest
+
+from disk_manager import inventory as inventory_module
+from disk_manager.inventory import DiskInventory, parse_uevent
+from disk_manager.models import DiskInfo
+
+ADD_SDB = b'add@/devices/pci0000:00/usb1/1-1/host0/block/sdb\0ACTION=add\0SUBSYSTEM=block\0DEVNAME=sdb\0'
+USB_HUB = b'bind@/devices/pci0000:00/usb1/1-1\0ACTION=bind\0SUBSYSTEM=usb\0'
+
+
+class _Stop(Exception):
+    pass
+
+
+class FakeSocket:
+    """Replays uevent datagrams; a None entry stands for the settle timeout expiring."""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+
+    def bind(self, address):
+        pass
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv(self, size):
+        if not self.messages:
+            raise _Stop()
+        message = self.messages.pop(0)
+        if message is None:
+            raise socket.timeout()
+        return message
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@pytest.fixture
+def scans():
+    return []
+
+
+@pytest.fixture
+def inventory(scans):
+    def scanner():
+        scans.append(1)
+        return [DiskInfo(id='/dev/sda', name='Disk', size_bytes=1, filesystem='')]
+    inv = DiskInventory(scanner)
+    inv._listener = object()  # No netlink thread in tests
+    return inv
+
+
+def test_parse_uevent():
+    fields = parse_uevent(ADD_SDB)
+    assert (fields['ACTION'], fields['SUBSYSTEM'], fields['DEVNAME']) == ('add', 'block', 'sdb')
+
+
+def test_reads_are_served_from_memory(inventory, scans):
+    assert [d.id for d in inventory.get_all()] == ['/dev/sda']
+    assert inventory.get('/dev/sda').name == 'Disk'
+    assert inventory.get('/dev/sdz') is None
+    assert len(scans) == 1
+    inventory.invalidate()
+    inventory.get_all()
+    assert len(scans) == 2
+
+
+def test_ttl_is_a_safety_net(inventory, scans):
+    inventory.ttl = 0
+    inventory.get_all()
+    inventory.get_all()
+    assert len(scans) == 2
+
+
+def test_uevent_during_scan_keeps_the_cache_stale(scans):
+    def scanner():
+        scans.append(1)
+        if len(scans) == 1:
+            inventory.invalidate()  # A disk appeared while we were scanning
+        return []
+    inventory = DiskInventory(scanner)
+    inventory._listener = object()
+    inventory.get_all()
+    inventory.get_all()
+    assert len(scans) == 2
+
+
+def test_block_uevents_trigger_a_rescan(inventory, scans, monkeypatch):
+    invalidated = []
+    inventory._on_invalidate = lambda: invalidated.append(1)
+    inventory.get_all()
+    monkeypatch.setattr(inventory_module.socket, 'socket',
+                        lambda *args: FakeSocket([USB_HUB, ADD_SDB, ADD_SDB, None]))
+    with pytest.raises(_Stop):
+        inventory._listen()
+    assert inventory.uevents_active
+    # The hub event is ignored; the two block events settle into one eager rescan
+    assert len(invalidated) == 3  # Two uevents, then the refresh
+    assert len(scans) == 2
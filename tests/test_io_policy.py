@@ -0,0 +1,88 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import Flask, send_file
+
+from services import io_policy
+from services.io_policy import DirectWriter, ReadAhead, WriteBehind, apply_read_policy, open_for_upload
+
+
+@pytest.fixture
+def advice(monkeypatch):
+    """Records fadvise calls as (offset, length, advice name) instead of making them."""
+    calls = []
+    names = {getattr(os, n, n): n[len('POSIX_FADV_'):] for n in
+             ('POSIX_FADV_SEQUENTIAL', 'POSIX_FADV_WILLNEED', 'POSIX_FADV_DONTNEED')}
+    monkeypatch.setattr(io_policy, 'FADVISE', True)
+    monkeypatch.setattr(io_policy, '_fadvise', lambda fd, offset, length, a: calls.append((offset, length, names[a])))
+    return calls
+
+
+def test_read_ahead_prefetches_and_drops_behind(advice):
+    policy = ReadAhead(3, 0, window=100)
+    assert advice == [(0, 0, 'SEQUENTIAL'), (0, 200, 'WILLNEED')]
+    advice.clear()
+    policy.advance(150)
+    assert advice == [(150, 200, 'WILLNEED'), (0, 100, 'DONTNEED')]
+    advice.clear()
+    policy.advance(160)
+    assert advice == []  # Still inside the prefetched range and the same window
+
+
+def test_write_behind_lags_one_window(advice):
+    policy = WriteBehind(3, window=100)
+    policy.advance(150)
+    assert advice == []
+    policy.advance(100)
+    assert advice == [(0, 100, 'DONTNEED')]
+    policy.finish()
+    assert advice[-1] == (0, 0, 'DONTNEED')
+
+
+def test_direct_writer_keeps_the_data(tmp_path):
+    path = str(tmp_path / 'upload.bin')
+    data = os.urandom(3 * io_policy.DIRECT_ALIGN + 123)
+    with DirectWriter(path, buffer_size=2 * io_policy.DIRECT_ALIGN) as out:
+        for start in range(0, len(data), 1000):
+            out.write(data[start:start + 1000])
+    with open(path, 'rb') as f:
+        assert f.read() == data
+
+
+def test_open_for_upload_follows_the_policy(tmp_path, monkeypatch):
+    config = {'IO_POLICY_MIN_SIZE': 1000, 'IO_POLICY_WINDOW': 100}
+    out, write_behind = open_for_upload(str(tmp_path / 'small'), 10, config)
+    out.close()
+    assert write_behind is None
+    out, write_behind = open_for_upload(str(tmp_path / 'unknown'), None, config)
+    out.close()
+    assert isinstance(write_behind, WriteBehind) and write_behind.window == 100
+
+    monkeypatch.setattr(io_policy, 'DIRECT_IO', True)
+    out, write_behind = open_for_upload(str(tmp_path / 'huge'), 5000, dict(config, IO_DIRECT_UPLOAD_MIN_SIZE=2000))
+    out.close()
+    assert isinstance(out, DirectWriter) and write_behind is None
+
+
+def test_read_policy_wraps_large_downloads(tmp_path, advice):
+    data = os.urandom(300 * 1024)
+    (tmp_path / 'large.bin').write_bytes(data)
+    (tmp_path / 'small.bin').write_bytes(b'tiny')
+    app = Flask(__name__)
+    config = {'IO_POLICY_MIN_SIZE': 1024, 'IO_POLICY_WINDOW': 64 * 1024, 'IO_READ_CHUNK_SIZE': 32 * 1024}
+
+    with app.test_request_context():
+        response = apply_read_policy(send_file(str(tmp_path / 'large.bin')), config)
+        assert isinstance(response.response, io_policy._PolicyIterable)
+        response.direct_passthrough = False
+        assert response.get_data() == data
+        assert (0, 0, 'SEQUENTIAL') in advice and advice[-1] == (0, 0, 'DONTNEED')
+
+        small = send_file(str(tmp_path / 'small.bin'))
+        body = small.response
+        assert apply_read_policy(small, config).response is body
+        small.close()
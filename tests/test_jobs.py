@@ -0,0 +1,90 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from models import db, ChangeJournalEntry, Job
+from services.jobs import JobCancelled, JobContext, JobManager
+
+OWNER = SimpleNamespace(id=1)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite:///' + str(tmp_path / 'jobs.db'),
+                      NAS_ROOT=str(tmp_path / 'nas'), JOB_WORKERS=1, JOB_PROGRESS_INTERVAL=0)
+    os.makedirs(os.path.join(app.config['NAS_ROOT'], 'docs', 'sub'))
+    os.makedirs(os.path.join(app.config['NAS_ROOT'], 'backup'))
+    with open(os.path.join(app.config['NAS_ROOT'], 'docs', 'a.txt'), 'w') as f:
+        f.write('hello')
+    with open(os.path.join(app.config['NAS_ROOT'], 'docs', 'sub', 'b.txt'), 'w') as f:
+        f.write('world!')
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def run_jobs(app, *submissions):
+    manager = JobManager()
+    manager.init_app(app)
+    submitted = [manager.submit(OWNER, kind, **params) for kind, params in submissions]
+    manager._executor.shutdown(wait=True)
+    db.session.expire_all()
+    return [db.session.get(Job, job.id) for job in submitted]
+
+
+def test_copy_job(app):
+    nas = app.config['NAS_ROOT']
+    (job,) = run_jobs(app, ('copy', {'src': 'docs', 'dest_dir': 'backup'}))
+    assert job.status == 'done', job.message
+    assert (job.progress_done, job.progress_total) == (11, 11)
+    with open(os.path.join(nas, 'backup', 'docs', 'sub', 'b.txt')) as f:
+        assert f.read() == 'world!'
+    assert ChangeJournalEntry.query.filter_by(op='add', path='backup/docs').count() == 1
+
+
+def test_archive_job(app):
+    (job,) = run_jobs(app, ('archive', {'path': 'docs'}))
+    assert job.status == 'done', job.message
+    with zipfile.ZipFile(os.path.join(app.config['NAS_ROOT'], 'docs.zip')) as zf:
+        assert sorted(zf.namelist()) == ['docs/a.txt', 'docs/sub/b.txt']
+
+
+def test_failed_job_keeps_the_error(app):
+    (job,) = run_jobs(app, ('copy', {'src': 'docs', 'dest_dir': 'docs/sub'}))
+    assert job.status == 'failed'
+    assert 'into itself' in job.message
+
+
+def test_unknown_kind(app):
+    with pytest.raises(ValueError):
+        JobManager().submit(OWNER, 'format_disk')
+
+
+def test_progress_raises_once_cancelled(app):
+    job = Job(user_id=OWNER.id, kind='rescan', status='running')
+    db.session.add(job)
+    db.session.commit()
+    ctx = JobContext(job.id, app.config['NAS_ROOT'], 0)
+    ctx.progress(1, 10)
+    JobManager().cancel(job)
+    with pytest.raises(JobCancelled):
+        ctx.progress(2)
+    assert db.session.get(Job, job.id).progress_done == 2
+
+
+def test_orphaned_jobs_fail_on_start(app):
+    db.session.add_all([Job(user_id=OWNER.id, kind='copy', status='running', owner_pid=2 ** 22 + 1),
+                        Job(user_id=OWNER.id, kind='copy', status='running', owner_pid=os.getpid())])
+    db.session.commit()
+    JobManager().init_app(app)
+    assert [j.status for j in Job.query.order_by(Job.id)] == ['failed', 'running']
@@ -0,0 +1,135 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import multiprocessing
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from models import db, ChangeJournalEntry
+from services.events import DirectoryWatcher, _entry_info
+from services.journal import JournalScanner, changes_since, record_change
+
+
+class Admin:
+    role = 'admin'
+    username = 'admin'
+
+
+def make_app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite:///' + str(tmp_path / 'journal.db'),
+                      NAS_ROOT=str(tmp_path / 'nas'), JOURNAL_SCAN_STATE=str(tmp_path / 'dirs.json'),
+                      JOURNAL_LOCK_FILE=str(tmp_path / 'journal.lock'))
+    db.init_app(app)
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path)
+    os.makedirs(app.config['NAS_ROOT'])
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def test_changes_since(app):
+    for name in ('a', 'b', 'c'):
+        record_change('add', name)
+    result = changes_since(Admin(), 1, app.config['NAS_ROOT'])
+    assert [c['path'] for c in result['changes']] == ['b', 'c']
+    assert (result['last_seq'], result['reset'], result['has_more']) == (3, False, False)
+
+
+def test_reset_after_pruning(app):
+    for name in ('a', 'b', 'c'):
+        record_change('add', name)
+    ChangeJournalEntry.query.filter(ChangeJournalEntry.seq < 3).delete()
+    db.session.commit()
+    assert changes_since(Admin(), 1, app.config['NAS_ROOT'])['reset']
+    assert not changes_since(Admin(), 2, app.config['NAS_ROOT'])['reset']
+
+
+def test_reset_when_pruning_emptied_the_journal(app):
+    for name in ('a', 'b'):
+        record_change('add', name)
+    ChangeJournalEntry.query.delete()
+    db.session.commit()
+    stale = changes_since(Admin(), 1, app.config['NAS_ROOT'])
+    assert stale['reset'] and stale['last_seq'] == 2
+    assert not changes_since(Admin(), 2, app.config['NAS_ROOT'])['reset']
+    assert changes_since(Admin(), 7, app.config['NAS_ROOT'])['reset']  # Cursor from another database
+
+
+def test_scanner_journals_changed_folders(app):
+    nas = app.config['NAS_ROOT']
+    os.makedirs(os.path.join(nas, 'docs', 'old'))
+    os.makedirs(os.path.join(nas, 'photos'))
+    scanner = JournalScanner()
+    scanner._app = app
+    assert scanner.scan() == []  # First pass: nothing to compare against
+
+    with open(os.path.join(nas, 'docs', 'new.txt'), 'w'):
+        pass
+    os.utime(os.path.join(nas, 'docs'), ns=(1, 1))  # mtime granularity may be coarse
+    assert scanner.scan() == ['docs']
+    change = changes_since(Admin(), 0, nas)['changes'][-1]
+    assert (change['op'], change['path'], change['is_dir']) == ('rescan', 'docs', True)
+
+    # A new scanner (e.g. after a restart) starts from the saved state
+    os.utime(os.path.join(nas, 'photos'), ns=(2, 2))
+    restarted = JournalScanner()
+    restarted._app = app
+    assert restarted.scan() == ['photos']
+
+
+def _watch_in_worker(tmp_path, barrier):
+    """One gunicorn worker's watcher: takes a snapshot, then looks again once the test changed things."""
+    app = make_app(tmp_path)
+    watcher = DirectoryWatcher(SimpleNamespace(publish=lambda dir_rel, event: None))
+    watcher._app = app
+    with app.app_context():
+        watcher._check('docs', True)
+        barrier.wait()
+        barrier.wait()
+        watcher._check('docs', True)
+
+
+def _run_two_workers(tmp_path, change):
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(3)
+    workers = [context.Process(target=_watch_in_worker, args=(tmp_path, barrier)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    change()
+    barrier.wait()
+    for worker in workers:
+        worker.join(10)
+        assert worker.exitcode == 0
+
+
+@pytest.mark.parametrize('made_by_app', [False, True])
+def test_two_workers_journal_a_change_once(app, tmp_path, made_by_app):
+    pytest.importorskip('fcntl')
+    nas = app.config['NAS_ROOT']
+    os.makedirs(os.path.join(nas, 'docs'))
+    with open(os.path.join(nas, 'docs', 'a.txt'), 'w') as f:
+        f.write('v1')
+
+    def modify():
+        with open(os.path.join(nas, 'docs', 'a.txt'), 'w') as f:
+            f.write('version 2')
+        if made_by_app:  # What notify_change() journals in the worker that wrote the file
+            record_change('modify', 'docs/a.txt', entry=_entry_info(nas, 'docs/a.txt'))
+
+    _run_two_workers(tmp_path, modify)
+    _run_two_workers(tmp_path, lambda: os.remove(os.path.join(nas, 'docs', 'a.txt')))
+    db.session.remove()
+    rows = ChangeJournalEntry.query.order_by(ChangeJournalEntry.seq).all()
+    assert [(r.op, r.path, r.size) for r in rows] == [('modify', 'docs/a.txt', 9), ('remove', 'docs/a.txt', None)]
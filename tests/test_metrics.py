@@ -0,0 +1,79 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import Flask
+
+from services.metrics import SCHEMA, MetricsStore, RingBuffer
+
+HOUR = 1_700_002_800  # An hour boundary, long enough ago for its rollups to be complete
+
+
+def test_ring_buffer_keeps_the_newest_points():
+    ring = RingBuffer(3)
+    assert len(ring) == 0 and ring.items() == []
+    for t in range(1, 6):
+        ring.append(t, t * 10.0)
+    assert len(ring) == 3
+    assert ring.items() == [(3, 30.0), (4, 40.0), (5, 50.0)]
+    assert ring.items(since=4) == [(4, 40.0), (5, 50.0)]
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two stores on one database, like two gunicorn workers."""
+    app = Flask(__name__)
+    app.config.update(METRICS_DB=str(tmp_path / 'metrics.db'))
+    stores = []
+    for _ in range(2):
+        store = MetricsStore()
+        store._app = app
+        store._path = app.config['METRICS_DB']
+        stores.append(store)
+    with stores[0]._connect() as conn:  # Schema only: no sampling thread or request hooks
+        conn.executescript(SCHEMA)
+    return stores
+
+
+def test_flush_merges_minutes_into_every_resolution(workers):
+    a, b = workers
+    a.record('disk.percent', 10.0, HOUR + 5)
+    a.record('disk.percent', 20.0, HOUR + 30)
+    b.record('disk.percent', 60.0, HOUR + 65)
+    a.flush()
+    b.flush()
+    assert a.query('disk.percent', '1m', 0, HOUR + 3600) == [
+        {'t': HOUR, 'avg': 15.0, 'min': 10.0, 'max': 20.0, 'count': 2},
+        {'t': HOUR + 60, 'avg': 60.0, 'min': 60.0, 'max': 60.0, 'count': 1},
+    ]
+    [hour] = b.query('disk.percent', '1h', 0, HOUR + 3600)
+    assert hour == {'t': HOUR, 'avg': 30.0, 'min': 10.0, 'max': 60.0, 'count': 3}
+    [day] = a.query('disk.percent', '1d', 0, HOUR + 3600)
+    assert day['t'] == HOUR - HOUR % 86400 and day['count'] == 3
+
+
+def test_counters_add_up_across_workers(workers):
+    a, b = workers
+    # Each worker moved 6000 bytes in the first minute; only one of them in the second
+    a.record_counter('transfers.download_bps', 6000, 60, HOUR + 10)
+    b.record_counter('transfers.download_bps', 6000, 60, HOUR + 20)
+    a.record_counter('transfers.download_bps', 3000, 60, HOUR + 70)
+    a.flush()
+    b.flush()
+    minutes = a.query('transfers.download_bps', '1m', 0, HOUR + 3600)
+    assert [(p['t'], p['avg']) for p in minutes] == [(HOUR, 200.0), (HOUR + 60, 50.0)]
+    [hour] = b.query('transfers.download_bps', '1h', 0, HOUR + 3600)
+    assert hour['avg'] == 15000 / 3600
+    assert (hour['min'], hour['max']) == (50.0, 200.0)  # Slowest and busiest minute
+    assert a.query('transfers.download_bps', 'raw')[0]['value'] == 100.0  # This worker's own rate
+
+
+def test_unflushed_minute_is_kept_for_the_next_flush(workers):
+    a, _ = workers
+    a.record('http.request_ms', 5.0)  # Current minute: not finished yet
+    a.flush()
+    assert a.query('http.request_ms', '1m', 0) == []
+    assert [p['value'] for p in a.query('http.request_ms', 'raw')] == [5.0]
@@ -0,0 +1,90 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from services.access_control import authorize_path, ensure_path_allowed
+from services.path_resolver import PathResolver
+
+
+class FakeUser:
+    def __init__(self, username, role='user'):
+        self.username = username
+        self.role = role
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / 'nas'
+    for folder in ('users/bob/docs', 'users/alice/private', 'shared'):
+        (root / folder).mkdir(parents=True)
+    (root / 'users/bob/docs/report.txt').write_text('bob')
+    (root / 'users/alice/private/diary.txt').write_text('alice')
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    (outside / 'secret').write_text('secret')
+    return root, outside
+
+
+def test_dotdot_is_normalized_or_refused(tree):
+    root, _ = tree
+    resolver = PathResolver(str(root))
+    assert resolver.resolve('users/bob/../alice').rel == 'users/alice'
+    assert resolver.resolve('..') is None
+    assert resolver.resolve('users/../../outside/secret') is None
+
+
+def test_absolute_input_stays_under_root(tree):
+    root, _ = tree
+    resolved = PathResolver(str(root)).resolve('/etc/passwd')
+    assert resolved.rel == 'etc/passwd'
+    assert resolved.abs == os.path.join(str(root), 'etc', 'passwd')
+
+
+def test_symlink_leaving_the_root_is_refused(tree):
+    root, outside = tree
+    os.symlink(str(outside), str(root / 'users/bob/escape'))
+    resolver = PathResolver(str(root))
+    assert resolver.resolve('users/bob/escape') is None
+    assert resolver.resolve('users/bob/escape/secret') is None
+
+
+def test_symlink_inside_the_root_is_followed(tree):
+    root, _ = tree
+    os.symlink(str(root / 'users/bob/docs'), str(root / 'users/bob/latest'))
+    resolved = PathResolver(str(root)).resolve('users/bob/latest/report.txt')
+    assert resolved.abs == os.path.join(str(root), 'users/bob/latest/report.txt')  # Operations act on the link
+    assert resolved.real_rel == 'users/bob/docs/report.txt'
+
+
+def test_swap_for_symlink_after_resolving(tree):
+    root, outside = tree
+    resolver = PathResolver(str(root))
+    assert resolver.resolve('users/bob/docs/report.txt') is not None
+    os.rename(str(root / 'users/bob/docs'), str(root / 'users/bob/old'))
+    os.symlink(str(outside), str(root / 'users/bob/docs'))
+    assert resolver.resolve('users/bob/docs/report.txt') is None
+
+
+def test_access_is_checked_where_a_symlink_leads(tree):
+    root, _ = tree
+    bob = FakeUser('bob')
+    os.symlink(str(root / 'users/alice'), str(root / 'users/bob/alice'))
+    os.symlink(str(root / 'users/bob/docs'), str(root / 'users/bob/mine'))
+    assert ensure_path_allowed(bob, 'users/bob/alice/private/diary.txt', str(root))[0] is False
+    assert ensure_path_allowed(bob, 'users/bob/../alice', str(root))[0] is False
+    resolved, reason = authorize_path(bob, 'users/bob/mine/report.txt', str(root))
+    assert reason is None and resolved.real_rel == 'users/bob/docs/report.txt'
+    assert ensure_path_allowed(FakeUser('admin', 'admin'), 'users/bob/alice', str(root))[0] is True
+
+
+def test_trash_is_refused_as_typed_and_as_resolved(tree):
+    root, _ = tree
+    (root / 'users/bob/.trash').mkdir()
+    os.symlink(str(root / 'users/bob/.trash'), str(root / 'users/bob/bin'))
+    admin = FakeUser('admin', 'admin')
+    assert ensure_path_allowed(admin, 'users/bob/.trash', str(root))[0] is False
+    assert ensure_path_allowed(admin, 'users/bob/bin', str(root))[0] is False
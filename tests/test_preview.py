@@ -0,0 +1,82 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+
+import pytest
+
+from services.preview import follow, is_binary, read_head, read_range, read_tail
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_bytes(b''.join(b'line %d\n' % i for i in range(1, 101)))
+    return str(path)
+
+
+def append(path, data):
+    with open(path, 'ab') as f:
+        f.write(data)
+
+
+def test_is_binary(tmp_path, log):
+    blob = tmp_path / 'blob.bin'
+    blob.write_bytes(b'abc\0def')
+    assert is_binary(str(blob))
+    assert not is_binary(log)
+
+
+def test_read_head(log):
+    result = read_head(log, 2, 1024)
+    assert result['text'] == 'line 1\nline 2\n'
+    assert (result['offset'], result['end']) == (0, 14)
+    assert read_head(log, 50, 10)['text'] == 'line 1\nlin'
+
+
+def test_read_range(log):
+    result = read_range(log, 7, 7)
+    assert result['text'] == 'line 2\n' and result['end'] == 14
+    assert read_range(log, 10 ** 6, 10)['text'] == ''
+
+
+def test_read_tail(log):
+    result = read_tail(log, 2, 1024)
+    assert result['text'] == 'line 99\nline 100\n'
+    assert result['end'] == result['size'] == os.path.getsize(log)
+    # The byte window starts mid-line: the partial line is dropped
+    assert read_tail(log, 50, 20)['text'] == 'line 99\nline 100\n'
+
+
+def test_follow_sends_whole_lines_only(log):
+    size = os.path.getsize(log)
+    stream = follow(log, size, 0.01, 1024, time.monotonic() + 5)
+    assert next(stream) == ('idle', None)
+
+    append(log, b'partial')
+    assert next(stream) == ('idle', None)  # Held back until the line is complete
+    append(log, b' line\nnext')
+    kind, result = next(stream)
+    assert (kind, result['text'], result['offset']) == ('append', 'partial line\n', size)
+    assert next(stream) == ('idle', None)
+
+
+def test_follow_sends_long_lines_in_chunks(log):
+    size = os.path.getsize(log)
+    stream = follow(log, size, 0.01, 8, time.monotonic() + 5)
+    append(log, b'0123456789')
+    kind, result = next(stream)
+    assert (kind, result['text']) == ('append', '01234567')
+    assert next(stream) == ('idle', None)
+
+
+def test_follow_resets_after_truncation(log):
+    stream = follow(log, os.path.getsize(log), 0.01, 1024, time.monotonic() + 5)
+    with open(log, 'wb') as f:
+        f.write(b'fresh\n')
+    assert next(stream)[0] == 'reset'
+    kind, result = next(stream)
+    assert (kind, result['text'], result['offset']) == ('append', 'fresh\n', 0)
@@ -0,0 +1,68 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from disk_manager.raid import RaidMonitor, parse_mdstat, scan_raids
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'mdstat')
+
+
+def load(name, with_sysfs=True):
+    sys_root = os.path.join(FIXTURE, 'sys') if with_sysfs else os.path.join(FIXTURE, 'missing')
+    return {a.name: a for a in scan_raids(os.path.join(FIXTURE, name), sys_root)}
+
+
+def test_lists_every_array():
+    assert sorted(load('mdstat_rebuild')) == ['/dev/md0', '/dev/md1', '/dev/md127', '/dev/md2', '/dev/md3']
+
+
+def test_healthy_mirror():
+    md0 = load('mdstat_rebuild')['/dev/md0']
+    assert (md0.level, md0.state, md0.raid_disks, md0.active_disks, md0.degraded) == ('raid1', 'active', 2, 2, 0)
+    assert md0.size_bytes == 976630464 * 1024
+    assert [(m.name, m.state) for m in md0.members] == [('/dev/sdb1', 'in_sync'), ('/dev/sda1', 'in_sync')]
+    assert md0.sync_action == 'idle' and md0.sync_progress is None
+
+
+def test_rebuild_from_mdstat_only():
+    md1 = load('mdstat_rebuild', with_sysfs=False)['/dev/md1']
+    assert md1.degraded == 1
+    assert md1.sync_action == 'recovery'
+    assert md1.sync_progress == 8.5
+    assert md1.sync_speed_kbps == 166664
+    assert md1.sync_eta_seconds == round(89.3 * 60)
+
+
+def test_rebuild_with_sysfs():
+    md1 = load('mdstat_rebuild')['/dev/md1']
+    assert md1.sync_speed_kbps == 170000  # sysfs is preferred over the mdstat line
+    assert md1.sync_eta_seconds == round((1953260544 - 166522880) / 2 / 170000)
+    assert [(m.name, m.slot, m.state) for m in md1.members] == [
+        ('/dev/sdc1', 0, 'in_sync'), ('/dev/sdd1', 1, 'in_sync'), ('/dev/sde1', 2, 'rebuilding')]
+
+
+def test_failed_member_and_inactive_array():
+    arrays = load('mdstat_rebuild')
+    md2 = arrays['/dev/md2']
+    assert md2.state == 'clean' and md2.degraded == 1
+    assert [(m.name, m.slot, m.state) for m in md2.members] == [('/dev/sdf1', 0, 'in_sync'), ('/dev/sdg1', None, 'faulty')]
+    md127 = arrays['/dev/md127']
+    assert md127.state == 'inactive' and md127.level == ''
+    assert [(m.name, m.state) for m in md127.members] == [('/dev/sdj', 'spare')]
+    md3 = arrays['/dev/md3']  # raid0 has no [n/m] counts
+    assert (md3.level, md3.raid_disks, md3.degraded) == ('raid0', 2, 0)
+
+
+def test_delayed_resync():
+    with open(os.path.join(FIXTURE, 'mdstat_delayed')) as f:
+        md0, md1 = parse_mdstat(f.read())
+    assert (md0.sync_action, md0.sync_progress) == ('resync', 21.7)
+    assert (md1.sync_action, md1.sync_progress) == ('resync', None)
+
+
+def test_monitor_without_md():
+    monitor = RaidMonitor(mdstat_path=os.path.join(FIXTURE, 'missing'))
+    assert not monitor.available
+    assert monitor.get_all() == []
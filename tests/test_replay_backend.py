@@ -0,0 +1,101 @@
+import sys
+import os
+import json
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+import config
+from disk_manager import core, utils
+from disk_manager.replay import FixtureRecorder, FixtureRunner, fixture_name, fixture_path, DEFAULT_DIR
+from disk_manager.linux_backend import parse_linux_disks
+from disk_manager.windows_backend import parse_windows_disks
+
+
+@pytest.fixture
+def replay():
+    """Installs a fixture runner for the test and restores real execution afterwards."""
+    def install(runner):
+        utils.set_command_runner(runner)
+        return runner
+    yield install
+    utils.set_command_runner(None)
+
+
+def test_fixture_names():
+    assert fixture_name(["lsblk", "-J", "-b"]) == "lsblk"
+    assert fixture_name(["powershell", "-NoProfile", "-Command", "Get-Volume | ConvertTo-Json"]) == "vols"
+    assert fixture_name(["smartctl", "-a"]) is None
+
+
+def test_replay_lsblk(replay):
+    replay(FixtureRunner(DEFAULT_DIR))
+    disks = {d.id: d for d in parse_linux_disks()}
+    assert sorted(disks) == ['/dev/sda', '/dev/sdb', '/dev/sdc', '/dev/sdd']  # loop devices skipped
+    assert disks['/dev/sdc'].mount_points == ['/etc/hosts']
+    assert disks['/dev/sdb'].mount_points == ['[SWAP]']
+
+
+def test_lsblk_string_flags(replay):
+    # util-linux before 2.33 prints RM and ROTA as "0"/"1" strings
+    output = json.dumps({"blockdevices": [
+        {"name": "sda", "size": "1024", "type": "disk", "rm": "0", "rota": "1"},
+        {"name": "sdb", "size": "1024", "type": "disk", "rm": "1", "rota": "0"},
+    ]})
+    replay(FixtureRunner(fixtures={"lsblk": output}))
+    disks = {d.id: d for d in parse_linux_disks()}
+    assert disks['/dev/sda'].is_rotational and not disks['/dev/sda'].is_removable
+    assert disks['/dev/sdb'].is_removable and not disks['/dev/sdb'].is_rotational
+
+
+def test_replay_windows_without_volumes(replay):
+    replay(FixtureRunner(DEFAULT_DIR, fixtures={
+        name: open(fixture_path(DEFAULT_DIR, name)).read() for name in ("disks", "parts")
+    }))
+    disks = {d.id: d for d in parse_windows_disks()}
+    assert len(disks) == 5
+    assert disks['1'].is_system_disk and 'C:\\' in disks['1'].mount_points
+    assert disks['3'].is_removable  # USB
+    # No Get-Volume fixture: the partitions are still listed, filesystems unknown
+    assert [p.filesystem for p in disks['0'].partitions] == ['Unknown']
+
+
+def test_recorder_saves_output(replay, tmp_path, monkeypatch):
+    output = json.dumps({"blockdevices": [{"name": "sda", "size": 1024, "type": "disk", "rota": True}]})
+    monkeypatch.setattr(utils, "execute_commands", lambda cmds, timeout=None: [(True, output)] * len(cmds))
+    recorder = replay(FixtureRecorder(str(tmp_path)))
+    [disk] = parse_linux_disks()
+    assert disk.id == '/dev/sda' and disk.is_rotational
+    assert recorder.recorded == [fixture_path(str(tmp_path), "lsblk")]
+
+    replay(FixtureRunner(str(tmp_path)))
+    assert [d.id for d in parse_linux_disks()] == ['/dev/sda']
+
+
+def test_configure_mock_hardware(replay):
+    try:
+        core.configure({"MOCK_HARDWARE": True, "DISK_STATS_INTERVAL": 0})
+        assert len(core.get_all_disks()) == 4
+    finally:
+        core.configure({"MOCK_HARDWARE": False, "DISK_STATS_INTERVAL": 0})
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, "linux"), ("", "linux"), ("0", False), ("false", False), ("No", False),
+    ("true", "linux"), ("1", "linux"), ("linux", "linux"), ("Windows", "windows"), ("record", "record"),
+    ("yes please", "linux"),
+])
+def test_mock_hardware_setting(value, expected):
+    assert config._mock_hardware(value) == expected
+
+
+def test_mock_hardware_setting_warns(caplog):
+    config._mock_hardware("bogus")
+    assert "NAS_MOCK_HARDWARE='bogus'" in caplog.text
+
+
+def test_configure_rejects_unknown_mock_setting(replay):
+    core.configure({"MOCK_HARDWARE": "bogus", "DISK_STATS_INTERVAL": 0})
+    assert utils._runner is None
@@ -0,0 +1,104 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+import disk_manager.core
+import disk_manager.diskstats
+from services import spindown as spindown_module
+from services.spindown import SpinDownGuard
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'diskstats')
+parse_diskstats = disk_manager.diskstats.parse_diskstats
+
+
+class FakeApp:
+    def __init__(self, **config):
+        self.config = config
+
+
+class FakeDisk:
+    def __init__(self, name, mount_point, rotational):
+        self.id = f'/dev/{name}'
+        self.mount_points = [mount_point]
+        self.is_rotational = rotational
+
+
+@pytest.fixture
+def guard(tmp_path, monkeypatch):
+    """An archive HDD (sda) mounted at <nas>/archive; the rest of the NAS on an SSD (nvme0n1)."""
+    nas = str(tmp_path / 'nas')
+    disks = [FakeDisk('nvme0n1', nas, False), FakeDisk('sda', nas + '/archive', True)]
+    monkeypatch.setattr(disk_manager.core, 'get_all_disks', lambda: disks)
+    monkeypatch.setattr(disk_manager.diskstats, 'parse_diskstats',
+                        lambda: parse_diskstats(spindown_module.DISKSTATS_PATH, os.path.join(FIXTURE, 'sys_block')))
+    monkeypatch.setattr(spindown_module, '_read', lambda path: '')  # No device state: 'running'
+    guard = SpinDownGuard()
+    guard._app = FakeApp(NAS_ROOT=nas, SPINDOWN_IDLE_SECONDS=120, SPINDOWN_SNAPSHOT_DIRS=10000)
+    guard.enabled = True
+    guard.nas = nas
+    counters(monkeypatch, 'diskstats_t0')
+    guard.sample()
+    return guard
+
+
+def counters(monkeypatch, name):
+    monkeypatch.setattr(spindown_module, 'DISKSTATS_PATH', os.path.join(FIXTURE, name))
+
+
+def sleep(guard, seconds=200):
+    for info in guard._disks.values():
+        info['changed'] -= seconds
+
+
+def test_idle_detection(guard, monkeypatch):
+    archive = guard.nas + '/archive/photos'
+    assert not guard.is_idle(archive)  # Just seen
+    sleep(guard)
+    assert guard.is_idle(archive)
+    assert not guard.is_idle(guard.nas + '/users')  # SSD: never idle
+    guard.sample()
+    assert guard.is_idle(archive)  # Same counters: still idle
+    counters(monkeypatch, 'diskstats_t1')
+    guard.sample()
+    assert not guard.is_idle(archive)
+
+
+def test_listing_is_only_served_while_the_disk_is_untouched(guard, monkeypatch):
+    folder = guard.nas + '/archive/photos'
+    entries = [{'name': 'a.jpg', 'is_dir': False, 'size': 1, 'mtime': 0, 'path': 'archive/photos/a.jpg'}]
+    guard.remember_listing(folder, entries, guard.activity(folder))
+    assert guard.cached_listing(folder) is None  # Disk not idle yet
+    sleep(guard)
+    assert guard.cached_listing(folder) == entries
+    counters(monkeypatch, 'diskstats_t1')  # Something was read or written since
+    assert guard.cached_listing(folder) is None
+
+
+def test_ssd_listings_are_not_kept(guard):
+    guard.remember_listing(guard.nas + '/users', [], guard.activity(guard.nas + '/users'))
+    assert len(guard._listings) == 0
+
+
+def test_invalidation(guard):
+    for rel in ('archive', 'archive/a', 'archive/a/b', 'archive/c'):
+        path = guard.nas + '/' + rel
+        guard.remember_listing(path, [], guard.activity(path))
+    guard.invalidate('archive/a')  # The folder, everything below it and its parent
+    assert list(guard._listings) == ['archive/c']
+    guard.invalidate('')
+    assert len(guard._listings) == 0
+
+
+def test_least_recently_used_listing_is_dropped(guard):
+    guard._app.config['SPINDOWN_SNAPSHOT_DIRS'] = 2
+    sleep(guard)
+    for rel in ('archive/1', 'archive/2'):
+        path = guard.nas + '/' + rel
+        guard.remember_listing(path, [], guard.activity(path))
+    assert guard.cached_listing(guard.nas + '/archive/1') == []  # Now the most recently used
+    guard.remember_listing(guard.nas + '/archive/3', [], guard.activity(guard.nas + '/archive/3'))
+    assert list(guard._listings) == ['archive/1', 'archive/3']
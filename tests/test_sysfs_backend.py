@@ -0,0 +1,55 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from disk_manager.sysfs_backend import parse_sysfs_disks, parse_mountinfo
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'sysfs')
+
+
+def load_fixture():
+    disks = parse_sysfs_disks(sys_root=os.path.join(FIXTURE, 'sys'),
+                              mountinfo_path=os.path.join(FIXTURE, 'mountinfo'),
+                              udev_dir=os.path.join(FIXTURE, 'run', 'udev', 'data'))
+    return {d.id: d for d in disks}
+
+
+def test_skips_non_disks():
+    assert sorted(load_fixture()) == ['/dev/mmcblk0', '/dev/sda', '/dev/sdb']
+
+
+def test_usb_stick():
+    sda = load_fixture()['/dev/sda']
+    assert sda.name == 'Ultra Fit'
+    assert sda.size_bytes == 62521344 * 512
+    assert sda.is_removable and not sda.is_rotational and not sda.is_system_disk
+    assert sda.serial == '4C530001230509115284'  # Only udev knows it
+    assert sda.mount_points == []
+    assert [(p.name, p.filesystem, p.mount_point) for p in sda.partitions] == [('/dev/sda1', 'exfat', None)]
+    assert sda.filesystem == 'exfat'
+
+
+def test_system_sd_card():
+    mmc = load_fixture()['/dev/mmcblk0']
+    assert mmc.name == 'Unknown Disk'
+    assert mmc.serial == '0x1234abcd'
+    assert mmc.is_system_disk
+    assert mmc.mount_points == ['/boot/firmware', '/']
+    assert [p.name for p in mmc.partitions] == ['/dev/mmcblk0p1', '/dev/mmcblk0p2']
+    assert mmc.partitions[1].size_bytes == 61276160 * 512
+    assert mmc.filesystem == 'vfat'
+
+
+def test_whole_disk_filesystem():
+    sdb = load_fixture()['/dev/sdb']
+    assert sdb.is_rotational
+    assert sdb.partitions == []
+    assert sdb.filesystem == 'ext4'
+    assert sdb.mount_points == ['/mnt/my disk']  # \040 unescaped, first mount wins
+
+
+def test_mountinfo_bind_mounts_are_kept_in_order():
+    mounts = parse_mountinfo(os.path.join(FIXTURE, 'mountinfo'))
+    assert mounts['8:16'] == [('/mnt/my disk', 'ext4'), ('/srv/backups', 'ext4')]
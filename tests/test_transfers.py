@@ -0,0 +1,133 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from services.transfers import TokenBucket, TransferRejected, TransferScheduler
+
+
+@pytest.fixture
+def make_scheduler():
+    def make(**config):
+        app = Flask(__name__)
+        app.config.update(config)
+        scheduler = TransferScheduler()
+        scheduler.init_app(app)
+        return scheduler
+    return make
+
+
+def test_bucket_unlimited():
+    bucket = TokenBucket(0, 0)
+    assert bucket.reserve(10 ** 9) == 0.0
+
+
+def test_bucket_charges_debt():
+    bucket = TokenBucket(1000, 1000)
+    assert bucket.reserve(1000) == 0.0
+    assert bucket.reserve(500) == pytest.approx(0.5, abs=0.01)
+
+
+def test_bucket_under_concurrency():
+    # Ten threads reserving at once must queue up one after another, never share tokens.
+    bucket = TokenBucket(1000, 100)
+    delays, barrier = [], threading.Barrier(10)
+
+    def reserve():
+        barrier.wait()
+        delays.append(bucket.reserve(100))
+
+    threads = [threading.Thread(target=reserve) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    expected = [i / 10 for i in range(10)]
+    assert sorted(delays) == pytest.approx(expected, abs=0.02)
+
+
+def test_global_rate_split_by_role_weight(make_scheduler):
+    scheduler = make_scheduler(TRANSFER_GLOBAL_RATE=4000, TRANSFER_ROLE_WEIGHTS={'admin': 3, 'user': 1})
+    admin = scheduler.start('root', 'admin', 'download', 'a')
+    scheduler.start('bob', 'user', 'download', 'b')
+    rates = {u['username']: u['rate_limit'] for u in scheduler.snapshot()['users']}
+    assert rates == {'root': 3000, 'bob': 1000}
+
+    scheduler.finish(admin)
+    rates = {u['username']: u['rate_limit'] for u in scheduler.snapshot()['users']}
+    assert rates == {'bob': 4000}
+
+
+def test_user_rate_caps_fair_share(make_scheduler):
+    scheduler = make_scheduler(TRANSFER_GLOBAL_RATE=4000, TRANSFER_USER_RATE=1500)
+    scheduler.start('bob', 'user', 'upload', 'b')
+    assert scheduler.snapshot()['users'][0]['rate_limit'] == 1500
+
+
+def test_admission_under_concurrency(make_scheduler):
+    scheduler = make_scheduler(TRANSFER_MAX_ACTIVE=3, TRANSFER_MAX_PER_USER=2,
+                               TRANSFER_QUEUE_SIZE=20, TRANSFER_QUEUE_TIMEOUT=5)
+    lock, active, peak = threading.Lock(), {}, {'all': 0}
+
+    def transfer(username):
+        t = scheduler.start(username, 'user', 'download', 'f')
+        with lock:
+            active[username] = active.get(username, 0) + 1
+            assert active[username] <= 2
+            peak['all'] = max(peak['all'], sum(active.values()))
+        time.sleep(0.02)
+        with lock:
+            active[username] -= 1
+        scheduler.finish(t)
+
+    threads = [threading.Thread(target=transfer, args=(name,)) for name in ('alice', 'bob') * 6]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    admission = scheduler.snapshot()['admission']
+    assert peak['all'] <= 3
+    assert admission['admitted'] == 12 and admission['active'] == 0 and admission['queue_depth'] == 0
+
+
+def test_full_queue_is_rejected_with_retry_after(make_scheduler):
+    scheduler = make_scheduler(TRANSFER_MAX_ACTIVE=1, TRANSFER_QUEUE_SIZE=0, TRANSFER_RETRY_AFTER=7)
+    scheduler.start('alice', 'user', 'download', 'a')
+    with pytest.raises(TransferRejected) as excinfo:
+        scheduler.start('bob', 'user', 'download', 'b')
+    assert excinfo.value.retry_after == 7
+    assert scheduler.snapshot()['admission']['rejected'] == 1
+
+
+def test_queued_transfer_times_out(make_scheduler):
+    scheduler = make_scheduler(TRANSFER_MAX_PER_USER=1, TRANSFER_QUEUE_TIMEOUT=0.05)
+    scheduler.start('alice', 'user', 'download', 'a')
+    with pytest.raises(TransferRejected):
+        scheduler.start('alice', 'user', 'download', 'b')
+    admission = scheduler.snapshot()['admission']
+    assert (admission['timed_out'], admission['queue_depth']) == (1, 0)
+
+
+def test_user_at_limit_does_not_block_the_queue(make_scheduler):
+    scheduler = make_scheduler(TRANSFER_MAX_ACTIVE=2, TRANSFER_MAX_PER_USER=1, TRANSFER_QUEUE_TIMEOUT=5)
+    first = scheduler.start('alice', 'user', 'download', 'a')
+    blocker = scheduler.start('carol', 'user', 'download', 'c')
+    started = []
+    waiters = [threading.Thread(target=lambda u=u: started.append(scheduler.start(u, 'user', 'download', u)))
+               for u in ('alice', 'bob')]
+    for t in waiters:
+        t.start()
+        time.sleep(0.05)  # Queue alice first, then bob
+    scheduler.finish(blocker)  # Frees a slot alice cannot use yet
+    waiters[1].join(2)
+    assert [t.username for t in started] == ['bob']
+    scheduler.finish(first)
+    waiters[0].join(2)
+    assert sorted(t.username for t in started) == ['alice', 'bob']
@@ -0,0 +1,115 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from models import db, TrashItem
+from services.access_control import authorize_path
+from services.file_ops import validate_batch
+from services.trash import TrashPurger, find_item, move_to_trash, request_purge, restore_item
+
+BOB = SimpleNamespace(id=1, username='bob', role='user')
+ALICE = SimpleNamespace(id=2, username='alice', role='user')
+ADMIN = SimpleNamespace(id=3, username='admin', role='admin')
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite:///' + str(tmp_path / 'trash.db'),
+                      NAS_ROOT=str(tmp_path / 'nas'), TRASH_ACTIVITY_FILE=str(tmp_path / 'last_request'),
+                      TRASH_IDLE_SECONDS=0, TRASH_PURGE_RATE=10000)
+    os.makedirs(os.path.join(app.config['NAS_ROOT'], 'users', 'bob', 'docs', 'deep'))
+    for name in ('docs/a.txt', 'docs/deep/b.txt', 'notes.txt'):
+        with open(os.path.join(app.config['NAS_ROOT'], 'users', 'bob', name), 'w') as f:
+            f.write(name)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def purger_for(app):
+    purger = TrashPurger()
+    purger._app = app
+    purger._activity_file = app.config['TRASH_ACTIVITY_FILE']
+    purger._last_request = 0
+    return purger
+
+
+def test_trash_is_out_of_reach(app):
+    nas = app.config['NAS_ROOT']
+    item = move_to_trash(BOB, 'users/bob/docs', nas)
+    assert item.trash_path == f'.trash/bob/{item.id}-docs'
+    assert os.path.isdir(os.path.join(nas, item.trash_path))
+    assert not os.path.exists(os.path.join(nas, 'users', 'bob', 'docs'))
+
+    for user in (BOB, ADMIN):
+        assert authorize_path(user, item.trash_path, nas)[0] is None
+        assert authorize_path(user, '.trash', nas)[0] is None
+    _, errors = validate_batch(ADMIN, [{'op': 'move', 'path': item.trash_path, 'dest': 'shared'}], nas)
+    assert errors
+
+
+def test_items_are_scoped_to_their_owner(app):
+    item = move_to_trash(BOB, 'users/bob/notes.txt', app.config['NAS_ROOT'])
+    assert find_item(BOB, str(item.id)) is item
+    assert find_item(ALICE, str(item.id)) is None
+    assert find_item(ADMIN, str(item.id)) is None
+    assert find_item(BOB, 'abc') is None
+    request_purge([item])
+    assert find_item(BOB, str(item.id)) is None
+
+
+def test_restore(app):
+    nas = app.config['NAS_ROOT']
+    first = move_to_trash(BOB, 'users/bob/notes.txt', nas)
+    with open(os.path.join(nas, 'users', 'bob', 'notes.txt'), 'w') as f:
+        f.write('new notes')
+    assert restore_item(first, nas) == 'users/bob/notes (restored).txt'
+    assert TrashItem.query.count() == 0
+
+    folder = move_to_trash(BOB, 'users/bob/docs', nas)
+    assert restore_item(folder, nas) == 'users/bob/docs'
+    assert os.path.isfile(os.path.join(nas, 'users', 'bob', 'docs', 'deep', 'b.txt'))
+
+
+def test_purge_removes_requested_and_expired_items(app):
+    nas = app.config['NAS_ROOT']
+    requested = move_to_trash(BOB, 'users/bob/docs', nas)
+    expired = move_to_trash(BOB, 'users/bob/notes.txt', nas)
+    with open(os.path.join(nas, 'users', 'bob', 'keep.txt'), 'w'):
+        pass
+    kept = move_to_trash(BOB, 'users/bob/keep.txt', nas)
+    request_purge([requested])
+    expired.deleted_at = datetime.utcnow() - timedelta(days=31)
+    db.session.commit()
+
+    assert purger_for(app).purge_once() == 2
+    assert [i.id for i in TrashItem.query] == [kept.id]
+    assert os.listdir(os.path.join(nas, '.trash', 'bob')) == [f'{kept.id}-keep.txt']
+
+
+def test_purge_stops_when_requests_resume(app):
+    app.config['TRASH_IDLE_SECONDS'] = 30
+    item = move_to_trash(BOB, 'users/bob/docs', app.config['NAS_ROOT'])
+    request_purge([item])
+    purger = purger_for(app)
+    other_worker = purger_for(app)
+    other_worker.touch()  # A request in another worker stamps the shared activity file
+    assert not purger._is_idle()
+    assert purger.purge_once() == 0
+    assert TrashItem.query.count() == 1
+
+    os.utime(app.config['TRASH_ACTIVITY_FILE'], (time.time() - 60, time.time() - 60))
+    other_worker._last_request = 0
+    assert purger._is_idle()
+    assert purger.purge_once() == 1
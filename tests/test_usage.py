@@ -0,0 +1,77 @@
+import sys
+import os
+
+# Add the project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import time
+
+import pytest
+
+from disk_manager import usage as usage_module
+from disk_manager.models import MountUsage
+from disk_manager.usage import MountUsageCache, stat_mount
+
+
+@pytest.fixture
+def fake_statvfs(monkeypatch):
+    """stat_mount stand-in: '/hung' blocks until released; calls are counted per mount."""
+    calls, release = {}, threading.Event()
+
+    def fake(mount_point):
+        calls[mount_point] = calls.get(mount_point, 0) + 1
+        if mount_point == '/hung':
+            release.wait(10)
+        return MountUsage(total_bytes=100, used_bytes=40, free_bytes=60)
+
+    monkeypatch.setattr(usage_module, 'stat_mount', fake)
+    yield calls, release
+    release.set()
+
+
+def test_stat_mount(tmp_path):
+    usage = stat_mount(str(tmp_path))
+    assert usage.total_bytes > 0
+    assert 0 <= usage.free_bytes <= usage.total_bytes - usage.used_bytes
+    if hasattr(os, 'statvfs'):
+        assert usage.used_inodes + usage.free_inodes <= usage.total_inodes
+
+
+def test_usage_is_cached(fake_statvfs):
+    calls, _ = fake_statvfs
+    cache = MountUsageCache()
+    first = cache.get_many(['/', '/mnt/usb'])
+    assert first['/'].used_bytes == 40 and not first['/'].stale
+    cache.get_many(['/', '/mnt/usb'])
+    assert calls == {'/': 1, '/mnt/usb': 1}
+
+
+def test_hung_mount_costs_the_timeout_once(fake_statvfs):
+    calls, release = fake_statvfs
+    cache = MountUsageCache()
+    cache.timeout = 0.2
+
+    started = time.monotonic()
+    result = cache.get_many(['/', '/hung'])
+    assert time.monotonic() - started < 1
+    assert result['/hung'] is None and result['/'].used_bytes == 40
+
+    started = time.monotonic()
+    assert cache.get_many(['/hung'])['/hung'] is None
+    assert time.monotonic() - started < 0.1  # Already known to hang: not waited for again
+    assert calls['/hung'] == 1  # ...and not probed a second time
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while '/hung' not in cache._cache and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get_many(['/hung'])['/hung'].used_bytes == 40
+
+
+def test_stale_values_while_a_mount_hangs(fake_statvfs):
+    cache = MountUsageCache()
+    cache.timeout = 0.1
+    cache._cache['/hung'] = (0.0, MountUsage(total_bytes=100, used_bytes=90, free_bytes=10))  # Expired
+    result = cache.get_many(['/hung'])['/hung']
+    assert result.stale and result.used_bytes == 90
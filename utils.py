@@ -2,6 +2,11 @@ import os
 import shutil
 import pwd
 
+from services.path_resolver import resolve_path
+
+# Name of the per-filesystem trash folder; hidden from listings and never browsable
+TRASH_DIR_NAME = '.trash'
+
 def get_disk_usage(path):
     """
     Returns disk usage statistics for the file system containing path.
@@ -48,15 +53,7 @@ def safe_join(root, path):
     """
     Safely joins a root directory and a user-provided path to prevent directory traversal.
     Returns the absolute path if safe, or None if unsafe.
+    Symlinks are resolved: a path whose real location is outside root is unsafe too.
     """
-    # Normalize the path to prevent .. attacks
-    if not path:
-        return root
-        
-    full_path = os.path.abspath(os.path.join(root, path.strip('/')))
-    
-    # Ensure the final path starts with the root path
-    if os.path.commonprefix([root, full_path]) == root:
-        return full_path
-    
-    return None
+    resolved = resolve_path(root, path)
+    return resolved.abs if resolved else None